@@ -1,5 +1,6 @@
 """Camera configuration settings"""
 import os
+import json
 import requests
 from typing import Dict, Optional
 from dotenv import load_dotenv
@@ -50,6 +51,12 @@ if api_config:
 else:
     pass
 
+# Region of interest and counting lines of this camera, normalized 0-1 coordinates:
+# {"roi": [[x, y], ...], "lines": [{"name": "entrance", "points": [[x1, y1], [x2, y2]]}]}
+# Crossing a line towards the right-hand side of its first-to-second point direction counts as "in".
+# Taken from the store API ("regions") or the CAMERA_REGIONS environment variable (JSON); none = full frame.
+REGION_CONFIG = (api_config or {}).get("regions") or json.loads(os.getenv("CAMERA_REGIONS") or "{}")
+
 def get_stream_url(stream_type="main"):
     """Get formatted stream URL"""
     # For development/testing, use webcam if no camera credentials
@@ -0,0 +1,42 @@
+"""Face detection, embedding and unique-visitor grouping settings"""
+
+# Unique face counting (face_rekognition.py)
+FACE_CONFIG = {
+    "mode": "local",  # "local": on-device embeddings + vector search; "collection": Rekognition IndexFaces/SearchFaces;
+                      # "compare": pairwise Rekognition compare_faces
+    "model_dir": "model_cache",  # Where face models are stored (downloaded on first use)
+    "detector": {
+        "model": "face_detection_yunet_2023mar.onnx",
+        "url": "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx",
+        "score_threshold": 0.8,  # Minimum face score
+        "nms_threshold": 0.3,
+        "top_k": 50
+    },
+    "embedder": {
+        "model": "face_recognition_sface_2021dec.onnx",
+        "url": "https://github.com/opencv/opencv_zoo/raw/main/models/face_recognition_sface/face_recognition_sface_2021dec.onnx"
+    },
+    "match_threshold": 0.363,  # Cosine similarity for "same person" (SFace reference threshold)
+    "min_face_size": 24,  # Ignore faces smaller than this (pixels) - too small for a reliable embedding
+    "download_workers": 8,  # Concurrent S3 downloads while embedding a day's captures
+    "requests": {
+        "workers": 8,  # Concurrent Rekognition calls
+        "tps": 5,  # Rekognition requests per second across all workers (account limit)
+        "max_retries": 5,  # Retries of a throttled call
+        "backoff": {
+            "initial": 0.5,  # Seconds before the first retry after ThrottlingException
+            "max": 10.0
+        }
+    },
+    "collection": {
+        "prefix": "veronica",  # Collection id: <prefix>-<store>-<YYYYMMDD>, one per day
+        "match_threshold": 80.0,  # SearchFaces similarity for "same person" (same as compare_faces)
+        "max_matches": 100,  # Matches returned per SearchFaces call
+        "delete_old": True  # Delete this store's collections from previous days
+    },
+    "checkpoint": {
+        "dir": "face_state",  # Per store/day/mode grouping state, so reruns only process new captures
+        "retention_days": 7,  # Delete older checkpoint files
+        "watermark_grace": 300  # Seconds of S3 LastModified skew tolerated around the watermark
+    }
+}
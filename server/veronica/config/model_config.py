@@ -3,26 +3,65 @@ from config.performance_config import DETECTION_SETTINGS
 
 # Capture settings
 CAPTURE_CONFIG = {
-    "interval": 5,  # seconds between captures
     "output_dir": "detected_persons",  # directory to save images
-    "min_confidence": DETECTION_SETTINGS["confidence"]["min_capture"]  # minimum confidence threshold for capture
+    "min_confidence": DETECTION_SETTINGS["confidence"]["min_capture"],  # minimum confidence threshold for capture
+    "face_filter": {
+        "enabled": True,  # Check crops for a visible face (YuNet) before saving/uploading
+        "action": "skip",  # "skip": drop tracks whose candidate crops show no face; "tag": keep, mark in metadata
+        "search_fraction": 0.5,  # Only search the top part of the person crop, where the face is
+        "score_threshold": 0.6,  # Minimum face score
+        "min_face_size": 12  # Smallest usable face (pixels)
+    },
+    "best_shot": {
+        "top_k": 3,  # Candidate crops kept per track; the face check picks among these
+        "track_timeout": 2.0,  # Seconds unseen before a track counts as ended and is emitted
+        "max_track_age": 30.0,  # Emit long-lived tracks (e.g. someone standing still) after collecting this long
+        "cooldown": 60.0,  # Seconds after an emission before the same track collects candidates again
+        "lookahead": 0.5,  # Emit early when a track's motion takes it out of the frame within this many seconds
+        "track_ttl": 60.0,  # Seconds a track's state is remembered after it was last seen (no duplicate captures)
+        "max_tracks": 512,  # Upper bound on remembered tracks; least recently seen are evicted first
+        "full_size_fraction": 0.1,  # Box area (fraction of the frame) that earns the full size score
+        "sharpness_scale": 100.0,  # Laplacian variance that scores 0.5 sharpness
+        "weights": {"confidence": 0.4, "size": 0.3, "sharpness": 0.3},
+        "frontal_weight": 0.5  # Share of the final score decided by face frontalness (from YuNet landmarks)
+    },
+    "scheduler": {
+        "uploads_per_minute": 30,  # Global capture budget (token bucket refill rate)
+        "burst": 10,  # Captures allowed back to back when tokens have built up (e.g. a group arriving)
+        "max_pending": 50  # Tracks waiting for budget; lowest priority dropped beyond this
+    }
 }
 
 # Model settings
 MODEL_CONFIG = {
     "model_path": "yolov8m.pt",
+    "backend": "pytorch",  # Inference engine: "pytorch", "onnxruntime" or "openvino"
+    "imgsz": 640,          # Model input size
+    "export_dir": "model_cache",  # Where exported ONNX/OpenVINO models are cached
+    "threads": {
+        "intra_op": 0,  # Threads per inference call (0 = runtime default)
+        "inter_op": 1   # Parallel graph branches (ONNX Runtime only)
+    },
     "confidence": DETECTION_SETTINGS["confidence"]["min_detection"],  # Detection confidence threshold
     "iou": 0.45,        # IoU threshold
     "max_det": 100,     # Maximum detections per image
     "classes": [0],     # Only detect people (class 0 in COCO)
     "agnostic": False,  # Class-specific NMS
-    "verbose": False    # Disable verbose output
+    "verbose": False,   # Disable verbose output
+    "tracker": "botsort.yaml",  # Ultralytics tracker config (same default as model.track)
+    "track_confidence": 0.1,  # Low-score boxes are kept for the tracker's second association pass
+    "batching": {
+        "max_batch_size": 8,  # Maximum frames (one per stream) per forward pass
+        "max_wait": 0.02  # Seconds to wait for more streams before running a partial batch
+    }
 }
 
 # Visualization settings
 VISUALIZATION_CONFIG = {
     "box_color": (0, 255, 0),  # Green
     "box_thickness": 2,
+    "region_color": (255, 255, 0),  # Cyan ROI outline
+    "line_color": (0, 165, 255),  # Orange counting lines
     "font": {
         "face": "FONT_HERSHEY_SIMPLEX",
         "scale": 0.5,
@@ -14,8 +14,35 @@ STREAM_SETTINGS = {
     }
 }
 
+# Video ingest (decode) settings
+INGEST_SETTINGS = {
+    "backend": "opencv",  # "opencv" (cv2.VideoCapture), "pyav" (in-process libav, needs PyAV) or "ffmpeg" (subprocess)
+    "threads": 0,  # Decoder threads (0 = decoder default)
+    "hwaccel": ["vaapi", "qsv"],  # Hardware decoders to try in order, then software ([] = software only)
+    "hw_device": "/dev/dri/renderD128",  # VAAPI/QSV render node
+    "max_width": 0,  # Decode/convert at reduced resolution: frames wider than this are scaled down (0 = off)
+    "keyframe_lag": 2.0,  # Seconds behind the stream clock before non-key frames are skipped (pyav, ffmpeg)
+    "keyframe_hold": 30.0,  # Seconds ffmpeg stays in key-frame-only mode before trying full decoding again
+    "ffmpeg_path": "ffmpeg",
+    "ffprobe_path": "ffprobe",
+    "stream_selection": {
+        "enabled": True,  # Measure main/sub decode cost at startup and try the affordable stream first
+        "probe_frames": 30,  # Frames decoded per stream for the measurement
+        "max_decode_load": 0.35  # Highest acceptable decode CPU (cores) for the preferred stream
+    }
+}
+
 # Frame processing settings
 FRAME_SETTINGS = {
+    "buffer": {
+        "slots": 6,  # Preallocated frame slots (fixed memory: slots x frame size); covers the reader, detect and annotate stages
+        "mode": "latest",  # "latest" for live streams, "every" for offline replay
+        "read_timeout": 1.0  # Seconds to wait for a new frame before reusing the last one
+    },
+    "decode": {
+        "mode": "on_demand",  # "on_demand": grab every frame, decode only when consumed; "eager": decode every frame
+        "sample_stride": 0  # Also decode every Nth grabbed frame regardless of demand (0 = off)
+    },
     "retry": {
         "delay": 0.5,  # seconds between retry attempts
         "max_consecutive_failures": 10  # maximum consecutive frame read failures
@@ -28,6 +55,71 @@ FRAME_SETTINGS = {
     }
 }
 
+# Dashboard preview settings
+PREVIEW_SETTINGS = {
+    "target_fps": 15,  # Preview frames per second sent to the dashboard
+    "max_dimension": 800,  # Longest side of the preview image at full scale
+    "quality": {
+        "initial": 80,  # Starting JPEG quality
+        "min": 40,  # Lowest quality the governor may use
+        "max": 85,  # Highest quality the governor may use
+        "step": 5  # Quality change per adjustment
+    },
+    "min_scale": 0.5,  # Smallest fraction of max_dimension the governor may use
+    "bandwidth_budget": 1500000,  # Target preview bytes per second
+    "encoder": "auto"  # "auto" (simplejpeg if installed), "simplejpeg" or "opencv"
+}
+
+# Pipeline stage settings (decode -> detect -> annotate -> publish, detect -> persist)
+PIPELINE_SETTINGS = {
+    "queues": {
+        "annotate": {
+            "size": 2,  # Analysed frames waiting to be drawn
+            "policy": "drop_oldest"  # Live view: keep the newest frames
+        },
+        "persist": {
+            "size": 32,  # Captured crops waiting to be saved/uploaded
+            "policy": "drop_newest"  # Captures are rare; keep the ones already queued
+        }
+    },
+    "stats_interval": 10  # Seconds between per-stage latency/queue depth reports
+}
+
+# Motion gate in front of the detector (skips inference on static scenes)
+MOTION_SETTINGS = {
+    "enabled": True,
+    "width": 160,  # Width of the downscaled frame that is compared (pixels)
+    "blur": 5,  # Gaussian blur kernel against sensor noise (odd)
+    "pixel_threshold": 25,  # Gray level change that counts a pixel as changed
+    "min_changed_fraction": 0.002,  # Changed pixel fraction that counts as motion
+    "background_alpha": 0.05,  # Background update rate (lighting drift is absorbed, people are not)
+    "static_stride": 5,  # Detect every Nth frame while people are in view but nothing moves
+    "max_skip_seconds": 5.0  # Always detect at least this often
+}
+
+# Hybrid tracking: detector every Nth frame, optical flow in between
+HYBRID_SETTINGS = {
+    "enabled": True,
+    "target_fps": 25,  # Output rate to sustain; N = detector latency x target_fps
+    "min_interval": 1,  # Smallest N (1 = detector on every frame)
+    "max_interval": 8,  # Largest N, bounds how long boxes are only propagated
+    "flow_width": 480,  # Width of the grayscale image used for optical flow (pixels)
+    "max_points": 24,  # Corner features seeded per box
+    "min_points": 4,  # Fewer surviving points leave a box where it is
+    "fb_threshold": 1.0,  # Forward-backward error (flow pixels) above which a point is dropped
+    "min_confidence": 0.5  # Force a detection when any box keeps less than this fraction of its points
+}
+
+# Region of interest and counting line settings (the regions themselves come per camera, see camera_config)
+REGION_SETTINGS = {
+    "margin": 0.05,  # Extra border around the ROI's bounding box given to the detector (fraction of frame)
+    "max_tile_aspect": 1.5,  # Split the ROI into tiles when its long side exceeds this multiple of the short side
+    "tile_overlap": 0.2,  # Tile overlap as a fraction of the short side (people on a seam appear whole in one tile)
+    "hysteresis": 0.01,  # Distance past a counting line (fraction of frame diagonal) before a side change counts
+    "track_ttl": 10.0,  # Seconds a track's line side is remembered after it was last seen
+    "max_tracks": 512  # Upper bound on remembered tracks
+}
+
 # Detection thresholds
 DETECTION_SETTINGS = {
     "confidence": {
@@ -56,6 +56,22 @@ S3_CONFIG = {
     "base_prefix": STORE_NAME  # Use fetched store name as base prefix
 }
 
+# Background upload settings (kept out of S3_CONFIG, whose values must all be set)
+UPLOAD_SETTINGS = {
+    "spool_dir": os.getenv("UPLOAD_SPOOL_DIR") or None,  # Write every capture to disk first (survives crashes); None = in memory
+    "fallback_dir": os.getenv("UPLOAD_FALLBACK_DIR") or None,  # Write in-memory captures here only when uploads fail
+    "max_memory_items": 500,  # In-memory captures waiting for upload before spilling to fallback_dir (or dropping)
+    "content_hash_keys": False,  # Name objects by SHA-256 of the JPEG so identical captures share one object
+    "workers": 4,  # Concurrent uploads
+    "max_pool_connections": 8,  # Shared HTTP connection pool of the S3 client
+    "backoff": {
+        "initial": 1.0,  # Seconds before the first retry
+        "max": 300.0  # Longest delay between retries
+    },
+    "max_attempts": 0,  # Give up (move to <dir>/failed) after this many attempts; 0 = keep retrying
+    "endpoint_url": os.getenv("AWS_ENDPOINT_URL") or None  # e.g. a local MinIO for testing
+}
+
 def get_daily_prefix():
     """
     Generate S3 prefix with daily folder structure
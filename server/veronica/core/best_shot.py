@@ -0,0 +1,172 @@
+"""Per-track best-shot selection for person captures"""
+
+import time
+import heapq
+import itertools
+import cv2
+from core.track_store import TrackStore
+from core.capture_scheduler import CaptureScheduler
+from config.model_config import CAPTURE_CONFIG
+
+class Candidate:
+    """One candidate crop of a track"""
+
+    __slots__ = ("image", "confidence", "score", "timestamp")
+
+    def __init__(self, image, confidence, score, timestamp):
+        """Initialize candidate"""
+        self.image = image
+        self.confidence = confidence
+        self.score = score
+        self.timestamp = timestamp
+
+def sharpness(crop, width=64):
+    """Variance of the Laplacian of a small grayscale version of the crop (higher = sharper)"""
+    height = max(1, int(crop.shape[0] * width / max(1, crop.shape[1])))
+    small = cv2.resize(crop, (width, height), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+class BestShotSelector:
+    """
+    Keeps the best K crops of every live track and emits them when due.
+
+    Each detection of a track is scored from detector confidence, box size
+    relative to the frame and sharpness; only crops that enter the track's
+    top K are copied. A track's candidates are emitted, best first, when
+    its smoothed motion will carry it out of the frame within lookahead
+    seconds (leaving), when it has not been seen for track_timeout seconds
+    (ended), or after max_track_age seconds of collecting (refresh of a
+    long-lived track). After an emission the track rests for cooldown
+    seconds before collecting again; the TrackStore remembers it for
+    track_ttl seconds after it was last seen, so a briefly lost ID is not
+    captured twice. Face frontalness is judged later, on the emitted
+    candidates only (see FaceFilter.select).
+    """
+
+    def __init__(self, settings=None):
+        """Initialize selector"""
+        self.settings = settings or CAPTURE_CONFIG["best_shot"]
+        self.top_k = self.settings["top_k"]
+        self.weights = self.settings["weights"]
+        self.min_confidence = CAPTURE_CONFIG["min_confidence"]
+        self.tracks = TrackStore(self.settings["track_ttl"], self.settings["max_tracks"])
+        self._seq = itertools.count()
+        self._evicted = []  # Tracks pushed out by the capacity bound before they were emitted
+        self.frame_size = None  # (width, height) of the last frame
+
+        # Statistics
+        self.candidates_scored = 0
+        self.crops_copied = 0
+        self.tracks_emitted = 0
+
+    def score(self, crop, confidence, frame_area):
+        """Combined quality score in [0, 1]"""
+        size = min(1.0, (crop.shape[0] * crop.shape[1] / frame_area) / self.settings["full_size_fraction"])
+        sharp = sharpness(crop)
+        sharp = sharp / (sharp + self.settings["sharpness_scale"])
+        return (self.weights["confidence"] * confidence +
+                self.weights["size"] * size +
+                self.weights["sharpness"] * sharp)
+
+    def update(self, frame, boxes, confidences, track_ids, now=None):
+        """
+        Offer the detections of one frame
+        Args:
+            frame: Clean BGR frame the boxes refer to
+            boxes (list): [x1, y1, x2, y2] integer boxes
+            confidences (list): Detection confidences
+            track_ids (list): Track ids (-1 = untracked, ignored)
+            now (float, optional): Timestamp, defaults to time.time()
+        """
+        now = time.time() if now is None else now
+        self.frame_size = (frame.shape[1], frame.shape[0])
+        frame_area = float(frame.shape[0] * frame.shape[1])
+        for (x1, y1, x2, y2), confidence, track_id in zip(boxes, confidences, track_ids):
+            if track_id < 0:
+                continue
+            track, evicted = self.tracks.touch(track_id, now)
+            self._evicted.extend(record for record in evicted if record.candidates)
+            self._update_motion(track, (x1 + x2) / 2, (y1 + y2) / 2, now)
+            if self._resting(track, now) or confidence < self.min_confidence:
+                continue
+
+            view = frame[y1:y2, x1:x2]
+            self.candidates_scored += 1
+            score = self.score(view, confidence, frame_area)
+            heap = track.candidates
+            if len(heap) >= self.top_k and score <= heap[0][0]:
+                continue
+            candidate = Candidate(view.copy(), confidence, score, now)
+            self.crops_copied += 1
+            entry = (score, next(self._seq), candidate)
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, entry)
+            else:
+                heapq.heapreplace(heap, entry)
+
+    def _update_motion(self, track, x, y, now):
+        """Update a track's center and smoothed velocity"""
+        if track.center is not None:
+            last_x, last_y, last_time = track.center
+            dt = now - last_time
+            if dt > 0:
+                vx, vy = track.velocity
+                track.velocity = (0.5 * vx + 0.5 * (x - last_x) / dt, 0.5 * vy + 0.5 * (y - last_y) / dt)
+        track.center = (x, y, now)
+
+    def _resting(self, track, now):
+        """Whether a track is in its cooldown after an emission"""
+        return track.last_emitted is not None and now - track.last_emitted < self.settings["cooldown"]
+
+    def _leaving(self, track):
+        """Whether a track's motion carries its center out of the frame within the lookahead"""
+        if track.center is None or self.frame_size is None:
+            return False
+        x, y, _ = track.center
+        lookahead = self.settings["lookahead"]
+        x += track.velocity[0] * lookahead
+        y += track.velocity[1] * lookahead
+        width, height = self.frame_size
+        return not (0 <= x < width and 0 <= y < height)
+
+    def collect_finished(self, now=None):
+        """
+        Emit tracks that are leaving, ended or due for a refresh
+        Returns:
+            list: (track_id, candidates best first, CaptureScheduler priority) per emitted track
+        """
+        now = time.time() if now is None else now
+        due = [(track, CaptureScheduler.ENDED) for track in self._evicted + self.tracks.expire(now)]
+        self._evicted = []
+        for track in self.tracks:
+            if not track.candidates:
+                continue
+            collecting_since = (track.first_seen if track.last_emitted is None
+                                else track.last_emitted + self.settings["cooldown"])
+            if now - track.last_seen >= self.settings["track_timeout"]:
+                due.append((track, CaptureScheduler.ENDED))
+            elif self._leaving(track):
+                due.append((track, CaptureScheduler.LEAVING))
+            elif now - collecting_since >= self.settings["max_track_age"]:
+                due.append((track, CaptureScheduler.REFRESH))
+
+        finished = []
+        for track, priority in due:
+            if not track.candidates:
+                continue
+            candidates = [entry[2] for entry in sorted(track.candidates, key=lambda e: e[0], reverse=True)]
+            finished.append((track.track_id, candidates, priority))
+            track.candidates = []
+            track.last_emitted = now
+            self.tracks_emitted += 1
+        return finished
+
+    def get_stats(self):
+        """Get selector statistics"""
+        return {
+            "tracks": self.tracks.get_stats(),
+            "candidates_scored": self.candidates_scored,
+            "crops_copied": self.crops_copied,
+            "tracks_emitted": self.tracks_emitted
+        }
@@ -0,0 +1,70 @@
+"""Budgeted scheduling of person captures"""
+
+import json
+import itertools
+from utils.rate_limiter import RateLimiter
+from config.model_config import CAPTURE_CONFIG
+
+class CaptureScheduler:
+    """
+    Releases finished tracks for saving within a global upload budget.
+
+    Tracks are queued by priority: tracks about to leave the frame first,
+    then ended tracks, then periodic refreshes of long-lived tracks (see
+    BestShotSelector for when a track becomes due). A token bucket allows
+    uploads_per_minute on average with bursts of up to burst captures, so
+    throughput scales with the crowd until the bandwidth budget is reached.
+    When more than max_pending tracks wait, the lowest priority is dropped.
+    """
+
+    LEAVING = 0
+    ENDED = 1
+    REFRESH = 2
+
+    def __init__(self, settings=None):
+        """Initialize capture scheduler"""
+        self.settings = settings or CAPTURE_CONFIG["scheduler"]
+        self.limiter = RateLimiter(self.settings["uploads_per_minute"] / 60.0, self.settings["burst"])
+        self.pending = []  # (priority, seq, track_id, candidates), kept sorted
+        self._seq = itertools.count()
+
+        # Statistics
+        self.submitted = 0
+        self.released = 0
+        self.dropped = 0
+
+    def submit(self, track_id, candidates, priority):
+        """Queue a finished track's candidates"""
+        self.pending.append((priority, next(self._seq), track_id, candidates))
+        self.pending.sort(key=lambda item: item[:2])
+        self.submitted += 1
+        while len(self.pending) > self.settings["max_pending"]:
+            dropped = self.pending.pop()
+            self.dropped += 1
+            print(json.dumps({
+                "type": "warning",
+                "data": f"Capture budget exceeded, dropped capture for ID {dropped[2]}"
+            }), flush=True)
+
+    def release(self):
+        """
+        Take the tracks the budget allows right now
+        Returns:
+            list: (track_id, candidates) in priority order
+        """
+        released = []
+        while self.pending and self.limiter.try_acquire():
+            _, _, track_id, candidates = self.pending.pop(0)
+            released.append((track_id, candidates))
+        self.released += len(released)
+        return released
+
+    def get_stats(self):
+        """Get scheduler statistics"""
+        return {
+            "pending": len(self.pending),
+            "submitted": self.submitted,
+            "released": self.released,
+            "dropped": self.dropped,
+            "tokens": round(self.limiter.tokens, 2)
+        }
@@ -0,0 +1,105 @@
+"""Capture-time face check for person crops"""
+
+import json
+import numpy as np
+from config.model_config import CAPTURE_CONFIG
+
+def frontalness(face):
+    """
+    How frontal a face is, from its YuNet landmarks
+    Args:
+        face (np.ndarray): YuNet row (x, y, w, h, right eye, left eye, nose, mouth corners, score)
+    Returns:
+        float: 1.0 when the nose sits midway between the eyes, 0.0 for a profile
+    """
+    right_eye, left_eye, nose = face[4:6], face[6:8], face[8:10]
+    eye_distance = float(np.linalg.norm(left_eye - right_eye))
+    if eye_distance <= 0:
+        return 0.0
+    offset = abs(float(nose[0]) - float(right_eye[0] + left_eye[0]) / 2) / eye_distance
+    return max(0.0, 1.0 - 2.0 * offset)
+
+class FaceFilter:
+    """
+    Looks for a usable face in a track's candidate crops before one is saved.
+
+    The most frontal face among the candidates wins; tracks without any
+    face are skipped (or only tagged) so that they are not uploaded and
+    never reach Rekognition. The face box of kept crops is stored in the
+    S3 object metadata.
+    """
+
+    def __init__(self, settings=None):
+        """Initialize face filter; disables itself if the model cannot be loaded"""
+        self.settings = settings or CAPTURE_CONFIG["face_filter"]
+        self.enabled = self.settings["enabled"]
+        self.detector = None
+        self.checked = 0
+        self.without_face = 0
+
+        if self.enabled:
+            try:
+                from models.face_embedder import YuNetDetector
+                self.detector = YuNetDetector(score_threshold=self.settings["score_threshold"],
+                                              min_face_size=self.settings["min_face_size"])
+            except Exception as e:
+                self.enabled = False
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Face pre-filter disabled: {str(e)}"
+                }), flush=True)
+
+    def find_face(self, person_img):
+        """
+        Best face in the top part of a person crop
+        Returns:
+            np.ndarray: YuNet row (x, y, w, h, landmarks, score) in crop coordinates, or None
+        """
+        height = person_img.shape[0]
+        region = person_img[:max(1, int(height * self.settings["search_fraction"]))]
+        faces = self.detector.detect(region)
+        if len(faces) == 0:
+            return None
+        return faces[faces[:, 14].argmax()]
+
+    def select(self, candidates, frontal_weight=0.5):
+        """
+        Pick the best candidate crop of a track
+        Args:
+            candidates (list): best_shot.Candidate objects, best first
+            frontal_weight (float): Share of the final score given to face frontalness
+        Returns:
+            tuple: (candidate or None if every crop lacks a face and action is "skip", metadata)
+        """
+        if not self.enabled:
+            return candidates[0], {}
+
+        best, best_face, best_score = None, None, -1.0
+        for candidate in candidates:
+            self.checked += 1
+            face = self.find_face(candidate.image)
+            if face is None:
+                self.without_face += 1
+                continue
+            score = (1 - frontal_weight) * candidate.score + frontal_weight * frontalness(face)
+            if score > best_score:
+                best, best_face, best_score = candidate, face, score
+
+        if best is None:
+            return (candidates[0] if self.settings["action"] == "tag" else None), {"face": "none"}
+
+        x, y, w, h = best_face[:4].round().astype(int).tolist()
+        return best, {
+            "face": "yes",
+            "face-box": f"{x},{y},{w},{h}",
+            "face-score": f"{best_face[14]:.2f}",
+            "face-frontal": f"{frontalness(best_face):.2f}"
+        }
+
+    def get_stats(self):
+        """Get filter statistics"""
+        return {
+            "enabled": self.enabled,
+            "checked": self.checked,
+            "without_face": self.without_face
+        }
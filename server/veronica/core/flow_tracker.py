@@ -0,0 +1,175 @@
+"""Optical-flow box propagation between detector frames"""
+
+import math
+import time
+import cv2
+import numpy as np
+from config.performance_config import HYBRID_SETTINGS
+
+class FlowTracker:
+    """
+    Runs the detector every Nth frame and moves boxes with optical flow in between.
+
+    On a detector frame, corner features are seeded inside every box. On
+    the frames in between they are followed with pyramidal Lucas-Kanade on
+    a downscaled grayscale image, checked forward-backward, and each box is
+    shifted and scaled by the median motion of its surviving points; track
+    IDs and confidences carry over. N adapts to the measured detector
+    latency so that the output keeps up with target_fps, and a detection
+    is forced as soon as any box keeps less than min_confidence of its
+    points (occlusion, fast motion). Flow cannot find new people: with no
+    boxes to follow every frame goes to the detector, so someone entering
+    an empty scene is found on the first frame the motion gate lets
+    through; people entering next to tracked ones are found on the next
+    detector frame.
+    """
+
+    def __init__(self, settings=None):
+        """Initialize flow tracker"""
+        self.settings = settings or HYBRID_SETTINGS
+        self.enabled = self.settings["enabled"]
+        self.interval = self.settings["min_interval"]  # Current N
+        self.since_detection = 0
+        self.force = True  # Detect on the next frame
+        self.scale = 1.0  # Flow image size / frame size
+        self.prev_gray = None
+        self.detections = None  # Last detector or propagated output
+        self.points = []  # Per box: (K, 2) float32 points in flow image coordinates, or None
+        self.seeded = []  # Per box: number of points seeded on the detector frame
+
+        # Statistics
+        self.detect_latency = 0.0  # EMA, seconds
+        self.flow_latency = 0.0  # EMA, seconds
+        self.detected = 0
+        self.propagated = 0
+        self.forced = 0
+        self.confidence = 1.0  # Lowest box confidence of the last propagated frame
+
+    def _gray(self, frame):
+        """Downscaled grayscale frame used for flow (the Frame's cached view)"""
+        gray = frame.gray(self.settings["flow_width"])
+        self.scale = gray.shape[1] / frame.shape[1]
+        return gray
+
+    def needs_detection(self):
+        """Whether the detector must run on the next frame"""
+        if not self.enabled or self.force or self.detections is None or len(self.detections) == 0:
+            return True  # Nothing to propagate: an empty scene is only ever checked by the detector
+        return self.since_detection + 1 >= self.interval
+
+    def reset(self, frame, detections, latency):
+        """
+        Take a fresh detector output and seed flow points in its boxes
+        Args:
+            frame (Frame): Frame the detections belong to
+            detections (np.ndarray): (N, 7) detector output
+            latency (float): Seconds the detector took
+        """
+        self.detected += 1
+        self.detect_latency = latency if self.detected == 1 else 0.8 * self.detect_latency + 0.2 * latency
+        self.since_detection = 0
+        self.force = False
+        self.detections = detections
+        if not self.enabled:
+            return
+
+        # Detect often enough to keep target_fps when every detection costs detect_latency
+        wanted = math.ceil(self.detect_latency * self.settings["target_fps"])
+        self.interval = max(self.settings["min_interval"], min(self.settings["max_interval"], wanted))
+
+        self.prev_gray = self._gray(frame)
+        height, width = self.prev_gray.shape
+        self.points = []
+        for x1, y1, x2, y2 in (detections[:, :4] * self.scale).astype(int).tolist():
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+            if x2 - x1 < 4 or y2 - y1 < 4:
+                self.points.append(None)
+                continue
+            corners = cv2.goodFeaturesToTrack(self.prev_gray[y1:y2, x1:x2], self.settings["max_points"], 0.01, 3)
+            if corners is None:
+                self.points.append(None)
+                continue
+            self.points.append(corners.reshape(-1, 2) + np.float32([x1, y1]))
+        self.seeded = [len(p) if p is not None else 0 for p in self.points]
+
+    def propagate(self, frame):
+        """
+        Move the last boxes to this frame
+        Args:
+            frame (Frame): Current frame
+        Returns:
+            np.ndarray: (N, 7) detections, or None if tracking is unreliable and the detector must run
+        """
+        start = time.perf_counter()
+        gray = self._gray(frame)
+        if self.prev_gray is None or gray.shape != self.prev_gray.shape:
+            self.force = True
+            return None
+
+        detections = self.detections.copy()
+        counts = [len(p) if p is not None else 0 for p in self.points]
+        if sum(counts) > 0:
+            old = np.concatenate([p for p in self.points if p is not None]).reshape(-1, 1, 2)
+            lk = dict(winSize=(15, 15), maxLevel=2)
+            new, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, old, None, **lk)
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, new, None, **lk)
+            error = np.linalg.norm((old - back).reshape(-1, 2), axis=1)
+            good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.settings["fb_threshold"])
+            old, new = old.reshape(-1, 2), new.reshape(-1, 2)
+        else:
+            good = np.zeros(0, dtype=bool)
+
+        lowest = 1.0
+        offset = 0
+        for i, count in enumerate(counts):
+            if count == 0:
+                continue  # Nothing to follow (tiny or featureless box); it keeps its last position
+            keep = good[offset:offset + count]
+            box_old, box_new = old[offset:offset + count][keep], new[offset:offset + count][keep]
+            offset += count
+            lowest = min(lowest, len(box_old) / self.seeded[i])
+            if len(box_old) < self.settings["min_points"]:
+                self.points[i] = box_new
+                continue
+
+            # Median shift, and median change of spread around the centroid for scale
+            shift = np.median(box_new - box_old, axis=0) / self.scale
+            spread_old = np.linalg.norm(box_old - box_old.mean(axis=0), axis=1)
+            spread_new = np.linalg.norm(box_new - box_new.mean(axis=0), axis=1)
+            valid = spread_old > 1e-3
+            ratio = float(np.median(spread_new[valid] / spread_old[valid])) if valid.any() else 1.0
+            x1, y1, x2, y2 = detections[i, :4]
+            cx, cy = (x1 + x2) / 2 + shift[0], (y1 + y2) / 2 + shift[1]
+            half_w, half_h = (x2 - x1) / 2 * ratio, (y2 - y1) / 2 * ratio
+            detections[i, :4] = [cx - half_w, cy - half_h, cx + half_w, cy + half_h]
+            self.points[i] = box_new
+
+        self.prev_gray = gray
+        self.confidence = lowest
+        elapsed = time.perf_counter() - start
+        self.flow_latency = elapsed if self.propagated == 0 else 0.8 * self.flow_latency + 0.2 * elapsed
+        if lowest < self.settings["min_confidence"]:
+            self.force = True
+            self.forced += 1
+            return None
+
+        self.propagated += 1
+        self.since_detection += 1
+        self.detections = detections
+        return detections
+
+    def get_stats(self):
+        """Get tracker statistics"""
+        frames = self.detected + self.propagated
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "detected": self.detected,
+            "propagated": self.propagated,
+            "forced": self.forced,
+            "detect_fraction": round(self.detected / frames, 3) if frames else 0.0,
+            "detect_ms": round(1000 * self.detect_latency, 2),
+            "flow_ms": round(1000 * self.flow_latency, 2),
+            "confidence": round(self.confidence, 2)
+        }
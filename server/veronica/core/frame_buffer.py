@@ -0,0 +1,222 @@
+"""Bounded ring buffer of preallocated frame slots"""
+
+import threading
+import numpy as np
+
+class FrameRingBuffer:
+    """
+    Fixed-size frame store shared between the stream reader thread and a
+    single consumer.
+
+    Frames are copied into a small set of reusable numpy slots, so memory use
+    is fixed at ``slots * frame size`` no matter how far the consumer falls
+    behind. Two read modes are supported:
+
+    - ``latest``: ``get`` always returns the newest frame and reports how many
+      frames were overwritten since the previous read (live streams).
+    - ``every``: ``get`` returns frames in order and ``put`` blocks while the
+      buffer is full, so nothing is dropped (offline replay).
+
+    ``get`` hands out read-only views of the slots instead of copies. The
+    slot last returned by ``get`` is never overwritten until the next
+    ``get`` call, and ``retain`` keeps a slot from being overwritten for
+    longer (e.g. while later pipeline stages still use the frame) until
+    every reference is released. When all slots are referenced in
+    ``latest`` mode, new frames are dropped rather than waiting.
+    """
+
+    LATEST = "latest"
+    EVERY = "every"
+
+    def __init__(self, slots=4, mode=LATEST):
+        """Initialize frame ring buffer"""
+        if mode not in (self.LATEST, self.EVERY):
+            raise ValueError(f"Unknown frame buffer mode: {mode}")
+        if slots < 3:
+            raise ValueError("Frame buffer needs at least 3 slots")
+
+        self.mode = mode
+        self.num_slots = slots
+        self._slots = None  # Allocated on first frame once the shape is known
+        self._views = None  # Read-only view of each slot, handed to consumers
+        self._refs = [0] * slots  # Outstanding retain() references per slot
+        self._generation = 0  # Bumped on (re)allocation so stale releases are ignored
+        self._seq = [-1] * slots  # Sequence number stored in each slot (-1 = empty)
+        self._write_seq = 0  # Sequence number of the next frame written
+        self._read_seq = -1  # Sequence number of the last frame returned
+        self._held = -1  # Slot currently handed out to the consumer
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # Statistics
+        self.frames_written = 0
+        self.frames_skipped = 0
+        self.frames_dropped = 0  # Not stored because every slot was referenced
+
+    def _allocate(self, frame):
+        """Allocate all slots for the given frame shape and dtype"""
+        self._slots = [np.empty_like(frame) for _ in range(self.num_slots)]
+        self._views = []
+        for slot in self._slots:
+            view = slot.view()
+            view.flags.writeable = False
+            self._views.append(view)
+        self._seq = [-1] * self.num_slots
+        self._refs = [0] * self.num_slots
+        self._generation += 1
+        self._held = -1
+
+    def _pick_write_slot(self):
+        """Pick the slot holding the oldest frame that is not handed out, or -1 if all are"""
+        candidates = [i for i in range(self.num_slots) if i != self._held and self._refs[i] == 0]
+        if not candidates:
+            return -1
+        return min(candidates, key=lambda i: self._seq[i])
+
+    def _has_space(self):
+        """Check whether a frame can be written without dropping unread frames"""
+        if self.mode == self.LATEST:
+            return True
+        if self._slots is not None and self._pick_write_slot() < 0:
+            return False  # Every slot is referenced
+        unread = self._write_seq - self._read_seq - 1
+        return unread < self.num_slots - 1  # One slot is reserved for the consumer
+
+    def put(self, frame, timeout=None):
+        """
+        Copy a frame into the buffer
+        Args:
+            frame: BGR image array
+            timeout (float, optional): Max seconds to wait for space in ``every`` mode
+        Returns:
+            bool: True if the frame was stored
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._closed or self._has_space(), timeout):
+                return False
+            if self._closed:
+                return False
+
+            if (self._slots is None or
+                    self._slots[0].shape != frame.shape or
+                    self._slots[0].dtype != frame.dtype):
+                self._allocate(frame)
+
+            slot = self._pick_write_slot()
+            if slot < 0:
+                self.frames_dropped += 1  # Consumers still hold every slot
+                return False
+            self._seq[slot] = -1  # Invalidate while writing
+            target = self._slots[slot]
+
+        # Copy outside the lock so readers are not blocked by the memcpy
+        np.copyto(target, frame)
+
+        with self._cond:
+            if self._slots is None or self._slots[slot] is not target:
+                return False  # Buffer was reset or reallocated meanwhile
+            self._seq[slot] = self._write_seq
+            self._write_seq += 1
+            self.frames_written += 1
+            self._cond.notify_all()
+        return True
+
+    def _pick_read_slot(self):
+        """Find the slot to return next, or -1 if there is no unread frame"""
+        best = -1
+        for i, seq in enumerate(self._seq):
+            if seq <= self._read_seq:
+                continue
+            if best < 0:
+                best = i
+            elif self.mode == self.LATEST and seq > self._seq[best]:
+                best = i
+            elif self.mode == self.EVERY and seq < self._seq[best]:
+                best = i
+        return best
+
+    def get(self, timeout=None):
+        """
+        Get the next frame according to the read mode
+        Args:
+            timeout (float, optional): Max seconds to wait for an unread frame
+        Returns:
+            tuple: (frame, skipped) where frame is a read-only view (None if nothing
+                   new arrived) and skipped is the number of frames dropped since the last read
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._pick_read_slot() >= 0, timeout)
+            slot = self._pick_read_slot()
+            if slot < 0:
+                return None, 0
+
+            seq = self._seq[slot]
+            skipped = seq - self._read_seq - 1 if self._read_seq >= 0 else 0
+            self.frames_skipped += skipped
+            self._read_seq = seq
+            self._held = slot
+            self._cond.notify_all()  # Wake a producer waiting for space
+            return self._views[slot], skipped
+
+    def peek_latest(self):
+        """Return the most recently returned frame again, or None"""
+        with self._cond:
+            if self._held < 0 or self._slots is None:
+                return None
+            return self._views[self._held]
+
+    def retain(self, frame):
+        """
+        Keep the slot behind a frame returned by get() from being overwritten
+        Args:
+            frame: Array returned by get() or peek_latest()
+        Returns:
+            callable: Releases the reference (further calls do nothing), or
+                      None if the frame is not a slot of this buffer
+        """
+        with self._cond:
+            if self._views is None:
+                return None
+            slot = next((i for i, view in enumerate(self._views) if view is frame), -1)
+            if slot < 0:
+                return None
+            self._refs[slot] += 1
+            generation = self._generation
+
+        released = []
+
+        def release():
+            with self._cond:
+                if released:
+                    return
+                released.append(True)
+                if generation == self._generation and self._refs[slot] > 0:
+                    self._refs[slot] -= 1
+                    self._cond.notify_all()  # Wake a producer waiting for a free slot
+        return release
+
+    def clear(self):
+        """Drop all stored frames, keeping the allocated slots"""
+        with self._cond:
+            self._seq = [-1] * self.num_slots
+            self._read_seq = self._write_seq - 1
+            self._cond.notify_all()
+
+    def close(self):
+        """Release slot memory and wake any waiting threads"""
+        with self._cond:
+            self._closed = True
+            self._slots = None
+            self._views = None
+            self._generation += 1
+            self._seq = [-1] * self.num_slots
+            self._refs = [0] * self.num_slots
+            self._held = -1
+            self._cond.notify_all()
+
+    @property
+    def nbytes(self):
+        """Total memory held by the slots"""
+        if self._slots is None:
+            return 0
+        return sum(slot.nbytes for slot in self._slots)
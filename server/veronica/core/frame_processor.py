@@ -3,19 +3,40 @@
 import numpy as np
 import time
 import json
-from utils.visualization import draw_detection_box, draw_stats
+from utils.visualization import draw_detection_box, draw_stats, draw_regions
 from utils.file_utils import save_person_image
-from config.model_config import CAPTURE_CONFIG
-from config.performance_config import FRAME_SETTINGS, DETECTION_SETTINGS
+from models.detections import CONF, CLASS_ID, TRACK_ID, clip_boxes, empty_detections
+from models.frame import as_frame
+from core.face_filter import FaceFilter
+from core.best_shot import BestShotSelector
+from core.capture_scheduler import CaptureScheduler
+from core.motion_gate import MotionGate
+from core.flow_tracker import FlowTracker
+from core.regions import RegionOfInterest, LineCounter, anchor_points
+from config.performance_config import FRAME_SETTINGS, DETECTION_SETTINGS, PREVIEW_SETTINGS
 
 class FrameProcessor:
-    def __init__(self, model):
-        """Initialize frame processor"""
+    def __init__(self, model, capture_sink=None, regions=None):
+        """
+        Initialize frame processor
+        Args:
+            model (YOLOModel): Detector
+            capture_sink (callable, optional): See capture_sink below
+            regions (dict, optional): Camera ROI polygon and counting lines (camera_config.REGION_CONFIG format)
+        """
         self.model = model
+        regions = regions or {}
+        self.roi = RegionOfInterest(regions["roi"]) if regions.get("roi") else None  # Detect and count only here
+        self.line_counter = LineCounter(regions.get("lines", []))  # In/out counts per counting line
         self.min_confidence = DETECTION_SETTINGS["confidence"]["min_detection"]  # Minimum confidence threshold
         self.last_person_count = 0  # Track last count for smoother display
-        self.captured_ids = set()  # Track IDs that have been captured
-        self.last_capture_time = time.time()  # Track last capture time
+        self.motion_gate = MotionGate()  # Skips inference while the scene is static
+        self.flow_tracker = FlowTracker()  # Moves boxes with optical flow between detector frames
+        self.last_detections = empty_detections()  # Carried forward on frames the gate skips
+        self.best_shots = BestShotSelector()  # Top-K candidate crops per live track, emitted when the track ends
+        self.capture_scheduler = CaptureScheduler()  # Releases emitted tracks within the upload budget, leaving tracks first
+        self.capture_sink = capture_sink  # Optional callable(candidates, track_id) that persists captures asynchronously
+        self.face_filter = FaceFilter()  # Picks the most frontal face among a track's candidates, skips faceless tracks
         self.frame_count = 0  # Track total frames processed
         self.last_gc_time = time.time()  # Track last garbage collection
         self.gc_interval = FRAME_SETTINGS["garbage_collection"]["interval"]  # Force GC interval from config
@@ -25,60 +46,117 @@ class FrameProcessor:
         if not self._validate_frame(frame):
             return None, 0
             
-        # Create a copy of the frame for visualization
+        # No copy: analysis reads the frame, drawing happens on a preview-scale copy
+        frame = as_frame(frame)
         try:
-            display_frame = frame.copy()
-        except Exception as e:
-            print(json.dumps({
-                "type": "error",
-                "data": f"Error copying frame: {str(e)}"
-            }), flush=True)
-            return None, 0
-            
-        try:
-            # Run inference
-            results = self.model.detect(frame)
-            
-            # Process detections (results is a list of [x1, y1, x2, y2, conf, class_id])
-            person_count = 0
-            
-            for detection in results:
-                x1, y1, x2, y2, conf, class_id, track_id = detection
-                # Only process if it's a person with sufficient confidence
-                if int(class_id) == 0 and float(conf) >= self.min_confidence:
-                    if self._process_detection_from_list(detection, display_frame):
-                        person_count += 1
-            
-            # Update last known count
-            self.last_person_count = person_count
-            
-            # Draw statistics
-            draw_stats(display_frame, 0, person_count, 0)
-            
-            # Increment frame count and check for garbage collection
-            self.frame_count += 1
-            current_time = time.time()
-            if current_time - self.last_gc_time >= self.gc_interval:
-                import gc
-                gc.collect()
-                self.last_gc_time = current_time
-            
-            # Log person count periodically
-            if self.frame_count % FRAME_SETTINGS["logging"]["frame_interval"] == 0:  # Log based on configured interval
-                print(json.dumps({
-                    "type": "info",
-                    "data": f"Current person count: {person_count}"
-                }), flush=True)
-            
-            return display_frame, person_count
+            analysis = self.analyze(frame)
+            return self.annotate(frame, analysis), analysis["person_count"]
             
         except Exception as e:
             print(json.dumps({
                 "type": "error",
                 "data": f"Error processing frame: {str(e)}"
             }), flush=True)
-            return display_frame, self.last_person_count
+            # Unannotated preview, writable like the annotated one
+            return frame.preview(PREVIEW_SETTINGS["max_dimension"]).copy(), self.last_person_count
+            
+    def analyze(self, frame):
+        """
+        Detect and track people and handle captures, without drawing
+        Args:
+            frame: Frame (or clean BGR image); candidate crops are copied out of it before returning
+        Returns:
+            dict: boxes, confidences and track_ids as Python lists, person_count (inside the ROI) and line counts
+        """
+        # Run inference unless the scene is static; the tracker then keeps its state
+        frame = as_frame(frame)
+        rect = self.roi.bounds(frame.shape) if self.roi is not None else None
+        if self.motion_gate.should_detect(frame, len(self.last_detections) > 0, rect=rect):
+            self.last_detections = self._detect(frame)
+        detections = self.last_detections
+        
+        # Filter, clip and count as array operations on the (N, 7) detections
+        height, width = frame.shape[:2]
+        keep = (detections[:, CLASS_ID] == 0) & (detections[:, CONF] >= self.min_confidence)
+        detections = detections[keep]
+        boxes, valid = clip_boxes(detections, width, height)
+        
+        # Lines see every tracked person; counts and captures only those whose feet are in the ROI
+        feet = anchor_points(boxes)
+        self.line_counter.update(detections[valid, TRACK_ID].astype(np.int64).tolist(), feet[valid], frame.shape)
+        if self.roi is not None:
+            valid &= self.roi.contains(feet, frame.shape)
+        
+        # One bulk conversion to Python values for drawing and capture
+        analysis = {
+            "boxes": boxes[valid].tolist(),
+            "confidences": detections[valid, CONF].tolist(),
+            "track_ids": detections[valid, TRACK_ID].astype(np.int64).tolist(),
+            "person_count": int(valid.sum()),
+            "line_counts": self.line_counter.get_stats()
+        }
+        self._handle_captures(frame.image, analysis)
+        
+        # Update last known count
+        person_count = analysis["person_count"]
+        self.last_person_count = person_count
+        
+        # Increment frame count and check for garbage collection
+        self.frame_count += 1
+        current_time = time.time()
+        if current_time - self.last_gc_time >= self.gc_interval:
+            import gc
+            gc.collect()
+            self.last_gc_time = current_time
+        
+        # Log person count periodically
+        if self.frame_count % FRAME_SETTINGS["logging"]["frame_interval"] == 0:  # Log based on configured interval
+            print(json.dumps({
+                "type": "info",
+                "data": f"Current person count: {person_count}"
+            }), flush=True)
+        
+        return analysis
+        
+    def _detect(self, frame):
+        """Run the detector, or propagate the last boxes with optical flow between detector frames"""
+        if not self.flow_tracker.needs_detection():
+            detections = self.flow_tracker.propagate(frame)
+            if detections is not None:
+                return detections
+            
+        start = time.perf_counter()
+        if self.roi is not None:
+            detections = self.model.detect_regions(frame, self.roi.regions(frame.shape))
+        else:
+            detections = self.model.detect(frame)
+        self.flow_tracker.reset(frame, detections, time.perf_counter() - start)
+        return detections
+        
+    def annotate(self, frame, analysis):
+        """
+        Draw detection boxes and statistics for an analyze() result
+        Args:
+            frame (Frame): The analyzed frame
+            analysis (dict): analyze() result
+        Returns:
+            np.ndarray: Annotated copy of the frame's preview-scale view
+        """
+        display_frame = frame.preview(PREVIEW_SETTINGS["max_dimension"]).copy()
+        scale = display_frame.shape[1] / frame.shape[1]
+        for box, conf, track_id in zip(analysis["boxes"], analysis["confidences"], analysis["track_ids"]):
+            x1, y1, x2, y2 = (int(v * scale) for v in box)
+            draw_detection_box(display_frame, x1, y1, x2, y2, conf, track_id)
+            
+        if self.roi is not None or self.line_counter.lines:
+            draw_regions(display_frame,
+                         self.roi.pixel_polygon(display_frame.shape) if self.roi is not None else None,
+                         self.line_counter.pixel_lines(display_frame.shape), analysis["line_counts"])
             
+        # Draw statistics
+        draw_stats(display_frame, 0, analysis["person_count"], 0)
+        return display_frame
+        
     def _validate_frame(self, frame):
         """Validate frame data"""
         if frame is None:
@@ -105,105 +183,38 @@ class FrameProcessor:
             
         return True
 
-    def _process_detection(self, box, display_frame):
-        """Process a single detection with tracking ID"""
+    def _handle_captures(self, frame, analysis):
+        """Offer this frame's crops to the best-shot buffers and save the tracks the budget allows"""
         try:
-            conf = float(box.conf)
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            # Get tracking ID if available, otherwise use -1
-            track_id = int(box.id[0]) if hasattr(box, 'id') and box.id is not None else -1
-            
-            # Get frame dimensions for bounds checking
-            height, width = display_frame.shape[:2]
-            
-            # Ensure coordinates are within frame bounds
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(width-1, x2), min(height-1, y2)
-            
-            if x2 <= x1 or y2 <= y1:
-                return False
-                
-            # Draw detection box with track ID
-            draw_detection_box(display_frame, x1, y1, x2, y2, conf, track_id)
-            
-            # Handle image capture if needed
-            if track_id >= 0:  # Only capture if we have a valid track ID
-                current_time = time.time()
-                if (current_time - self.last_capture_time >= CAPTURE_CONFIG["interval"] and 
-                    track_id not in self.captured_ids and
-                    conf >= CAPTURE_CONFIG["min_confidence"]):
-                    try:
-                        # Extract person image from frame
-                        person_img = display_frame[y1:y2, x1:x2].copy()
-                        # Save image
-                        if save_person_image(person_img, conf, track_id):
-                            self.captured_ids.add(track_id)
-                            self.last_capture_time = current_time
-                            print(json.dumps({
-                                "type": "info",
-                                "data": f"Captured person with ID {track_id} (confidence: {conf:.2f})"
-                            }), flush=True)
-                    except Exception as e:
-                        print(json.dumps({
-                            "type": "error",
-                            "data": f"Error capturing person image: {str(e)}"
-                        }), flush=True)
-            
-            return True
-            
+            self.best_shots.update(frame, analysis["boxes"], analysis["confidences"], analysis["track_ids"])
+            for track_id, candidates, priority in self.best_shots.collect_finished():
+                self.capture_scheduler.submit(track_id, candidates, priority)
+            
+            for track_id, candidates in self.capture_scheduler.release():
+                if self.capture_sink is not None:
+                    self.capture_sink(candidates, track_id)  # Persisted on another thread
+                else:
+                    self.save_capture(candidates, track_id)
         except Exception as e:
             print(json.dumps({
                 "type": "error",
-                "data": f"Error processing detection: {str(e)}"
+                "data": f"Error capturing person image: {str(e)}"
             }), flush=True)
-            return False
-            
-    def _process_detection_from_list(self, detection, display_frame):
-        """Process a single detection from list format [x1, y1, x2, y2, conf, class_id, track_id]"""
-        try:
-            x1, y1, x2, y2, conf, _, track_id = detection
-            
-            # Get frame dimensions for bounds checking
-            height, width = display_frame.shape[:2]
-            
-            # Ensure coordinates are within frame bounds and convert to int
-            x1, y1 = max(0, int(x1)), max(0, int(y1))
-            x2, y2 = min(width-1, int(x2)), min(height-1, int(y2))
-            
-            if x2 <= x1 or y2 <= y1:
-                return False
                 
-            # Draw detection box with track ID
-            draw_detection_box(display_frame, x1, y1, x2, y2, conf, track_id)
-            
-            # Handle image capture if we have a valid track ID
-            if track_id >= 0:
-                current_time = time.time()
-                if (current_time - self.last_capture_time >= CAPTURE_CONFIG["interval"] and 
-                    track_id not in self.captured_ids and
-                    conf >= CAPTURE_CONFIG["min_confidence"]):
-                    try:
-                        # Extract person image from frame
-                        person_img = display_frame[y1:y2, x1:x2].copy()
-                        # Save image
-                        if save_person_image(person_img, conf, track_id):
-                            self.captured_ids.add(track_id)
-                            self.last_capture_time = current_time
-                            print(json.dumps({
-                                "type": "info",
-                                "data": f"Captured person with ID {track_id} (confidence: {conf:.2f})"
-                            }), flush=True)
-                    except Exception as e:
-                        print(json.dumps({
-                            "type": "error",
-                            "data": f"Error capturing person image: {str(e)}"
-                        }), flush=True)
-            
-            return True
-            
-        except Exception as e:
+    def save_capture(self, candidates, track_id):
+        """Save the best candidate crop of a finished track"""
+        candidate, metadata = self.face_filter.select(candidates, self.best_shots.settings["frontal_weight"])
+        if candidate is None:
             print(json.dumps({
-                "type": "error",
-                "data": f"Error processing detection from list: {str(e)}"
+                "type": "info",
+                "data": f"Skipped capture of ID {track_id}: no face visible"
             }), flush=True)
             return False
+            
+        if save_person_image(candidate.image, candidate.confidence, track_id, metadata):
+            print(json.dumps({
+                "type": "info",
+                "data": f"Captured person with ID {track_id} (confidence: {candidate.confidence:.2f})"
+            }), flush=True)
+            return True
+        return False
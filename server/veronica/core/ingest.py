@@ -0,0 +1,450 @@
+"""Video ingest backends: OpenCV, PyAV and an ffmpeg subprocess"""
+
+import os
+import json
+import time
+import subprocess
+import cv2
+import numpy as np
+from config.camera_config import CAMERA_CONFIG, RTSP_ENV_OPTIONS
+from config.performance_config import INGEST_SETTINGS, RTSP_SETTINGS
+
+def is_network_url(url):
+    """Whether a capture source is a network stream (as opposed to a device index or file)"""
+    return isinstance(url, str) and "://" in url
+
+def _output_size(width, height, max_width):
+    """Output frame size for decoding at reduced resolution (even dimensions, aspect kept)"""
+    if not max_width or width <= max_width:
+        return width, height
+    return max_width, max(2, int(round(height * max_width / width / 2)) * 2)
+
+def _rtsp_options():
+    """libavformat options for RTSP, from RTSP_SETTINGS"""
+    options = {
+        "rtsp_transport": RTSP_SETTINGS["transport"],
+        "max_delay": str(RTSP_SETTINGS["max_delay"]),
+        "reorder_queue_size": str(RTSP_SETTINGS["reorder_queue_size"]),
+        "buffer_size": str(RTSP_SETTINGS["buffer_size"]),
+        "stimeout": str(RTSP_SETTINGS["socket_timeout"])
+    }
+    if not RTSP_SETTINGS["flags"]["buffer"]:
+        options["fflags"] = "nobuffer"
+    if RTSP_SETTINGS["flags"]["low_delay"]:
+        options["flags"] = "low_delay"
+    return options
+
+def open_opencv(url, settings=None):
+    """
+    cv2.VideoCapture with the RTSP options and, if enabled, hardware decoding
+    (OpenCV picks VAAPI/QSV/D3D11 and falls back to software by itself)
+    """
+    settings = settings or INGEST_SETTINGS
+    if not is_network_url(url):
+        # Local cameras honour format requests; network streams ignore them
+        cap = cv2.VideoCapture(url)
+        cap.set(cv2.CAP_PROP_FPS, 30)  # Target 30 FPS
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        return cap
+
+    if url.startswith("rtsp://"):
+        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = RTSP_ENV_OPTIONS
+    params = []
+    if settings["hwaccel"]:
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG["stream_settings"]["buffer_size"])
+    return cap
+
+class PyAVCapture:
+    """
+    cv2.VideoCapture-like reader decoding in-process with PyAV.
+
+    grab() demuxes and decodes (decoder threads, optional VAAPI/QSV); the
+    BGR conversion, at reduced resolution if max_width is set, only happens
+    in retrieve(), which suits the on-demand decode of StreamHandler. When
+    decoding falls more than keyframe_lag seconds behind the stream clock,
+    non-key frames are skipped until it has caught up again.
+    """
+
+    def __init__(self, url, settings=None):
+        """Open the stream; raises ImportError if PyAV is missing"""
+        import av
+        self.settings = settings or INGEST_SETTINGS
+        self.container = None
+        self.hwaccel = None
+        options = _rtsp_options() if url.startswith("rtsp://") else {}
+        timeout = CAMERA_CONFIG["stream_settings"]["timeout"] / 1e6  # Microseconds -> seconds
+
+        self.frame = None
+        self.keyframes_only = False
+        self.clock = None  # (wall time, stream time) of the reference frame for the lag estimate
+        self.lag = 0.0
+
+        # Hardware decoders fail on the first decode rather than on open, so each is tried up to a frame
+        for device in list(self.settings["hwaccel"]) + [None]:
+            try:
+                self.clock = None
+                kwargs = {}
+                if device is not None:
+                    from av.codec.hwaccel import HWAccel
+                    kwargs["hwaccel"] = HWAccel(device_type=device, device=self.settings["hw_device"],
+                                                allow_software_fallback=False)
+                self.container = av.open(url, options=options, timeout=timeout, **kwargs)
+                self.stream = self.container.streams.video[0]
+                self.codec = self.stream.codec_context
+                self.codec.thread_count = self.settings["threads"]
+                self.codec.thread_type = "AUTO"
+                self.packets = self.container.demux(self.stream)
+                if not self._decode_next():
+                    raise RuntimeError("no frame decoded")
+                self.hwaccel = device
+                break
+            except Exception as e:
+                self.release()
+                if device is None:
+                    raise
+                print(json.dumps({
+                    "type": "warning",
+                    "data": f"{device} decoding unavailable ({str(e)}), trying next decoder"
+                }), flush=True)
+        self.size = _output_size(self.codec.width, self.codec.height, self.settings["max_width"])
+
+    def isOpened(self):
+        """Whether the stream is open"""
+        return self.container is not None
+
+    def _update_lag(self, frame):
+        """Compare the stream clock with the wall clock and toggle key-frame-only decoding"""
+        if frame.time is None:
+            return
+        now = time.monotonic()
+        if self.clock is None:
+            self.clock = (now, frame.time)
+        self.lag = (now - self.clock[0]) - (frame.time - self.clock[1])
+        if self.lag < 0:
+            self.clock = (now, frame.time)  # Ahead of the reference (network jitter): re-anchor
+            self.lag = 0.0
+
+        threshold = self.settings["keyframe_lag"]
+        if not self.keyframes_only and self.lag > threshold:
+            self.codec.skip_frame = "NONKEY"
+            self.keyframes_only = True
+            print(json.dumps({
+                "type": "warning",
+                "data": f"Decoding {self.lag:.1f}s behind, skipping non-key frames"
+            }), flush=True)
+        elif self.keyframes_only and self.lag < threshold / 2:
+            self.codec.skip_frame = "DEFAULT"
+            self.keyframes_only = False
+
+    def _decode_next(self):
+        """Demux and decode until a frame comes out"""
+        for packet in self.packets:
+            frames = packet.decode()
+            if frames:
+                self.frame = frames[-1]
+                self._update_lag(self.frame)
+                return True
+        self.frame = None
+        return False
+
+    def grab(self):
+        """Decode the next frame"""
+        if self.container is None:
+            return False
+        try:
+            return self._decode_next()
+        except Exception:
+            self.frame = None
+            return False
+
+    def retrieve(self):
+        """BGR image of the last decoded frame"""
+        if self.frame is None:
+            return False, None
+        width, height = self.size
+        return True, self.frame.reformat(width=width, height=height, format="bgr24").to_ndarray()
+
+    def read(self):
+        """grab() and retrieve()"""
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        """Capture properties are configured through INGEST_SETTINGS"""
+        return False
+
+    def release(self):
+        """Close the stream"""
+        if self.container is not None:
+            self.container.close()
+            self.container = None
+
+class FFmpegCapture:
+    """
+    cv2.VideoCapture-like reader on an ffmpeg subprocess writing raw BGR
+    frames to a pipe.
+
+    Decoding, scaling (on the GPU with VAAPI/QSV) and color conversion run
+    in the ffmpeg process. Hardware decoders are tried in order and the
+    software decoder is used when none produces a frame. When the output
+    falls more than keyframe_lag seconds behind the stream frame rate,
+    ffmpeg is restarted with -skip_frame nokey for keyframe_hold seconds.
+    """
+
+    def __init__(self, url, settings=None):
+        """Probe the stream and start ffmpeg; raises RuntimeError if no decoder works"""
+        self.url = url
+        self.settings = settings or INGEST_SETTINGS
+        self.process = None
+        self.hwaccel = None
+        self.keyframes_only = False
+        self.keyframes_since = 0.0
+        self.started = 0.0  # When the current ffmpeg process delivered its first frame
+        self.frames = 0  # Frames read from the current process
+        self.lag = 0.0
+
+        source_width, source_height, self.fps = self._probe()
+        self.width, self.height = _output_size(source_width, source_height, self.settings["max_width"])
+        self.buffer = bytearray(self.width * self.height * 3)
+        self.image = np.frombuffer(self.buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+        self.has_frame = False
+
+        for device in list(self.settings["hwaccel"]) + [None]:
+            if self._start(device):
+                return
+            print(json.dumps({
+                "type": "warning",
+                "data": f"{device or 'software'} decoding failed in ffmpeg"
+                        + (", trying next decoder" if device is not None else "")
+            }), flush=True)
+        raise RuntimeError("ffmpeg could not decode the stream")
+
+    def _probe(self):
+        """Source width, height and frame rate from ffprobe"""
+        command = [self.settings["ffprobe_path"], "-v", "error", "-select_streams", "v:0",
+                   "-show_entries", "stream=width,height,avg_frame_rate,r_frame_rate", "-of", "json"]
+        if self.url.startswith("rtsp://"):
+            command += ["-rtsp_transport", RTSP_SETTINGS["transport"]]
+        output = subprocess.run(command + [self.url], capture_output=True, timeout=30, check=True).stdout
+        stream = json.loads(output)["streams"][0]
+        rate = stream.get("avg_frame_rate") or stream.get("r_frame_rate") or "0/1"
+        if rate in ("0/0", "0/1"):
+            rate = stream.get("r_frame_rate") or "25/1"
+        numerator, denominator = (float(v) for v in rate.split("/"))
+        fps = numerator / denominator if denominator else 25.0
+        return int(stream["width"]), int(stream["height"]), fps or 25.0
+
+    def _command(self, device):
+        """ffmpeg command line for a decoder (None = software)"""
+        command = [self.settings["ffmpeg_path"], "-hide_banner", "-loglevel", "error", "-nostdin"]
+        if self.url.startswith("rtsp://"):
+            command += ["-rtsp_transport", RTSP_SETTINGS["transport"], "-fflags", "nobuffer", "-flags", "low_delay"]
+        if device == "vaapi":
+            command += ["-hwaccel", "vaapi", "-hwaccel_device", self.settings["hw_device"],
+                        "-hwaccel_output_format", "vaapi"]
+            video_filter = f"scale_vaapi=w={self.width}:h={self.height}:format=nv12,hwdownload,format=nv12"
+        elif device == "qsv":
+            command += ["-hwaccel", "qsv", "-hwaccel_output_format", "qsv"]
+            video_filter = f"scale_qsv=w={self.width}:h={self.height},hwdownload,format=nv12"
+        else:
+            video_filter = f"scale={self.width}:{self.height}"
+        if self.settings["threads"]:
+            command += ["-threads", str(self.settings["threads"])]
+        if self.keyframes_only:
+            command += ["-skip_frame", "nokey"]
+        command += ["-i", self.url, "-an", "-sn", "-vf", video_filter,
+                    "-pix_fmt", "bgr24", "-f", "rawvideo", "pipe:1"]
+        return command
+
+    def _start(self, device):
+        """Start ffmpeg with a decoder and wait for its first frame"""
+        self._stop()
+        self.process = subprocess.Popen(self._command(device), stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, bufsize=0)
+        self.hwaccel = device
+        self.started = time.monotonic()
+        self.frames = 0
+        if self._read_raw():
+            self.has_frame = True
+            return True
+        self._stop()
+        return False
+
+    def _stop(self):
+        """Terminate the ffmpeg process"""
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def _read_raw(self):
+        """Read one frame from the pipe into the frame buffer"""
+        view = memoryview(self.buffer)
+        filled = 0
+        while filled < len(self.buffer):
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        self.frames += 1
+        return True
+
+    def _check_lag(self):
+        """
+        Switch between full and key-frame-only decoding (restarts ffmpeg)
+        Returns:
+            bool: Result of the restart (its first frame is in the buffer), or None if nothing changed
+        """
+        now = time.monotonic()
+        if self.keyframes_only:
+            if now - self.keyframes_since >= self.settings["keyframe_hold"]:
+                self.keyframes_only = False
+                return self._start(self.hwaccel)
+            return None
+
+        self.lag = (now - self.started) - self.frames / self.fps
+        if self.lag < 0:
+            self.started, self.frames = now, 0  # Ahead (network jitter): re-anchor
+        elif self.lag > self.settings["keyframe_lag"]:
+            print(json.dumps({
+                "type": "warning",
+                "data": f"Decoding {self.lag:.1f}s behind, skipping non-key frames for {self.settings['keyframe_hold']}s"
+            }), flush=True)
+            self.keyframes_only = True
+            self.keyframes_since = now
+            return self._start(self.hwaccel)
+        return None
+
+    def isOpened(self):
+        """Whether ffmpeg is running"""
+        return self.process is not None
+
+    def grab(self):
+        """Read the next frame from ffmpeg"""
+        if self.process is None:
+            return False
+        if self.has_frame:
+            self.has_frame = False  # The frame read while starting is returned first
+            return True
+        restarted = self._check_lag()  # Before reading, so a restart's first frame is used exactly once
+        if restarted is not None:
+            self.has_frame = False
+            return restarted
+        if not self._read_raw():
+            self._stop()
+            return False
+        return True
+
+    def retrieve(self):
+        """
+        The last frame read
+        Returns:
+            tuple: (True, image) where image is reused by the next grab() (StreamHandler copies it)
+        """
+        return self.process is not None, self.image
+
+    def read(self):
+        """grab() and retrieve()"""
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def set(self, prop, value):
+        """Capture properties are configured through INGEST_SETTINGS"""
+        return False
+
+    def release(self):
+        """Stop ffmpeg"""
+        self._stop()
+
+def open_capture(url, settings=None):
+    """
+    Open a capture source with the configured backend
+    Args:
+        url: Stream URL, file path or camera index
+        settings (dict, optional): Overrides INGEST_SETTINGS
+    Returns:
+        A cv2.VideoCapture compatible object (isOpened, grab, retrieve, read, release)
+    """
+    settings = settings or INGEST_SETTINGS
+    backend = settings["backend"]
+    if backend != "opencv" and is_network_url(url):
+        try:
+            if backend == "pyav":
+                return PyAVCapture(url, settings)
+            if backend == "ffmpeg":
+                return FFmpegCapture(url, settings)
+            raise ValueError(f"Unknown ingest backend: {backend}")
+        except Exception as e:
+            print(json.dumps({
+                "type": "error",
+                "data": f"{backend} ingest unavailable ({str(e)}), falling back to OpenCV"
+            }), flush=True)
+    return open_opencv(url, settings)
+
+def measure_decode_cost(url, frames=None, settings=None):
+    """
+    Decode a few frames and measure what decoding costs
+    Returns:
+        dict: fps, decode_ms (CPU time per frame) and load (CPU seconds per second of video), or None
+    """
+    settings = settings or INGEST_SETTINGS
+    frames = frames or settings["stream_selection"]["probe_frames"]
+    cap = open_capture(url, settings)
+    try:
+        if not cap.isOpened() or not cap.read()[0]:
+            return None
+        cpu_start, wall_start = os.times(), time.monotonic()
+        decoded = 0
+        while decoded < frames and cap.read()[0]:
+            decoded += 1
+    finally:
+        cap.release()  # Reaps an ffmpeg child, so its CPU time is included below
+    if decoded == 0:
+        return None
+
+    cpu_end, elapsed = os.times(), time.monotonic() - wall_start
+    cpu = sum(cpu_end[i] - cpu_start[i] for i in range(4))  # user, system, children user, children system
+    fps = decoded / elapsed
+    return {
+        "fps": round(fps, 1),
+        "decode_ms": round(1000 * cpu / decoded, 2),
+        "load": round(cpu / decoded * fps, 3)
+    }
+
+def rank_streams(urls, settings=None):
+    """
+    Order stream types (e.g. "main", "sub") by measured decode cost
+    Args:
+        urls (dict): Stream type -> URL, in preference order
+    Returns:
+        list: Stream types; the first one whose decode load fits max_decode_load, then the rest
+    """
+    settings = settings or INGEST_SETTINGS
+    selection = settings["stream_selection"]
+    order = list(urls)
+    if not selection["enabled"] or not all(is_network_url(url) for url in urls.values()):
+        return order
+
+    costs = {}
+    for stream_type, url in urls.items():
+        costs[stream_type] = measure_decode_cost(url, settings=settings)
+    print(json.dumps({
+        "type": "info",
+        "data": {"decode_cost": costs}
+    }), flush=True)
+
+    fitting = [t for t in order if costs[t] is not None and costs[t]["load"] <= selection["max_decode_load"]]
+    if fitting:
+        first = fitting[0]
+    else:
+        measured = [t for t in order if costs[t] is not None]
+        if not measured:
+            return order
+        first = min(measured, key=lambda t: costs[t]["load"])
+    return [first] + [t for t in order if t != first]
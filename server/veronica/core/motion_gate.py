@@ -0,0 +1,97 @@
+"""Cheap motion check that gates person detection"""
+
+import time
+import cv2
+import numpy as np
+from config.performance_config import MOTION_SETTINGS
+
+class MotionGate:
+    """
+    Decides per frame whether the detector needs to run.
+
+    Each frame is shrunk to a small blurred grayscale image and compared
+    with a slowly updated background. When too few pixels changed the
+    scene is static: detection is skipped entirely while nobody is in
+    view, and sub-sampled to every static_stride frames while people are
+    standing still, so tracks stay alive. A detection is forced at least
+    every max_skip_seconds in either case.
+    """
+
+    def __init__(self, settings=None):
+        """Initialize motion gate"""
+        self.settings = settings or MOTION_SETTINGS
+        self.enabled = self.settings["enabled"]
+        self.background = None  # float32 running average of the small grayscale frames
+        self.last_detect_time = 0.0
+        self.static_frames = 0  # Static frames since the last detection
+
+        # Statistics
+        self.frames = 0
+        self.skipped = 0
+        self.changed_fraction = 0.0
+
+    def _small(self, frame, rect=None):
+        """Downscaled, blurred grayscale frame, optionally cropped to a pixel rectangle of the full frame"""
+        gray = frame.gray(self.settings["width"])  # Shared with anyone else asking for this size
+        if rect is not None:
+            scale = gray.shape[1] / frame.shape[1]
+            x1, y1, x2, y2 = (int(round(v * scale)) for v in rect)
+            gray = gray[y1:max(y2, y1 + 1), x1:max(x2, x1 + 1)]
+        blur = self.settings["blur"]
+        return cv2.GaussianBlur(gray, (blur, blur), 0)
+
+    def motion(self, frame, rect=None):
+        """
+        Compare a frame with the background and update the background
+        Args:
+            frame (Frame): Current frame
+            rect (tuple, optional): Only look at this (x1, y1, x2, y2) pixel rectangle
+        Returns:
+            bool: True if enough of the frame changed
+        """
+        small = self._small(frame, rect)
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            return True
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        self.changed_fraction = float(np.count_nonzero(diff > self.settings["pixel_threshold"])) / diff.size
+        cv2.accumulateWeighted(small, self.background, self.settings["background_alpha"])
+        return self.changed_fraction >= self.settings["min_changed_fraction"]
+
+    def should_detect(self, frame, people_in_view, now=None, rect=None):
+        """
+        Decide whether to run the detector on this frame
+        Args:
+            frame (Frame): Current frame
+            people_in_view (bool): Whether the last detections contained anyone
+            now (float, optional): Timestamp, defaults to time.time()
+            rect (tuple, optional): Only look for motion in this pixel rectangle (ROI)
+        Returns:
+            bool: True to detect, False to reuse the last detections
+        """
+        self.frames += 1
+        if not self.enabled:
+            return True
+
+        now = time.time() if now is None else now
+        detect = self.motion(frame, rect) or now - self.last_detect_time >= self.settings["max_skip_seconds"]
+        if not detect and people_in_view:
+            self.static_frames += 1
+            detect = self.static_frames >= self.settings["static_stride"]
+
+        if detect:
+            self.last_detect_time = now
+            self.static_frames = 0
+        else:
+            self.skipped += 1
+        return detect
+
+    def get_stats(self):
+        """Get gate statistics"""
+        return {
+            "enabled": self.enabled,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            "changed_fraction": round(self.changed_fraction, 4)
+        }
@@ -0,0 +1,151 @@
+"""Batched person detection across several camera streams"""
+
+import time
+import json
+import threading
+from models.yolo_model import YOLOModel
+from config.model_config import MODEL_CONFIG
+
+class MultiStreamDetector:
+    """
+    Shares one YOLO model between several StreamHandlers.
+
+    Each cycle gathers the newest unread frame from as many streams as
+    possible (up to max_batch_size, waiting at most max_wait seconds),
+    runs them as a single batched forward pass and hands every stream its
+    own detections. Tracker state is kept per stream by YOLOModel.
+    """
+
+    def __init__(self, streams, model=None, on_detections=None,
+                 max_batch_size=None, max_wait=None):
+        """
+        Initialize multi-stream detector
+        Args:
+            streams (dict): Mapping of stream_id -> StreamHandler (already set up)
+            model (YOLOModel, optional): Shared model, created if not given
+            on_detections (callable, optional): Called as on_detections(stream_id, frame, detections)
+            max_batch_size (int, optional): Max frames per forward pass
+            max_wait (float, optional): Max seconds to wait for a fuller batch
+        """
+        batching = MODEL_CONFIG["batching"]
+        self.streams = dict(streams)
+        self.model = model or YOLOModel()
+        self.on_detections = on_detections
+        self.max_batch_size = max_batch_size or batching["max_batch_size"]
+        self.max_wait = batching["max_wait"] if max_wait is None else max_wait
+        self.running = False
+        self.thread = None
+        self._next_index = 0  # Round-robin start so every stream gets a turn
+
+        # Statistics
+        self.batch_count = 0
+        self.frame_count = 0
+        self.inference_time = 0.0
+        self.start_time = None
+
+    def collect_batch(self):
+        """
+        Gather new frames from the streams
+        Returns:
+            tuple: (stream_ids, frames) with at most max_batch_size entries
+        """
+        stream_ids = list(self.streams)
+        if not stream_ids:
+            return [], []
+
+        # Rotate the polling order so streams beyond max_batch_size are not starved
+        start = self._next_index % len(stream_ids)
+        order = stream_ids[start:] + stream_ids[:start]
+        target = min(self.max_batch_size, len(order))
+
+        for stream_id in order:
+            self.streams[stream_id].request_frame()
+
+        batch = {}
+        deadline = time.time() + self.max_wait
+        while True:
+            for stream_id in order:
+                if stream_id in batch or len(batch) >= target:
+                    continue
+                frame = self.streams[stream_id].poll_frame()
+                if frame is not None:
+                    batch[stream_id] = frame
+
+            if len(batch) >= target:
+                break
+            # The background loop keeps waiting for at least one frame;
+            # a direct call gives up after max_wait
+            if time.time() >= deadline and (batch or not self.running):
+                break
+            time.sleep(0.002)
+
+        self._next_index = start + len(batch)
+        ordered_ids = [stream_id for stream_id in order if stream_id in batch]
+        return ordered_ids, [batch[stream_id] for stream_id in ordered_ids]
+
+    def process_batch(self):
+        """
+        Run one collect + detect cycle
+        Returns:
+            dict: Mapping of stream_id -> detections for the streams in this batch
+        """
+        stream_ids, frames = self.collect_batch()
+        if not frames:
+            return {}
+
+        start = time.time()
+        batch_detections = self.model.detect_batch(frames, stream_ids)
+        self.inference_time += time.time() - start
+        self.batch_count += 1
+        self.frame_count += len(frames)
+
+        results = dict(zip(stream_ids, batch_detections))
+        if self.on_detections is not None:
+            for stream_id, frame, detections in zip(stream_ids, frames, batch_detections):
+                try:
+                    self.on_detections(stream_id, frame, detections)
+                except Exception as e:
+                    print(json.dumps({
+                        "type": "error",
+                        "data": f"Error handling detections for stream {stream_id}: {str(e)}"
+                    }), flush=True)
+        return results
+
+    def _run(self):
+        """Background detection loop"""
+        while self.running:
+            try:
+                self.process_batch()
+            except Exception as e:
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Batched detection error: {str(e)}"
+                }), flush=True)
+                time.sleep(0.1)
+
+    def start(self):
+        """Start the background detection thread"""
+        self.running = True
+        self.start_time = time.time()
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background detection thread"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def get_stats(self):
+        """Get throughput statistics"""
+        elapsed = time.time() - self.start_time if self.start_time else 0
+        return {
+            "streams": len(self.streams),
+            "batches": self.batch_count,
+            "frames": self.frame_count,
+            "avg_batch_size": self.frame_count / self.batch_count if self.batch_count else 0,
+            "fps": self.frame_count / elapsed if elapsed > 0 else 0,
+            "avg_inference_ms": 1000 * self.inference_time / self.batch_count if self.batch_count else 0
+        }
@@ -0,0 +1,304 @@
+"""Pipelined decode, detect, annotate, publish and persist stages"""
+
+import time
+import json
+import threading
+from collections import deque
+from models.frame import Frame
+from config.performance_config import PIPELINE_SETTINGS
+
+class StageQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    When full, "drop_oldest" discards the oldest waiting item (live video),
+    "drop_newest" rejects the new item and "block" waits for space. Items
+    that are dropped are passed to on_drop, so resources they hold can be
+    released.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+
+    def __init__(self, maxsize, policy=DROP_OLDEST, on_drop=None):
+        """Initialize stage queue"""
+        if policy not in (self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def put(self, item, timeout=None):
+        """
+        Add an item, applying the drop policy when full
+        Returns:
+            bool: False if the item was dropped
+        """
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                if self.policy == self.DROP_OLDEST:
+                    self._drop(self.items.popleft())
+                elif self.policy == self.DROP_NEWEST:
+                    self._drop(item)
+                    return False
+                elif not self.cond.wait_for(lambda: len(self.items) < self.maxsize or self.closed, timeout):
+                    self._drop(item)
+                    return False
+            if self.closed:
+                self._drop(item, count=False)
+                return False
+            self.items.append(item)
+            self.cond.notify_all()
+            return True
+
+    def _drop(self, item, count=True):
+        """Count a dropped item and hand it to on_drop"""
+        if count:
+            self.dropped += 1
+        if self.on_drop is not None:
+            self.on_drop(item)
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item, or None on timeout/close"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.items or self.closed, timeout) or not self.items:
+                return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def close(self):
+        """Wake up all waiting producers and consumers"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+class Stage:
+    """
+    One pipeline stage running on its own thread.
+
+    The handler gets one item from the input queue (or is called without
+    arguments in a loop when the stage has no input, i.e. it is a source)
+    and its non-None result is put on every output queue.
+    """
+
+    def __init__(self, name, handler, input_queue=None, outputs=None):
+        """Initialize stage"""
+        self.name = name
+        self.handler = handler
+        self.input_queue = input_queue
+        self.outputs = outputs or []
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.processed = 0
+        self.errors = 0
+        self.avg_latency = 0.0  # Exponential moving average, seconds
+        self.max_latency = 0.0  # Worst latency since the last report
+
+    def start(self):
+        """Start the stage thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f"stage-{self.name}")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop the stage thread"""
+        self.running = False
+        if self.input_queue is not None:
+            self.input_queue.close()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def _run(self):
+        """Stage loop"""
+        while self.running:
+            if self.input_queue is not None:
+                item = self.input_queue.get(timeout=0.5)
+                if item is None:
+                    continue
+                args = (item,)
+            else:
+                args = ()
+
+            start = time.perf_counter()
+            try:
+                result = self.handler(*args)
+            except Exception as e:
+                self.errors += 1
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Pipeline stage {self.name} error: {str(e)}"
+                }), flush=True)
+                continue
+            latency = time.perf_counter() - start
+
+            if result is None and not args:
+                continue  # Source produced nothing (no frame yet), not a processed item
+            self.processed += 1
+            self.avg_latency = latency if self.processed == 1 else 0.9 * self.avg_latency + 0.1 * latency
+            self.max_latency = max(self.max_latency, latency)
+            if result is not None:
+                for queue in self.outputs:
+                    queue.put(result)
+
+    def get_stats(self):
+        """Get stage statistics and reset the max latency window"""
+        stats = {
+            "processed": self.processed,
+            "errors": self.errors,
+            "avg_ms": round(1000 * self.avg_latency, 2),
+            "max_ms": round(1000 * self.max_latency, 2)
+        }
+        if self.input_queue is not None:
+            stats["queue_depth"] = len(self.input_queue)
+            stats["queue_dropped"] = self.input_queue.dropped
+        self.max_latency = 0.0
+        return stats
+
+class DetectionPipeline:
+    """
+    Runs one camera as a pipeline of independent stages.
+
+    decode   StreamHandler reader thread (ring buffer, newest frame wins)
+    detect   read_frame -> FrameProcessor.analyze (inference, tracking, best-shot buffers)
+    annotate draw boxes/stats on the preview-scale view, hand it to the preview encoder
+    publish  PreviewEncoder thread (newest frame wins)
+    persist  save captured crops (disk/S3) off the detection path
+
+    Slow annotation, encoding or uploads therefore no longer hold up
+    inference; each queue drops according to its policy instead.
+    """
+
+    def __init__(self, stream, processor, publish, publish_stats=None, settings=None):
+        """
+        Initialize pipeline
+        Args:
+            stream (StreamHandler): Started stream
+            processor (FrameProcessor): Detection and capture logic
+            publish (callable): Receives annotated frames; must not block
+            publish_stats (callable, optional): Returns publish stage statistics
+            settings (dict, optional): Overrides PIPELINE_SETTINGS
+        """
+        self.settings = settings or PIPELINE_SETTINGS
+        self.stream = stream
+        self.processor = processor
+        self.publish = publish
+        self.publish_stats = publish_stats
+
+        queues = self.settings["queues"]
+        self.annotate_queue = StageQueue(queues["annotate"]["size"], queues["annotate"]["policy"],
+                                         on_drop=lambda item: item[0].release())
+        self.persist_queue = StageQueue(queues["persist"]["size"], queues["persist"]["policy"])
+        self.processor.capture_sink = self._enqueue_capture
+
+        self.stages = [
+            Stage("detect", self._detect, outputs=[self.annotate_queue]),
+            Stage("annotate", self._annotate, self.annotate_queue),
+            Stage("persist", self._persist, self.persist_queue)
+        ]
+        self.running = False
+
+    def start(self):
+        """Start all stages"""
+        self.running = True
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        """Stop all stages"""
+        self.running = False
+        for stage in self.stages:
+            stage.stop()
+
+    def run(self):
+        """Block while the pipeline runs, reporting statistics periodically"""
+        interval = self.settings["stats_interval"]
+        next_report = time.time() + interval
+        while self.running:
+            time.sleep(0.5)
+            if time.time() >= next_report:
+                self.report_stats()
+                next_report = time.time() + interval
+
+    def _detect(self):
+        """Detect stage: take the newest frame and analyse it"""
+        ret, frame = self.stream.read_frame()
+        if not ret or not self.processor._validate_frame(frame):
+            return None
+        # Use the read-only ring buffer slot itself; the reader does not
+        # overwrite it until the annotate stage (or a queue drop) releases it
+        frame = Frame(frame, on_release=self.stream.frame_buffer.retain(frame))
+        try:
+            analysis = self.processor.analyze(frame)
+        except Exception:
+            frame.release()
+            raise
+        return frame, analysis
+
+    def _annotate(self, item):
+        """Annotate stage: draw detections on the preview-scale view and publish"""
+        frame, analysis = item
+        try:
+            self.publish(self.processor.annotate(frame, analysis))
+        finally:
+            frame.release()
+
+        # Send person count info
+        print(json.dumps({
+            "type": "info",
+            "data": f"Detected {analysis['person_count']} people"
+        }), flush=True)
+
+    def _enqueue_capture(self, candidates, track_id):
+        """Capture sink for the processor: hand a finished track's candidates to the persist stage"""
+        if not self.persist_queue.put((candidates, track_id)):
+            print(json.dumps({
+                "type": "warning",
+                "data": f"Capture queue full, dropped capture for ID {track_id}"
+            }), flush=True)
+
+    def _persist(self, item):
+        """Persist stage: pick and save the best crop of one track"""
+        self.processor.save_capture(*item)
+
+    def get_stats(self):
+        """Get per-stage latency and queue depth"""
+        stats = {
+            "decode": {
+                "fps": round(self.stream.current_fps, 1),
+                "frames": self.stream.frame_count,
+                "decoded": self.stream.decode_count,
+                "skipped": self.stream.frame_buffer.frames_skipped,
+                "dropped": self.stream.frame_buffer.frames_dropped
+            }
+        }
+        for stage in self.stages:
+            stats[stage.name] = stage.get_stats()
+        stats["detect"]["lines"] = self.processor.line_counter.get_stats()
+        stats["detect"]["motion"] = self.processor.motion_gate.get_stats()
+        stats["detect"]["hybrid"] = self.processor.flow_tracker.get_stats()
+        stats["detect"]["best_shot"] = self.processor.best_shots.get_stats()
+        stats["detect"]["capture_scheduler"] = self.processor.capture_scheduler.get_stats()
+        stats["persist"]["face_filter"] = self.processor.face_filter.get_stats()
+        if self.publish_stats is not None:
+            stats["publish"] = self.publish_stats()
+        return stats
+
+    def report_stats(self):
+        """Log pipeline statistics"""
+        print(json.dumps({
+            "type": "stats",
+            "data": self.get_stats()
+        }), flush=True)
@@ -0,0 +1,190 @@
+"""Regions of interest and line-crossing counts per camera"""
+
+import math
+import json
+import time
+import cv2
+import numpy as np
+from core.track_store import TrackStore
+from config.performance_config import REGION_SETTINGS
+
+def anchor_points(boxes):
+    """Bottom-center (feet) point of (N, 4) x1, y1, x2, y2 boxes as an (N, 2) array"""
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    return np.column_stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]])
+
+class RegionOfInterest:
+    """
+    Polygon of the frame that matters, in normalized (0-1) coordinates.
+
+    Inference runs on the polygon's bounding rectangle (plus a margin), split
+    into tiles when it is much wider than tall or vice versa so that the
+    model's square input is not mostly padding. People count as inside
+    when their feet are inside the polygon.
+    """
+
+    def __init__(self, polygon, settings=None):
+        """
+        Initialize region
+        Args:
+            polygon (list): [[x, y], ...] normalized vertices
+            settings (dict, optional): Overrides REGION_SETTINGS
+        """
+        self.settings = settings or REGION_SETTINGS
+        self.polygon = np.asarray(polygon, dtype=np.float32).reshape(-1, 2)
+        self.frame_size = None
+        self.mask = None
+        self.rect = None
+        self.tiles = []
+
+    def _prepare(self, frame_shape):
+        """Compute pixel geometry for a frame size (once per size)"""
+        height, width = frame_shape[:2]
+        if self.frame_size == (width, height):
+            return
+        self.frame_size = (width, height)
+        points = np.round(self.polygon * [width - 1, height - 1]).astype(np.int32)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, [points], 1)
+
+        margin_x, margin_y = self.settings["margin"] * width, self.settings["margin"] * height
+        x1 = int(max(0, points[:, 0].min() - margin_x))
+        y1 = int(max(0, points[:, 1].min() - margin_y))
+        x2 = int(min(width, points[:, 0].max() + margin_x + 1))
+        y2 = int(min(height, points[:, 1].max() + margin_y + 1))
+        self.rect = (x1, y1, x2, y2)
+        self.tiles = self._split(x1, y1, x2, y2)
+
+    def _split(self, x1, y1, x2, y2):
+        """Split a rectangle along its long side into tiles of at most max_tile_aspect"""
+        width, height = x2 - x1, y2 - y1
+        long_side, short_side = max(width, height), min(width, height)
+        overlap = int(self.settings["tile_overlap"] * short_side)
+        count = max(1, math.ceil((long_side - overlap) / max(1, self.settings["max_tile_aspect"] * short_side - overlap)))
+        if count == 1:
+            return [(x1, y1, x2, y2)]
+
+        step = (long_side - overlap) / count
+        tiles = []
+        for i in range(count):
+            start = int(round(i * step))
+            end = min(long_side, int(round((i + 1) * step)) + overlap)
+            if width >= height:
+                tiles.append((x1 + start, y1, x1 + end, y2))
+            else:
+                tiles.append((x1, y1 + start, x2, y1 + end))
+        return tiles
+
+    def regions(self, frame_shape):
+        """Pixel rectangles (x1, y1, x2, y2) the detector should look at"""
+        self._prepare(frame_shape)
+        return self.tiles
+
+    def bounds(self, frame_shape):
+        """Pixel bounding rectangle (x1, y1, x2, y2) of the polygon plus margin"""
+        self._prepare(frame_shape)
+        return self.rect
+
+    def crop(self, frame):
+        """View of the frame inside the region's bounding rectangle"""
+        self._prepare(frame.shape)
+        x1, y1, x2, y2 = self.rect
+        return frame[y1:y2, x1:x2]
+
+    def contains(self, points, frame_shape):
+        """Boolean mask of (N, 2) pixel points inside the polygon"""
+        self._prepare(frame_shape)
+        height, width = frame_shape[:2]
+        xs = np.clip(points[:, 0].astype(np.int64), 0, width - 1)
+        ys = np.clip(points[:, 1].astype(np.int64), 0, height - 1)
+        return self.mask[ys, xs].astype(bool)
+
+    def pixel_polygon(self, frame_shape):
+        """Polygon vertices in pixels, for drawing"""
+        height, width = frame_shape[:2]
+        return np.round(self.polygon * [width - 1, height - 1]).astype(np.int32)
+
+class LineCounter:
+    """
+    Counts tracks crossing counting lines, per direction.
+
+    A line is given by two normalized points; crossing it towards the
+    right-hand side of the first-to-second point direction (as seen in the
+    image) counts as "in", the other way as "out". A track's side only
+    changes once its feet are hysteresis pixels past the line, so someone
+    standing on the line is not counted repeatedly, and the crossing must
+    happen between the line's end points.
+    """
+
+    def __init__(self, lines, settings=None):
+        """
+        Initialize line counter
+        Args:
+            lines (list): [{"name": str, "points": [[x1, y1], [x2, y2]]}, ...] normalized
+            settings (dict, optional): Overrides REGION_SETTINGS
+        """
+        self.settings = settings or REGION_SETTINGS
+        self.lines = [(line["name"], np.asarray(line["points"], dtype=np.float32).reshape(2, 2)) for line in lines]
+        self.counts = {name: {"in": 0, "out": 0} for name, _ in self.lines}
+        self.tracks = TrackStore(self.settings["track_ttl"], self.settings["max_tracks"])
+
+    def pixel_lines(self, frame_shape):
+        """Line end points in pixels, for drawing: [(name, (x1, y1), (x2, y2)), ...]"""
+        height, width = frame_shape[:2]
+        scale = np.float32([width - 1, height - 1])
+        return [(name, tuple(map(int, points[0] * scale)), tuple(map(int, points[1] * scale)))
+                for name, points in self.lines]
+
+    def update(self, track_ids, points, frame_shape, now=None):
+        """
+        Update with this frame's track positions
+        Args:
+            track_ids (list): Track IDs (-1 = untracked, ignored)
+            points (np.ndarray): (N, 2) feet points in pixels
+            frame_shape (tuple): Frame shape, to scale the normalized lines
+            now (float, optional): Timestamp, defaults to time.time()
+        Returns:
+            list: Crossing events {"line", "track_id", "direction"}
+        """
+        if not self.lines:
+            return []
+        now = time.time() if now is None else now
+        self.tracks.expire(now)
+        height, width = frame_shape[:2]
+        scale = np.float32([width - 1, height - 1])
+        hysteresis = self.settings["hysteresis"] * math.hypot(width, height)
+
+        events = []
+        for track_id, point in zip(track_ids, points):
+            if track_id < 0:
+                continue
+            track, _ = self.tracks.touch(track_id, now)
+            if track.line_sides is None:
+                track.line_sides = {}
+            for name, line in self.lines:
+                start, end = line[0] * scale, line[1] * scale
+                direction = end - start
+                length = float(np.linalg.norm(direction))
+                if length == 0:
+                    continue
+                distance = float(direction[0] * (point[1] - start[1]) - direction[1] * (point[0] - start[0])) / length
+                if abs(distance) < hysteresis:
+                    continue  # On the line: keep the last committed side
+                side = 1 if distance > 0 else -1
+                previous = track.line_sides.get(name)
+                track.line_sides[name] = side
+                along = float(np.dot(point - start, direction)) / (length * length)
+                if previous is None or previous == side or not 0.0 <= along <= 1.0:
+                    continue
+                crossing = "in" if side > 0 else "out"
+                self.counts[name][crossing] += 1
+                events.append({"line": name, "track_id": int(track_id), "direction": crossing})
+                print(json.dumps({
+                    "type": "count",
+                    "data": {"line": name, "track_id": int(track_id), "direction": crossing, **self.counts[name]}
+                }), flush=True)
+        return events
+
+    def get_stats(self):
+        """Get per-line in/out counts"""
+        return {name: dict(counts) for name, counts in self.counts.items()}
@@ -1,25 +1,41 @@
 """Video stream setup and management"""
 
-import cv2
-import os
 import time
-import queue
 import json
 import threading
-import numpy as np
-from config.camera_config import CAMERA_CONFIG, RTSP_ENV_OPTIONS
+from core.frame_buffer import FrameRingBuffer
+from core.ingest import open_capture
+from config.camera_config import CAMERA_CONFIG
+from config.performance_config import FRAME_SETTINGS
 
 class StreamHandler:
-    def __init__(self, stream_url):
+    def __init__(self, stream_url, buffer_mode=None):
         """Initialize stream handler"""
         self.stream_url = stream_url
         self.cap = None
         # Frame handling
-        self.frame_queue = queue.Queue(maxsize=240)  # 8 second buffer at 30 FPS
+        buffer_settings = FRAME_SETTINGS["buffer"]
+        self.frame_buffer = FrameRingBuffer(
+            slots=buffer_settings["slots"],
+            mode=buffer_mode or buffer_settings["mode"]
+        )
+        self.read_timeout = buffer_settings["read_timeout"]
+        self.last_skipped = 0  # Frames dropped before the last read_frame() call
+        
+        # Consumer-driven decode: the reader thread only grabs (demuxes) frames
+        # and converts one to BGR when the consumer asks for it or the
+        # sampling stride comes due. Replay ("every" mode) needs every frame.
+        decode_settings = FRAME_SETTINGS["decode"]
+        self.on_demand_decode = (decode_settings["mode"] == "on_demand" and
+                                 self.frame_buffer.mode == FrameRingBuffer.LATEST)
+        self.sample_stride = decode_settings["sample_stride"]
+        self.decode_requested = threading.Event()
+        self.grab_count = 0
+        self.decode_count = 0
+        self._last_read_grab = 0
         self.running = False
         self.frame_thread = None
         self.watchdog_thread = None
-        self.last_frame = None
         self.frame_count = 0
         self.last_frame_count = 0
         self.network_errors = 0
@@ -58,25 +74,8 @@ class StreamHandler:
         }), flush=True)
         
         try:
-            # Set RTSP options before creating capture if using RTSP
-            if 'rtsp://' in self.stream_url:
-                os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = RTSP_ENV_OPTIONS
-                
-            # Open stream with minimal buffering
-            self.cap = cv2.VideoCapture(self.stream_url)
-            
-            # Configure capture properties for stability
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG["stream_settings"]["buffer_size"])
-            self.cap.set(cv2.CAP_PROP_FPS, 30)  # Target 30 FPS
-            
-            # Set codec based on stream type
-            if 'rtsp://' in self.stream_url:
-                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
-            else:
-                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-                
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            # Open stream with the configured ingest backend (INGEST_SETTINGS)
+            self.cap = open_capture(self.stream_url)
             
             if not self.cap.isOpened():
                 print(json.dumps({
@@ -99,7 +98,7 @@ class StreamHandler:
                 "type": "info",
                 "data": f"Successfully connected. Frame size: {frame.shape}"
             }), flush=True)
-            self.last_frame = frame  # Store first valid frame
+            self.frame_buffer.put(frame)  # Store first valid frame
             self.last_frame_time = time.time()
             
             # Start monitoring threads
@@ -141,10 +140,11 @@ class StreamHandler:
                 if current_time - last_check_time >= 5.0:  # Every 5 seconds
                     frames = self.frame_count - last_frame_count
                     fps = frames / 5.0  # 5 second window
-                    
+                    self.current_fps = fps
+
                     print(json.dumps({
                         "type": "info",
-                        "data": f"Current FPS: {fps:.1f}"
+                        "data": f"Current FPS: {fps:.1f} (frames skipped: {self.frame_buffer.frames_skipped}, decoded: {self.decode_count})"
                     }), flush=True)
                     
                     if fps < self.min_acceptable_fps:
@@ -178,15 +178,8 @@ class StreamHandler:
     def _manage_memory(self):
         """Manage memory usage"""
         try:
-            # Clear frame queue if it's too full
-            if self.frame_queue.qsize() > 60:  # More than 2 seconds of frames
-                while self.frame_queue.qsize() > 30:  # Keep 1 second buffer
-                    try:
-                        self.frame_queue.get_nowait()
-                    except queue.Empty:
-                        break
-                        
-            # Release memory from any deleted frames
+            # Frame memory is bounded by the ring buffer, so only collect
+            # garbage left behind by other components
             import gc
             gc.collect()
             
@@ -210,9 +203,9 @@ class StreamHandler:
             frame_start = time.time()
             
             try:
-                ret, frame = self.cap.read()
+                ret, frame = self._fetch_frame()
                 
-                if not ret or frame is None:
+                if not ret:
                     consecutive_errors += 1
                     self.network_errors += 1
                     print(json.dumps({
@@ -234,19 +227,14 @@ class StreamHandler:
                 # Process frame
                 consecutive_errors = 0
                 self.last_frame_time = time.time()
-                self.last_frame = frame
                 self.frame_count += 1
                 
-                # Update frame queue with error handling
-                try:
-                    if self.frame_queue.full():
-                        try:
-                            self.frame_queue.get_nowait()  # Remove oldest frame
-                        except queue.Empty:
-                            pass
-                    self.frame_queue.put_nowait(frame)
-                except queue.Full:
-                    pass  # Skip if queue is still full
+                # Store in the ring buffer (blocks only in "every" mode)
+                if frame is not None:
+                    self.decode_count += 1
+                    while self.running and not self.frame_buffer.put(frame, timeout=0.5):
+                        if self.frame_buffer.mode == FrameRingBuffer.LATEST:
+                            break
                     
                 # Adaptive frame rate control
                 frame_time = time.time() - frame_start
@@ -264,6 +252,28 @@ class StreamHandler:
                     self._attempt_reconnect()
                     consecutive_errors = 0
             
+    def _fetch_frame(self):
+        """
+        Fetch the next frame from the capture device
+        Returns:
+            tuple: (ret, frame) where frame is None if the frame was grabbed
+                   but not decoded because nobody needs it yet
+        """
+        if not self.on_demand_decode:
+            return self.cap.read()
+            
+        # grab() keeps the RTSP session current without the BGR conversion
+        if not self.cap.grab():
+            return False, None
+        self.grab_count += 1
+        
+        stride_due = self.sample_stride > 0 and self.grab_count % self.sample_stride == 0
+        if not (self.decode_requested.is_set() or stride_due):
+            return True, None
+            
+        self.decode_requested.clear()
+        return self.cap.retrieve()
+        
     def _check_stream_health(self):
         """Check if the stream is healthy"""
         if self.cap is None or not self.cap.isOpened():
@@ -303,34 +313,15 @@ class StreamHandler:
             if self.cap is not None:
                 self.cap.release()
                 
-            # Clear any existing frames
-            while not self.frame_queue.empty():
-                try:
-                    self.frame_queue.get_nowait()
-                except queue.Empty:
-                    break
+            # Drop frames from the old connection
+            self.frame_buffer.clear()
                     
             # Force garbage collection before reconnecting
             import gc
             gc.collect()
             
-            # Set RTSP options before creating capture if using RTSP
-            if 'rtsp://' in self.stream_url:
-                os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = RTSP_ENV_OPTIONS
-                
             # Reopen stream with same settings as initial setup
-            self.cap = cv2.VideoCapture(self.stream_url)
-            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, CAMERA_CONFIG["stream_settings"]["buffer_size"])
-            self.cap.set(cv2.CAP_PROP_FPS, 30)  # Target 30 FPS
-            
-            # Set codec based on stream type
-            if 'rtsp://' in self.stream_url:
-                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'H264'))
-            else:
-                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-                
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            self.cap = open_capture(self.stream_url)
             
             if not self.cap.isOpened():
                 print(json.dumps({
@@ -370,19 +361,56 @@ class StreamHandler:
             return False
             
     def read_frame(self):
-        """Read the latest frame"""
+        """
+        Read the next frame from the ring buffer
+        
+        In "latest" mode this is always the newest frame; the number of
+        frames dropped since the previous call is stored in last_skipped.
+        The returned array is a read-only view owned by the buffer and
+        stays valid until the next call, or until released when kept with
+        frame_buffer.retain().
+        """
         if not self.running:
             return False, None
             
-        try:
-            # Try to get latest frame from queue
-            frame = self.frame_queue.get_nowait()
+        self.request_frame()
+        frame = self.poll_frame(timeout=self.read_timeout)
+        if frame is not None:
             return True, frame
-        except queue.Empty:
-            # If queue is empty but we have a last frame, use it
-            if self.last_frame is not None:
-                return True, self.last_frame.copy()
-            return False, None
+            
+        # No new frame arrived in time; reuse the last one if we have it
+        frame = self.frame_buffer.peek_latest()
+        if frame is not None:
+            return True, frame
+        return False, None
+        
+    def request_frame(self):
+        """Ask the reader thread to decode its next grabbed frame (on-demand decode)"""
+        if self.on_demand_decode:
+            self.decode_requested.set()
+            
+    def poll_frame(self, timeout=0):
+        """
+        Return a frame that has not been read yet, without falling back to a stale one
+        Args:
+            timeout (float): Max seconds to wait for a new frame
+        Returns:
+            numpy.ndarray: New frame, or None if none arrived in time
+        """
+        if not self.running:
+            return None
+            
+        frame, skipped = self.frame_buffer.get(timeout=timeout)
+        if frame is None:
+            return None
+            
+        if self.on_demand_decode:
+            # A frame that is already waiting cancels any pending request
+            self.decode_requested.clear()
+            skipped = max(0, self.grab_count - self._last_read_grab - 1)
+            self._last_read_grab = self.grab_count
+        self.last_skipped = skipped
+        return frame
             
     def release(self):
         """Release resources"""
@@ -399,9 +427,5 @@ class StreamHandler:
             self.cap.release()
             self.cap = None
             
-        # Clear queues
-        while not self.frame_queue.empty():
-            try:
-                self.frame_queue.get_nowait()
-            except queue.Empty:
-                break
+        # Release frame slots
+        self.frame_buffer.close()
@@ -0,0 +1,114 @@
+"""Bounded, expiring per-track state"""
+
+import sys
+from collections import OrderedDict
+
+class TrackState:
+    """Compact state record of one tracker ID"""
+
+    __slots__ = ("track_id", "first_seen", "last_seen", "candidates", "last_emitted", "center", "velocity",
+                 "line_sides")
+
+    def __init__(self, track_id, now):
+        """Initialize track state"""
+        self.track_id = track_id
+        self.first_seen = now
+        self.last_seen = now
+        self.candidates = []  # Best-shot min-heap of (score, seq, Candidate)
+        self.last_emitted = None  # When a capture of this track was last emitted
+        self.center = None  # Box center and time (x, y, t) when last seen
+        self.velocity = (0.0, 0.0)  # Smoothed center motion, pixels per second
+        self.line_sides = None  # Counting line name -> last committed side (+1/-1)
+
+class TrackStore:
+    """
+    Per-track state table with TTL and LRU eviction on last-seen time.
+
+    Records are kept in last-seen order (touch() moves a record to the
+    end), so expiring stale tracks only looks at the oldest records and
+    the capacity bound evicts the least recently seen track. Memory is
+    therefore bounded by max_tracks no matter how long the process runs
+    or how high tracker IDs climb.
+    """
+
+    def __init__(self, ttl, max_tracks):
+        """
+        Initialize track store
+        Args:
+            ttl (float): Seconds a track is remembered after it was last seen
+            max_tracks (int): Maximum number of records
+        """
+        self.ttl = ttl
+        self.max_tracks = max(1, max_tracks)
+        self.records = OrderedDict()  # track id -> TrackState, least recently seen first
+
+        # Statistics
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.peak = 0
+
+    def touch(self, track_id, now):
+        """
+        Record of a track seen now, created if needed
+        Returns:
+            tuple: (TrackState, evicted records that made room for it)
+        """
+        record = self.records.get(track_id)
+        evicted = []
+        if record is None:
+            while len(self.records) >= self.max_tracks:
+                evicted.append(self.records.popitem(last=False)[1])
+                self.evicted += 1
+            record = TrackState(track_id, now)
+            self.records[track_id] = record
+            self.created += 1
+            self.peak = max(self.peak, len(self.records))
+        else:
+            self.records.move_to_end(track_id)
+        record.last_seen = now
+        return record, evicted
+
+    def unseen_since(self, cutoff):
+        """Records last seen before cutoff, oldest first"""
+        for record in self.records.values():
+            if record.last_seen >= cutoff:
+                break
+            yield record
+
+    def expire(self, now):
+        """
+        Drop records not seen for ttl seconds
+        Returns:
+            list: The dropped records
+        """
+        expired = list(self.unseen_since(now - self.ttl))
+        for record in expired:
+            del self.records[record.track_id]
+        self.expired += len(expired)
+        return expired
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def memory_bytes(self):
+        """Approximate memory held by the records, including candidate crops"""
+        total = sys.getsizeof(self.records)
+        for record in self.records.values():
+            total += sys.getsizeof(record) + sys.getsizeof(record.candidates)
+            total += sum(entry[2].image.nbytes for entry in record.candidates)
+        return total
+
+    def get_stats(self):
+        """Get store statistics"""
+        return {
+            "tracks": len(self.records),
+            "peak": self.peak,
+            "created": self.created,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "memory_kb": round(self.memory_bytes() / 1024, 1)
+        }
@@ -1,15 +1,27 @@
 import os
+import re
 import json
 import boto3
+import cv2
+import numpy as np
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from config.face_config import FACE_CONFIG
+from models.face_index import FaceClusterer
+from utils.request_scheduler import RequestScheduler
+from utils.face_checkpoint import FaceCheckpoint, prune_checkpoints
 
 # Load environment variables
 load_dotenv()
 
+def _external_image_id(image_key: str) -> str:
+    """Rekognition ExternalImageId for an S3 key ('/' is not allowed)."""
+    return re.sub(r'[^a-zA-Z0-9_.\-:]', ':', image_key)[-255:]
+
 class FaceDetector:
-    def __init__(self):
+    def __init__(self, mode: Optional[str] = None):
         self.s3_client = boto3.client(
             's3',
             aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
@@ -23,9 +35,11 @@ class FaceDetector:
             region_name=os.getenv('AWS_REGION')
         )
         self.bucket_name = os.getenv('AWS_BUCKET_NAME')
+        self.mode = mode or FACE_CONFIG["mode"]  # "local" embeddings, Rekognition "collection" or "compare"
+        self.store_name = None  # Set by list_images()
 
-    def list_images(self) -> List[str]:
-        """List images from current date using pagination"""
+    def list_objects(self) -> List[Tuple[str, float]]:
+        """List images from current date using pagination, with their LastModified timestamps"""
         from datetime import datetime
         
         # Get store data for the prefix
@@ -39,6 +53,7 @@ class FaceDetector:
             
         # Format store name for S3 path
         store_name = store_data['data']['name'].replace(" ", "-").lower()
+        self.store_name = store_name
         
         # Generate today's prefix
         today = datetime.now()
@@ -61,7 +76,7 @@ class FaceDetector:
                 Prefix=full_prefix
             ):
                 if 'Contents' in page:
-                    images.extend(obj['Key'] for obj in page['Contents'])
+                    images.extend((obj['Key'], obj['LastModified'].timestamp()) for obj in page['Contents'])
             
             print(json.dumps({
                 "type": "info",
@@ -77,6 +92,22 @@ class FaceDetector:
             }), flush=True)
             return []
 
+    def list_images(self) -> List[str]:
+        """List images from current date using pagination"""
+        return [key for key, _ in self.list_objects()]
+
+    def request_face_details(self, image_key: str) -> List[Dict]:
+        """Rekognition detect_faces call for one image (raises on failure)."""
+        response = self.rekognition_client.detect_faces(
+            Image={
+                'S3Object': {
+                    'Bucket': self.bucket_name,
+                    'Name': image_key
+                }
+            }
+        )
+        return response.get('FaceDetails', [])
+
     def detect_faces(self, image_key: str) -> List[Dict]:
         """Detect faces in a single image."""
         try:
@@ -85,16 +116,7 @@ class FaceDetector:
                 "data": f"Detecting faces in image: {image_key}"
             }), flush=True)
             
-            response = self.rekognition_client.detect_faces(
-                Image={
-                    'S3Object': {
-                        'Bucket': self.bucket_name,
-                        'Name': image_key
-                    }
-                }
-            )
-            
-            faces = response.get('FaceDetails', [])
+            faces = self.request_face_details(image_key)
             print(json.dumps({
                 "type": "info",
                 "data": f"Found {len(faces)} faces in image"
@@ -108,6 +130,11 @@ class FaceDetector:
             }), flush=True)
             return []
 
+    def _scheduler(self) -> RequestScheduler:
+        """Rate-limited worker pool for Rekognition calls."""
+        settings = FACE_CONFIG["requests"]
+        return RequestScheduler(settings["workers"], settings["tps"], settings["max_retries"], settings["backoff"])
+
     def compare_faces(self, source_image: str, target_image: str) -> bool:
         """Compare faces between two images."""
         try:
@@ -146,32 +173,322 @@ class FaceDetector:
             }), flush=True)
             return False
 
+    def download_image(self, image_key: str) -> Optional[bytes]:
+        """Download the encoded bytes of an image."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=image_key)
+            return response['Body'].read()
+        except Exception as e:
+            print(json.dumps({
+                "type": "error",
+                "data": f"Error downloading {image_key}: {str(e)}"
+            }), flush=True)
+            return None
+
     def find_unique_faces(self) -> List[Dict]:
-        """Find unique faces across all images."""
+        """Find unique faces across all images, resuming from today's checkpoint."""
+        from datetime import datetime
+        
         print(json.dumps({
             "type": "info",
             "data": "Starting unique face detection process"
         }), flush=True)
         
-        images = self.list_images()
-        if not images:
+        objects = self.list_objects()
+        if not objects:
             print(json.dumps({
                 "type": "info",
                 "data": "No images to process"
             }), flush=True)
             return []
 
-        # Store groups of matching faces
-        face_groups = []
+        embedder = None
+        if self.mode == "local":
+            from models.face_embedder import FaceEmbedder
+            try:
+                embedder = FaceEmbedder()
+            except Exception as e:
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Local face models unavailable, using Rekognition compare_faces: {str(e)}"
+                }), flush=True)
+                self.mode = "compare"
+
+        settings = FACE_CONFIG["checkpoint"]
+        prune_checkpoints(settings["dir"], settings["retention_days"])
+        checkpoint = FaceCheckpoint(settings["dir"], self.store_name, datetime.now().strftime("%Y%m%d"),
+                                    self.mode, settings["watermark_grace"])
+        if checkpoint.load():
+            print(json.dumps({
+                "type": "info",
+                "data": f"Resuming from checkpoint with {len(checkpoint.groups)} unique faces"
+            }), flush=True)
+
+        images = [(key, modified) for key, modified in objects if checkpoint.is_new(key, modified)]
+        print(json.dumps({
+            "type": "info",
+            "data": f"{len(images)} new images since the last run ({len(objects) - len(images)} already processed)"
+        }), flush=True)
+
+        if self.mode == "local":
+            face_groups = self._group_faces_local(images, checkpoint, embedder)
+        elif self.mode == "collection":
+            face_groups = self._group_faces_collection(images, checkpoint)
+        else:
+            face_groups = self._group_faces_compare(images, checkpoint)
+
+        checkpoint.groups = face_groups
+        checkpoint.advance(objects)
+        checkpoint.save()
+
+        print(json.dumps({
+            "type": "info",
+            "data": f"Found {len(face_groups)} unique faces"
+        }), flush=True)
+        return face_groups
+
+    def _group_faces_local(self, images: List[Tuple[str, float]], checkpoint: FaceCheckpoint,
+                           embedder) -> List[Dict]:
+        """Group faces with on-device embeddings and a vectorized similarity search."""
+        face_groups = checkpoint.groups
+        clusterer = FaceClusterer(FACE_CONFIG["match_threshold"], embedder.dimension)
+        if checkpoint.embeddings is not None:
+            # Group i is represented by embedding i
+            clusterer.load(checkpoint.embeddings)
+
+        face_images, embeddings = [], []
         total_images = len(images)
+        keys = [key for key, _ in images]
+
+        # Downloads overlap with embedding; results arrive in listing order
+        with ThreadPoolExecutor(max_workers=FACE_CONFIG["download_workers"]) as pool:
+            for i, ((image, modified), data) in enumerate(zip(images, pool.map(self.download_image, keys)), 1):
+                print(json.dumps({
+                    "type": "info",
+                    "data": f"Processing image {i}/{total_images}"
+                }), flush=True)
+                if not data:
+                    continue  # Retried next run
+                checkpoint.mark_processed(image, modified)
+                frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if frame is None:
+                    continue
+                _, vectors = embedder.embed(frame)
+                face_images.extend([image] * len(vectors))
+                embeddings.append(vectors)
+
+        if face_images:
+            group_ids = clusterer.assign(np.concatenate(embeddings))
+            for image, group_id in zip(face_images, group_ids.tolist()):
+                if group_id == len(face_groups):
+                    face_groups.append({
+                        'source_image': image,
+                        'faces': []
+                    })
+                face_groups[group_id]['faces'].append({
+                    'image': image
+                })
+            checkpoint.embeddings = clusterer.representatives.vectors.copy()
+        return face_groups
+
+    def _collection_id(self) -> str:
+        """Today's face collection id for this store."""
+        from datetime import datetime
         
-        for i, image in enumerate(images, 1):
+        store = re.sub(r'[^a-zA-Z0-9_.\-]', '-', self.store_name or "store")
+        return f"{FACE_CONFIG['collection']['prefix']}-{store}-{datetime.now().strftime('%Y%m%d')}"
+
+    def _prepare_collection(self, collection_id: str) -> None:
+        """Create today's collection and delete the store's older ones."""
+        try:
+            self.rekognition_client.create_collection(CollectionId=collection_id)
+            print(json.dumps({
+                "type": "info",
+                "data": f"Created face collection {collection_id}"
+            }), flush=True)
+        except self.rekognition_client.exceptions.ResourceAlreadyExistsException:
+            pass
+
+        if not FACE_CONFIG["collection"]["delete_old"]:
+            return
+        # prefix-store-YYYYMMDD; a plain prefix match would also catch stores
+        # whose names extend this one's (e.g. "main" vs "main-street")
+        old_pattern = re.escape(collection_id.rsplit('-', 1)[0]) + r'-\d{8}'
+        paginator = self.rekognition_client.get_paginator('list_collections')
+        for page in paginator.paginate():
+            for old_id in page.get('CollectionIds', []):
+                if re.fullmatch(old_pattern, old_id) and old_id != collection_id:
+                    self.rekognition_client.delete_collection(CollectionId=old_id)
+                    print(json.dumps({
+                        "type": "info",
+                        "data": f"Deleted old face collection {old_id}"
+                    }), flush=True)
+
+    def _indexed_faces(self, collection_id: str) -> Dict[str, List[str]]:
+        """FaceIds already in the collection, by ExternalImageId."""
+        indexed = {}
+        paginator = self.rekognition_client.get_paginator('list_faces')
+        for page in paginator.paginate(CollectionId=collection_id):
+            for face in page.get('Faces', []):
+                indexed.setdefault(face.get('ExternalImageId'), []).append(face['FaceId'])
+        return indexed
+
+    def _index_faces(self, collection_id: str, image_key: str) -> List[str]:
+        """Detect and index the faces of one image; returns their FaceIds (raises on failure)."""
+        response = self.rekognition_client.index_faces(
+            CollectionId=collection_id,
+            Image={
+                'S3Object': {
+                    'Bucket': self.bucket_name,
+                    'Name': image_key
+                }
+            },
+            ExternalImageId=_external_image_id(image_key),
+            DetectionAttributes=[],
+            QualityFilter='AUTO'
+        )
+        return [record['Face']['FaceId'] for record in response.get('FaceRecords', [])]
+
+    def _search_faces(self, collection_id: str, face_id: str) -> List[str]:
+        """FaceIds in the collection matching an indexed face (raises on failure)."""
+        settings = FACE_CONFIG["collection"]
+        response = self.rekognition_client.search_faces(
+            CollectionId=collection_id,
+            FaceId=face_id,
+            FaceMatchThreshold=settings["match_threshold"],
+            MaxFaces=settings["max_matches"]
+        )
+        return [match['Face']['FaceId'] for match in response.get('FaceMatches', [])]
+
+    def _group_faces_collection(self, images: List[Tuple[str, float]], checkpoint: FaceCheckpoint) -> List[Dict]:
+        """
+        Group faces with a Rekognition collection.
+        Every image is indexed once (IndexFaces) and every face searched once
+        (SearchFaces), so the number of calls grows linearly with the images.
+        Faces are grouped from the search results afterwards, which makes the
+        result independent of the order in which concurrent calls finish.
+        """
+        collection_id = self._collection_id()
+        self._prepare_collection(collection_id)
+        scheduler = self._scheduler()
+
+        # Images indexed by an earlier run today keep their faces, even if that run never saved its checkpoint
+        indexed = self._indexed_faces(collection_id)
+        keys = [key for key, _ in images]
+        pending = [key for key in keys if _external_image_id(key) not in indexed]
+        print(json.dumps({
+            "type": "info",
+            "data": f"Indexing {len(pending)} new images into {collection_id} "
+                    f"({len(keys) - len(pending)} already indexed)"
+        }), flush=True)
+
+        new_faces = scheduler.map(lambda image: self._index_faces(collection_id, image), pending)
+        for image, face_ids in zip(pending, new_faces):
+            if face_ids is not None:
+                indexed[_external_image_id(image)] = face_ids
+
+        # New faces in listing order
+        new_images, new_face_ids = [], []
+        for image, modified in images:
+            face_ids = indexed.get(_external_image_id(image))
+            if face_ids is None:
+                continue  # Indexing failed; retried next run
+            new_images.append((image, modified, face_ids))
+            new_face_ids.extend(face_ids)
+        print(json.dumps({
+            "type": "info",
+            "data": f"Searching {len(new_face_ids)} new faces"
+        }), flush=True)
+        matches = scheduler.map(lambda face_id: self._search_faces(collection_id, face_id), new_face_ids, default=None)
+        print(json.dumps({
+            "type": "info",
+            "data": f"Rekognition requests: {scheduler.get_stats()}"
+        }), flush=True)
+
+        # Only images whose faces were all searched are done; the rest are searched again next run
+        searched = dict(zip(new_face_ids, matches))
+        for image, modified, face_ids in new_images:
+            if any(searched[face_id] is None for face_id in face_ids):
+                checkpoint.face_ids.pop(image, None)
+                continue
+            checkpoint.face_ids[image] = face_ids
+            checkpoint.mark_processed(image, modified)
+
+        # All of today's faces: earlier runs first, then the new ones, each in listing order
+        face_images, face_ids = [], []
+        for image, image_face_ids in checkpoint.face_ids.items():
+            face_images.extend([image] * len(image_face_ids))
+            face_ids.extend(image_face_ids)
+        position = {face_id: i for i, face_id in enumerate(face_ids)}
+        parent = list(range(len(face_ids)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)  # The earliest face is the group's source
+
+        # Keep the groups of earlier runs, then union new faces with whatever they matched
+        group_start = {}
+        for i, face_id in enumerate(face_ids):
+            group = checkpoint.face_groups.get(face_id)
+            if group is not None:
+                union(i, group_start.setdefault(group, i))
+        for face_id, matched_ids in searched.items():
+            if face_id not in position:
+                continue  # Its image is searched again next run
+            for matched_id in matched_ids:
+                j = position.get(matched_id)
+                if j is not None:
+                    union(position[face_id], j)
+
+        face_groups = {}
+        for i, image in enumerate(face_images):
+            root = find(i)
+            if root not in face_groups:
+                face_groups[root] = {
+                    'source_image': face_images[root],
+                    'faces': []
+                }
+            face_groups[root]['faces'].append({
+                'image': image
+            })
+        group_index = {root: index for index, root in enumerate(face_groups)}
+        checkpoint.face_groups = {face_id: group_index[find(i)] for i, face_id in enumerate(face_ids)}
+        return list(face_groups.values())
+
+    def _group_faces_compare(self, images: List[Tuple[str, float]], checkpoint: FaceCheckpoint) -> List[Dict]:
+        """Group faces with pairwise Rekognition compare_faces calls."""
+        # Store groups of matching faces (continuing those of earlier runs)
+        face_groups = checkpoint.groups
+        total_images = len(images)
+        
+        # detect_faces calls are independent: run them concurrently, results in listing order
+        print(json.dumps({
+            "type": "info",
+            "data": f"Detecting faces in {total_images} images"
+        }), flush=True)
+        scheduler = self._scheduler()
+        detections = scheduler.map(self.request_face_details, [image for image, _ in images])
+        print(json.dumps({
+            "type": "info",
+            "data": f"Rekognition requests: {scheduler.get_stats()}"
+        }), flush=True)
+        
+        for i, ((image, modified), faces) in enumerate(zip(images, detections), 1):
             print(json.dumps({
                 "type": "info",
                 "data": f"Processing image {i}/{total_images}"
             }), flush=True)
             
-            faces = self.detect_faces(image)
+            if faces is None:
+                continue  # Request failed; retried next run
+            checkpoint.mark_processed(image, modified)
             if not faces:
                 continue
 
@@ -202,10 +519,6 @@ class FaceDetector:
                         "data": "New unique face found"
                     }), flush=True)
 
-        print(json.dumps({
-            "type": "info",
-            "data": f"Found {len(face_groups)} unique faces"
-        }), flush=True)
         return face_groups
 
 
@@ -1,12 +1,21 @@
 const { app, BrowserWindow, ipcMain } = require('electron');
 const path = require('path');
 const { spawn } = require('child_process');
+const net = require('net');
 const fetch = (...args) => import('node-fetch').then(({ default: fetch }) => fetch(...args));
 require('dotenv').config({ path: path.join(__dirname, '.env') });
 
 let pythonProcess = null;
 let noDataTimeout = null;
 
+// Binary preview channel: Python connects to this local socket and sends
+// length-prefixed JPEG frames (1 byte type + 4 byte big-endian length)
+const PREVIEW_HEADER_SIZE = 5;
+const PREVIEW_FRAME_JPEG = 1;
+let previewServer = null;
+let previewPort = null;
+let lastPreviewTime = 0;
+
 function log(message) {
   // Log message handled by main process
 }
@@ -28,6 +37,47 @@ function createWindow() {
 
   mainWindow.loadFile(path.join(__dirname, 'src', 'index.html'));
   setupIpcHandlers(mainWindow);
+  startPreviewServer(mainWindow);
+}
+
+function startPreviewServer(mainWindow) {
+  log("Starting preview server...");
+
+  previewServer = net.createServer((socket) => {
+    socket.setNoDelay(true);
+    let pending = Buffer.alloc(0);
+
+    socket.on('data', (chunk) => {
+      pending = pending.length ? Buffer.concat([pending, chunk]) : chunk;
+
+      // Forward every complete message; keep any partial one for the next chunk
+      while (pending.length >= PREVIEW_HEADER_SIZE) {
+        const type = pending.readUInt8(0);
+        const length = pending.readUInt32BE(1);
+        if (pending.length < PREVIEW_HEADER_SIZE + length) break;
+
+        if (type === PREVIEW_FRAME_JPEG) {
+          lastPreviewTime = Date.now();
+          mainWindow.webContents.send('stream-data', pending.subarray(PREVIEW_HEADER_SIZE, PREVIEW_HEADER_SIZE + length));
+        }
+        pending = pending.subarray(PREVIEW_HEADER_SIZE + length);
+      }
+    });
+
+    socket.on('error', (error) => {
+      log(`Preview socket error: ${error.message}`);
+    });
+  });
+
+  previewServer.on('error', (error) => {
+    log(`Preview server error: ${error.message}`);
+    previewPort = null;
+  });
+
+  previewServer.listen(0, '127.0.0.1', () => {
+    previewPort = previewServer.address().port;
+    log(`Preview server listening on port ${previewPort}`);
+  });
 }
 
 function setupIpcHandlers(mainWindow) {
@@ -59,6 +109,9 @@ async function startPythonProcess(mainWindow) {
         ...process.env,
         PYTHONPATH: projectRoot + (process.env.PYTHONPATH ? path.delimiter + process.env.PYTHONPATH : ''),
       };
+      if (previewPort) {
+        env.VERONICA_PREVIEW_PORT = String(previewPort);
+      }
 
       pythonProcess = spawn(pythonCommand, [scriptPath], {
         cwd: projectRoot,
@@ -83,7 +136,7 @@ async function startPythonProcess(mainWindow) {
 
       // Monitor data stream
       const checkDataStream = () => {
-        const timeSinceLastData = Date.now() - lastDataTime;
+        const timeSinceLastData = Date.now() - Math.max(lastDataTime, lastPreviewTime);
         if (timeSinceLastData > 5000 && !initializing) {
           log("Camera stream appears to be down.");
           mainWindow.webContents.send('process-status', {
@@ -286,6 +339,10 @@ app.on('window-all-closed', () => {
     pythonProcess.kill();
     pythonProcess = null;
   }
+  if (previewServer) {
+    previewServer.close();
+    previewServer = null;
+  }
   if (process.platform !== 'darwin') app.quit();
 });
 app.on('activate', () => {
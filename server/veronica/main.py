@@ -5,12 +5,19 @@ import time
 import sys
 import json
 import base64
-import cv2
-import numpy as np
-from config.camera_config import CAMERA_CONFIG, get_stream_url, RTSP_ENV_OPTIONS
+from config.camera_config import CAMERA_CONFIG, REGION_CONFIG, get_stream_url, RTSP_ENV_OPTIONS
 from core.stream_handler import StreamHandler
+from core.ingest import rank_streams
 from models.yolo_model import YOLOModel
 from core.frame_processor import FrameProcessor
+from core.pipeline import DetectionPipeline
+from utils.preview_channel import PreviewChannel
+from utils.preview_encoder import PreviewEncoder
+
+# Binary preview socket to Electron (falls back to base64 JSON on stdout)
+preview_channel = None
+# Preview encode/publish runs on its own thread so it never slows detection
+preview_encoder = None
 
 def setup_environment():
     """Setup environment variables and configuration"""
@@ -26,30 +33,28 @@ def setup_environment():
         }), flush=True)
         sys.exit(1)
 
-def encode_frame(frame):
-    """Encode frame as base64 string"""
-    # Resize frame to reduce data size
-    height, width = frame.shape[:2]
-    max_dimension = 800
-    if height > max_dimension or width > max_dimension:
-        scale = max_dimension / max(height, width)
-        frame = cv2.resize(frame, None, fx=scale, fy=scale)
-    
-    # Encode frame
-    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-    jpg_as_text = base64.b64encode(buffer).decode()
-    return jpg_as_text
+def publish_frame(jpeg_bytes):
+    """Send an encoded preview frame to Electron"""
+    # Binary channel: raw JPEG bytes, no base64/JSON round trip
+    if preview_channel is not None and preview_channel.enabled and preview_channel.send(jpeg_bytes):
+        return
+        
+    message = {
+        "type": "frame",
+        "data": base64.b64encode(jpeg_bytes).decode()
+    }
+    # Send as a single line to ensure atomic writes
+    print(json.dumps(message), flush=True)
 
 def send_frame(frame):
-    """Send frame data to Electron"""
+    """Hand a frame to the preview encoder (never blocks detection)"""
+    global preview_channel, preview_encoder
     try:
-        encoded_frame = encode_frame(frame)
-        message = {
-            "type": "frame",
-            "data": encoded_frame
-        }
-        # Send as a single line to ensure atomic writes
-        print(json.dumps(message), flush=True)
+        if preview_encoder is None:
+            preview_channel = PreviewChannel()
+            preview_encoder = PreviewEncoder(publish_frame)
+            preview_encoder.start()
+        preview_encoder.submit(frame)
     except Exception as e:
         print(json.dumps({"type": "error", "data": str(e)}), flush=True)
 
@@ -65,24 +70,19 @@ def run_stream(stream_url):
         # Initialize YOLO model and frame processor
         print(json.dumps({"type": "info", "data": "Initializing YOLO model..."}), flush=True)
         model = YOLOModel()
-        processor = FrameProcessor(model)
+        processor = FrameProcessor(model, regions=REGION_CONFIG)
         print(json.dumps({"type": "info", "data": "Model initialized successfully"}), flush=True)
         
-        while True:
-            ret, frame = stream.read_frame()
-            if ret and frame is not None:
-                # Process frame for person detection
-                processed_frame, person_count = processor.process_frame(frame)
-                if processed_frame is not None:
-                    send_frame(processed_frame)
-                    
-                    # Send person count info
-                    print(json.dumps({
-                        "type": "info",
-                        "data": f"Detected {person_count} people"
-                    }), flush=True)
-                    
-            time.sleep(1/30)  # Limit to ~30 FPS
+        # Detection, annotation/publish and capture persistence run as separate stages
+        pipeline = DetectionPipeline(
+            stream, processor, send_frame,
+            publish_stats=lambda: preview_encoder.get_stats() if preview_encoder is not None else {}
+        )
+        pipeline.start()
+        try:
+            pipeline.run()
+        finally:
+            pipeline.stop()
             
     except KeyboardInterrupt:
         print(json.dumps({"type": "info", "data": "Stream stopped by user"}), flush=True)
@@ -143,7 +143,9 @@ def main():
     
     total_attempts = CAMERA_CONFIG.get("max_retries", 3) * 2
     
-    for stream_type in ["main", "sub"]:
+    # Try the stream whose decode cost this machine can afford first
+    stream_types = rank_streams({stream_type: get_stream_url(stream_type) for stream_type in ["main", "sub"]})
+    for stream_type in stream_types:
         print(json.dumps({
             "type": "info",
             "data": f"Trying {stream_type} stream..."
@@ -0,0 +1,278 @@
+"""Inference backends for the YOLO person detector"""
+
+import os
+import json
+import shutil
+import warnings
+import cv2
+import numpy as np
+from config.model_config import MODEL_CONFIG
+from models.frame import as_frame, letterbox  # letterbox re-exported for tools
+
+def preprocess(frames, size):
+    """
+    Convert frames into a normalized NCHW float32 RGB batch
+    Args:
+        frames: Frame objects (their cached model-input tensors are reused) or BGR images
+        size (int): Square model input size
+    Returns:
+        tuple: (batch array, list of (ratio, pad) per frame)
+    """
+    frames = [as_frame(frame) for frame in frames]
+    geometry = [frame.letterbox(size)[1:] for frame in frames]
+    if len(frames) == 1:
+        return frames[0].tensor(size)[None], geometry  # View, no copy
+    return np.stack([frame.tensor(size) for frame in frames]), geometry
+
+def unletterbox(det, geometry, frame_shape):
+    """Map (N, >=4) x1, y1, x2, y2 boxes from model-input to frame coordinates in place, clipped to the frame"""
+    ratio, (pad_x, pad_y) = geometry
+    height, width = frame_shape[:2]
+    det[:, [0, 2]] = ((det[:, [0, 2]] - pad_x) / ratio).clip(0, width)
+    det[:, [1, 3]] = ((det[:, [1, 3]] - pad_y) / ratio).clip(0, height)
+    return det
+
+def postprocess(output, geometry, frame_shapes, conf_threshold, iou_threshold,
+                classes=None, max_det=100, agnostic=False):
+    """
+    Decode raw YOLOv8 head output into boxes in original frame coordinates
+    Args:
+        output: Array of shape (batch, 4 + num_classes, anchors)
+        geometry: (ratio, pad) per frame from preprocess()
+        frame_shapes: Original (height, width) per frame
+    Returns:
+        list: One (N, 6) float32 array [x1, y1, x2, y2, conf, class_id] per frame
+    """
+    results = []
+    for pred, frame_geometry, frame_shape in zip(output, geometry, frame_shapes):
+        pred = pred.T  # (anchors, 4 + num_classes)
+        class_scores = pred[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+
+        keep = scores >= conf_threshold
+        if classes is not None:
+            keep &= np.isin(class_ids, classes)
+        if not keep.any():
+            results.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        boxes_xywh = pred[keep, :4]
+        scores = scores[keep]
+        class_ids = class_ids[keep]
+
+        # Center xywh -> top-left xywh for OpenCV NMS
+        nms_boxes = boxes_xywh.copy()
+        nms_boxes[:, :2] -= nms_boxes[:, 2:] / 2
+        if agnostic:
+            indices = cv2.dnn.NMSBoxes(nms_boxes.tolist(), scores.tolist(), conf_threshold, iou_threshold)
+        else:
+            indices = cv2.dnn.NMSBoxesBatched(nms_boxes.tolist(), scores.tolist(), class_ids.tolist(),
+                                              conf_threshold, iou_threshold)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)[:max_det]
+
+        det = np.empty((len(indices), 6), dtype=np.float32)
+        det[:, 0:2] = nms_boxes[indices, :2]
+        det[:, 2:4] = nms_boxes[indices, :2] + nms_boxes[indices, 2:4]
+        det[:, 4] = scores[indices]
+        det[:, 5] = class_ids[indices]
+
+        results.append(unletterbox(det, frame_geometry, frame_shape))
+    return results
+
+def export_model(model_path, export_format, imgsz=None, export_dir=None):
+    """
+    Export a PyTorch model once and cache the result
+    Args:
+        model_path (str): Path to the .pt weights (or an already exported model)
+        export_format (str): "onnx" or "openvino"
+        imgsz (int, optional): Square input size
+        export_dir (str, optional): Cache directory
+    Returns:
+        str: Path to the exported model file or directory
+    """
+    imgsz = imgsz or MODEL_CONFIG["imgsz"]
+    export_dir = export_dir or MODEL_CONFIG["export_dir"]
+
+    # Already exported models are used as-is
+    if export_format == "onnx" and model_path.endswith(".onnx"):
+        return model_path
+    if export_format == "openvino" and (os.path.isdir(model_path) or model_path.endswith(".xml")):
+        return model_path
+
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    if export_format == "onnx":
+        target = os.path.join(export_dir, f"{stem}_{imgsz}.onnx")
+    else:
+        target = os.path.join(export_dir, f"{stem}_{imgsz}_openvino_model")
+
+    source_mtime = os.path.getmtime(model_path) if os.path.exists(model_path) else 0
+    if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+        return target
+
+    print(json.dumps({
+        "type": "info",
+        "data": f"Exporting {model_path} to {export_format} (one-time step)..."
+    }), flush=True)
+
+    from ultralytics import YOLO
+    exported = YOLO(model_path).export(format=export_format, imgsz=imgsz, dynamic=True, verbose=False)
+
+    os.makedirs(export_dir, exist_ok=True)
+    if os.path.exists(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        else:
+            os.remove(target)
+    shutil.move(str(exported), target)
+    return target
+
+class InferenceBackend:
+    """Base class for detector engines: frames in, raw boxes out"""
+
+    name = "base"
+
+    def __init__(self, config=None):
+        """Initialize backend settings from MODEL_CONFIG"""
+        self.config = config or MODEL_CONFIG
+        self.imgsz = self.config["imgsz"]
+        self.conf_threshold = self.config["track_confidence"]
+        self.iou_threshold = self.config["iou"]
+        self.classes = self.config["classes"]
+        self.max_det = self.config["max_det"]
+        self.agnostic = self.config["agnostic"]
+
+    def infer(self, frames):
+        """
+        Run the detector on a batch of frames
+        Returns:
+            list: One (N, 6) array [x1, y1, x2, y2, conf, class_id] per frame
+        """
+        raise NotImplementedError
+
+    def _decode(self, output, geometry, frames):
+        """Shared post-processing for engines that return the raw YOLOv8 head"""
+        return postprocess(output, geometry, [frame.shape[:2] for frame in frames],
+                           self.conf_threshold, self.iou_threshold,
+                           classes=self.classes, max_det=self.max_det, agnostic=self.agnostic)
+
+class UltralyticsBackend(InferenceBackend):
+    """PyTorch engine through the ultralytics predictor"""
+
+    name = "pytorch"
+
+    def __init__(self, config=None):
+        """Load the ultralytics model"""
+        super().__init__(config)
+        from ultralytics import YOLO
+        threads = self.config["threads"]["intra_op"]
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model = YOLO(self.config["model_path"])
+
+    def infer(self, frames):
+        """
+        Run ultralytics predict on a batch of frames
+        The shared model-input tensor is passed as a torch tensor, which the
+        predictor uses as-is instead of letterboxing and converting again.
+        """
+        import torch
+        frames = [as_frame(frame) for frame in frames]
+        batch, geometry = preprocess(frames, self.imgsz)
+        with warnings.catch_warnings():
+            # The cached tensor is read-only; the predictor never writes to tensor inputs
+            warnings.simplefilter("ignore", UserWarning)
+            batch = torch.from_numpy(batch)
+        results = self.model.predict(
+            batch,
+            verbose=False,
+            imgsz=self.imgsz,
+            conf=self.conf_threshold,
+            iou=self.iou_threshold,
+            classes=self.classes,
+            max_det=self.max_det,
+            agnostic_nms=self.agnostic
+        )
+        return [unletterbox(result.boxes.data[:, :6].cpu().numpy(), frame_geometry, frame.shape)
+                for result, frame_geometry, frame in zip(results, geometry, frames)]
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU engine"""
+
+    name = "onnxruntime"
+
+    def __init__(self, config=None):
+        """Create an ONNX Runtime session with the configured thread counts"""
+        super().__init__(config)
+        import onnxruntime as ort
+
+        model_path = export_model(self.config["model_path"], "onnx", self.imgsz)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.config["threads"]["intra_op"]
+        options.inter_op_num_threads = self.config["threads"]["inter_op"]
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def infer(self, frames):
+        """Run the ONNX session on a batch of frames"""
+        batch, geometry = preprocess(frames, self.imgsz)
+        output = self.session.run(None, {self.input_name: batch})[0]
+        return self._decode(output, geometry, frames)
+
+class OpenVINOBackend(InferenceBackend):
+    """OpenVINO CPU engine"""
+
+    name = "openvino"
+
+    def __init__(self, config=None):
+        """Compile the OpenVINO model with the configured thread count"""
+        super().__init__(config)
+        import openvino as ov
+
+        model_path = export_model(self.config["model_path"], "openvino", self.imgsz)
+        if os.path.isdir(model_path):
+            model_path = next(os.path.join(model_path, name) for name in os.listdir(model_path)
+                              if name.endswith(".xml"))
+
+        core = ov.Core()
+        ov_config = {"PERFORMANCE_HINT": "LATENCY"}
+        if self.config["threads"]["intra_op"]:
+            ov_config["INFERENCE_NUM_THREADS"] = self.config["threads"]["intra_op"]
+        self.compiled_model = core.compile_model(core.read_model(model_path), "CPU", ov_config)
+        self.output = self.compiled_model.output(0)
+
+    def infer(self, frames):
+        """Run the compiled OpenVINO model on a batch of frames"""
+        batch, geometry = preprocess(frames, self.imgsz)
+        output = self.compiled_model([batch])[self.output]
+        return self._decode(output, geometry, frames)
+
+BACKENDS = {
+    UltralyticsBackend.name: UltralyticsBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend
+}
+
+def create_backend(name=None, config=None):
+    """
+    Create the inference backend selected in MODEL_CONFIG["backend"]
+    Falls back to the PyTorch engine if the requested runtime is unavailable.
+    """
+    config = config or MODEL_CONFIG
+    name = name or config["backend"]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {name}. Choose from {', '.join(BACKENDS)}")
+
+    try:
+        return BACKENDS[name](config)
+    except ImportError as e:
+        if name == UltralyticsBackend.name:
+            raise
+        print(json.dumps({
+            "type": "error",
+            "data": f"{name} backend unavailable ({str(e)}), falling back to pytorch"
+        }), flush=True)
+        return UltralyticsBackend(config)
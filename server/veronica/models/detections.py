@@ -0,0 +1,25 @@
+"""Detection array layout shared by the model and the frame processor"""
+
+import numpy as np
+
+# Column indices of an (N, 7) float32 detection array
+X1, Y1, X2, Y2, CONF, CLASS_ID, TRACK_ID = range(7)
+NUM_COLUMNS = 7
+
+def empty_detections():
+    """Return an empty (0, 7) detection array"""
+    return np.zeros((0, NUM_COLUMNS), dtype=np.float32)
+
+def clip_boxes(detections, width, height):
+    """
+    Convert boxes to integer pixel coordinates inside the frame
+    Returns:
+        tuple: (int32 (N, 4) boxes, boolean mask of boxes with a positive area)
+    """
+    boxes = detections[:, X1:Y2 + 1].astype(np.int32)  # Truncates like int()
+    boxes[:, X1] = np.maximum(boxes[:, X1], 0)
+    boxes[:, Y1] = np.maximum(boxes[:, Y1], 0)
+    boxes[:, X2] = np.minimum(boxes[:, X2], width - 1)
+    boxes[:, Y2] = np.minimum(boxes[:, Y2], height - 1)
+    valid = (boxes[:, X2] > boxes[:, X1]) & (boxes[:, Y2] > boxes[:, Y1])
+    return boxes, valid
@@ -0,0 +1,117 @@
+"""On-device face detection and embedding with OpenCV YuNet and SFace"""
+
+import os
+import json
+import cv2
+import numpy as np
+import requests
+from config.face_config import FACE_CONFIG
+
+def ensure_model(filename, url, model_dir=None):
+    """
+    Path to a model file, downloading it on first use
+    Args:
+        filename (str): Model file name
+        url (str): Download URL
+        model_dir (str, optional): Defaults to FACE_CONFIG["model_dir"]
+    Returns:
+        str: Local path
+    """
+    model_dir = model_dir or FACE_CONFIG["model_dir"]
+    path = os.path.join(model_dir, filename)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(model_dir, exist_ok=True)
+    print(json.dumps({
+        "type": "info",
+        "data": f"Downloading {filename}..."
+    }), flush=True)
+    response = requests.get(url, timeout=60)
+    response.raise_for_status()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+    return path
+
+class YuNetDetector:
+    """Lightweight CPU face detector (OpenCV YuNet) with five landmarks per face"""
+
+    def __init__(self, config=None, score_threshold=None, min_face_size=None):
+        """
+        Load the detector model
+        Args:
+            config (dict, optional): Overrides FACE_CONFIG
+            score_threshold (float, optional): Overrides the configured face score threshold
+            min_face_size (int, optional): Overrides the configured minimum face size (pixels)
+        """
+        config = config or FACE_CONFIG
+        detector = config["detector"]
+        self.detector = cv2.FaceDetectorYN.create(
+            ensure_model(detector["model"], detector["url"], config["model_dir"]), "", (320, 320),
+            score_threshold if score_threshold is not None else detector["score_threshold"],
+            detector["nms_threshold"], detector["top_k"]
+        )
+        self.min_face_size = min_face_size if min_face_size is not None else config["min_face_size"]
+
+    def detect(self, image):
+        """
+        Detect faces
+        Args:
+            image: BGR image
+        Returns:
+            np.ndarray: (N, 15) rows of x, y, w, h, 5 landmark points, score
+        """
+        height, width = image.shape[:2]
+        self.detector.setInputSize((width, height))
+        _, faces = self.detector.detect(image)
+        if faces is None:
+            return np.empty((0, 15), dtype=np.float32)
+        keep = np.minimum(faces[:, 2], faces[:, 3]) >= self.min_face_size
+        return faces[keep]
+
+class FaceEmbedder:
+    """
+    Finds faces in an image and computes L2-normalized embeddings on CPU.
+
+    YuNet detects faces and five landmarks; SFace embeds the landmark
+    aligned 112x112 face into a 128-d vector. Cosine similarity of two
+    embeddings is then a plain dot product.
+    """
+
+    def __init__(self, config=None):
+        """Load detector and embedder models"""
+        self.config = config or FACE_CONFIG
+        embedder = self.config["embedder"]
+
+        self.face_detector = YuNetDetector(self.config)
+        self.recognizer = cv2.FaceRecognizerSF.create(
+            ensure_model(embedder["model"], embedder["url"], self.config["model_dir"]), ""
+        )
+        self.dimension = 128
+
+    def detect(self, image):
+        """Detect faces; see YuNetDetector.detect()"""
+        return self.face_detector.detect(image)
+
+    def embed(self, image, faces=None):
+        """
+        Embed the faces of an image
+        Args:
+            image: BGR image
+            faces (np.ndarray, optional): Output of detect(); detected if None
+        Returns:
+            tuple: (faces (N, 15), embeddings (N, 128) float32, L2-normalized)
+        """
+        if faces is None:
+            faces = self.detect(image)
+        if len(faces) == 0:
+            return faces, np.empty((0, self.dimension), dtype=np.float32)
+
+        embeddings = np.empty((len(faces), self.dimension), dtype=np.float32)
+        for i, face in enumerate(faces):
+            aligned = self.recognizer.alignCrop(image, face)
+            embeddings[i] = self.recognizer.feature(aligned).reshape(-1)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-12
+        return faces, embeddings
@@ -0,0 +1,119 @@
+"""In-process nearest-neighbour index and clustering for face embeddings"""
+
+import numpy as np
+
+class FaceIndex:
+    """
+    Exact cosine-similarity index over L2-normalized embeddings.
+
+    Vectors live in one contiguous float32 matrix that grows by doubling,
+    so a search is a single matrix product. For the few thousand to tens
+    of thousands of faces a store sees per day this is fast enough that an
+    approximate index is not needed.
+    """
+
+    def __init__(self, dimension=128, capacity=1024):
+        """Initialize an empty index"""
+        self.dimension = dimension
+        self._vectors = np.empty((capacity, dimension), dtype=np.float32)
+        self._labels = np.empty(capacity, dtype=np.int64)
+        self.size = 0
+
+    @property
+    def vectors(self):
+        """Stored vectors (view)"""
+        return self._vectors[:self.size]
+
+    @property
+    def labels(self):
+        """Label of each stored vector (view)"""
+        return self._labels[:self.size]
+
+    def add(self, vectors, labels):
+        """
+        Add vectors with integer labels
+        Args:
+            vectors (np.ndarray): (N, dimension), L2-normalized
+            labels (array-like): N labels
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        needed = self.size + len(vectors)
+        if needed > len(self._vectors):
+            capacity = max(needed, 2 * len(self._vectors))
+            self._vectors = np.resize(self._vectors, (capacity, self.dimension))
+            self._labels = np.resize(self._labels, capacity)
+        self._vectors[self.size:needed] = vectors
+        self._labels[self.size:needed] = labels
+        self.size = needed
+
+    def search(self, queries):
+        """
+        Best match for each query
+        Args:
+            queries (np.ndarray): (M, dimension), L2-normalized
+        Returns:
+            tuple: (similarities (M,), labels (M,)); label -1 when the index is empty
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dimension)
+        if self.size == 0 or len(queries) == 0:
+            return np.full(len(queries), -1.0, dtype=np.float32), np.full(len(queries), -1, dtype=np.int64)
+        similarities = queries @ self.vectors.T
+        best = similarities.argmax(axis=1)
+        return similarities[np.arange(len(queries)), best], self.labels[best]
+
+class FaceClusterer:
+    """
+    Groups faces into unique visitors.
+
+    Like the original compare_faces loop, each group is represented by its
+    first face and a new face joins the most similar group above the
+    threshold, otherwise it starts a new group. Faces are matched a block at
+    a time with one matrix product against all representatives; only faces
+    that start new groups inside a block are checked against each other.
+    """
+
+    def __init__(self, threshold, dimension=128, block_size=256):
+        """Initialize clusterer"""
+        self.threshold = threshold
+        self.block_size = block_size
+        self.representatives = FaceIndex(dimension)
+        self.group_count = 0
+
+    def load(self, representatives):
+        """Continue from saved group representatives (row i represents group i)"""
+        representatives = np.asarray(representatives, dtype=np.float32)
+        self.representatives.add(representatives, np.arange(self.group_count, self.group_count + len(representatives)))
+        self.group_count += len(representatives)
+
+    def assign(self, embeddings):
+        """
+        Assign faces to groups, creating groups as needed
+        Args:
+            embeddings (np.ndarray): (N, dimension), L2-normalized, in processing order
+        Returns:
+            np.ndarray: Group id of each face
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        groups = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), self.block_size):
+            block = embeddings[start:start + self.block_size]
+            similarities, labels = self.representatives.search(block)
+            matched = similarities >= self.threshold
+            groups[start:start + len(block)][matched] = labels[matched]
+
+            # Unmatched faces may still match a group created earlier in this block
+            new_vectors, new_groups = [], []
+            for i in np.flatnonzero(~matched):
+                if new_vectors:
+                    scores = np.stack(new_vectors) @ block[i]
+                    best = int(scores.argmax())
+                    if scores[best] >= self.threshold:
+                        groups[start + i] = new_groups[best]
+                        continue
+                new_vectors.append(block[i])
+                new_groups.append(self.group_count)
+                groups[start + i] = self.group_count
+                self.group_count += 1
+            if new_vectors:
+                self.representatives.add(np.stack(new_vectors), new_groups)
+        return groups
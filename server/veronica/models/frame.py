@@ -0,0 +1,127 @@
+"""Decoded frame with lazily derived, cached views"""
+
+import cv2
+import numpy as np
+
+def letterbox(image, size=640, color=(114, 114, 114)):
+    """
+    Resize and pad an image to a square model input, keeping aspect ratio
+    (same geometry as ultralytics LetterBox with auto=False)
+    Returns:
+        tuple: (padded image, scale ratio, (pad_x, pad_y))
+    """
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+
+    if (width, height) != (new_width, new_height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, ratio, (left, top)
+
+class Frame:
+    """
+    One decoded BGR frame plus the views the pipeline derives from it.
+
+    The full-resolution image is what crops are cut from. The model input
+    (letterboxed, RGB, CHW float tensor), the preview-scale image and the
+    small grayscale images used by the motion gate and optical flow are
+    each computed from it the first time someone asks and then cached, so
+    every consumer of the same frame shares them instead of resizing or
+    converting the same pixels again. Views are read-only; copy one
+    before drawing on it.
+
+    The image may be a buffer owned by someone else (a ring buffer slot).
+    The Frame then holds one reference to it, further holders call
+    retain(), and every holder calls release() when done; the owner's
+    release callback runs when the last reference is gone.
+    """
+
+    __slots__ = ("image", "timestamp", "_views", "_refs", "_on_release")
+
+    def __init__(self, image, timestamp=None, on_release=None):
+        """
+        Initialize frame
+        Args:
+            image (np.ndarray): Full-resolution BGR image, not modified afterwards
+            timestamp (float, optional): Capture time
+            on_release (callable, optional): Called once the last reference is released
+        """
+        self.image = image
+        self.timestamp = timestamp
+        self._views = {}
+        self._refs = 1
+        self._on_release = on_release
+
+    @property
+    def shape(self):
+        """Shape of the full-resolution image"""
+        return self.image.shape
+
+    def retain(self):
+        """Add a reference; pair with release()"""
+        self._refs += 1
+        return self
+
+    def release(self):
+        """Drop a reference, handing the image back to its owner after the last one"""
+        self._refs -= 1
+        if self._refs == 0 and self._on_release is not None:
+            on_release, self._on_release = self._on_release, None
+            on_release()
+
+    def _cached(self, key, make):
+        """Return the view stored under key, computing it on first use"""
+        view = self._views.get(key)
+        if view is None:
+            view = self._views[key] = make()
+            if isinstance(view, np.ndarray) and view is not self.image:
+                view.flags.writeable = False
+        return view
+
+    def letterbox(self, size):
+        """
+        Model-input image: resized and padded to size x size, still BGR uint8
+        Returns:
+            tuple: (image, ratio, (pad_x, pad_y)) as returned by letterbox()
+        """
+        return self._cached(("letterbox", size), lambda: letterbox(self.image, size))
+
+    def tensor(self, size):
+        """Model-input tensor: letterboxed RGB as (3, size, size) float32 in [0, 1]"""
+        def make():
+            image = self.letterbox(size)[0]
+            tensor = image[:, :, ::-1].transpose(2, 0, 1).astype(np.float32)
+            tensor /= 255.0
+            return tensor
+        return self._cached(("tensor", size), make)
+
+    def preview(self, max_dimension):
+        """Preview image whose longest side is at most max_dimension"""
+        def make():
+            height, width = self.image.shape[:2]
+            if max(height, width) <= max_dimension:
+                return self.image
+            factor = max_dimension / max(height, width)
+            return cv2.resize(self.image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        return self._cached(("preview", max_dimension), make)
+
+    def gray(self, width):
+        """Grayscale image at most width pixels wide"""
+        def make():
+            height, full_width = self.image.shape[:2]
+            image = self.image
+            if full_width > width:
+                # INTER_AREA is only cheap at integer ratios; bilinear otherwise
+                interpolation = cv2.INTER_AREA if full_width % width == 0 else cv2.INTER_LINEAR
+                image = cv2.resize(image, (width, max(1, int(round(height * width / full_width)))),
+                                   interpolation=interpolation)
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return self._cached(("gray", width), make)
+
+def as_frame(frame):
+    """Wrap a plain image in a Frame; Frame objects are returned unchanged"""
+    return frame if isinstance(frame, Frame) else Frame(frame)
@@ -1,45 +1,121 @@
 """YOLO model implementation for person detection"""
 
-from ultralytics import YOLO
+from ultralytics.engine.results import Boxes
+from ultralytics.trackers.track import TRACKER_MAP
+from ultralytics.utils import IterableSimpleNamespace
+from ultralytics.utils.checks import check_yaml
 import cv2
+import yaml
 import numpy as np
 from config.model_config import MODEL_CONFIG
+from models.backends import create_backend
+from models.frame import as_frame
+from models.detections import CONF, CLASS_ID, empty_detections
+
+def create_tracker(tracker_config=None, frame_rate=30):
+    """Create a tracker instance from an ultralytics tracker YAML (botsort.yaml, bytetrack.yaml)"""
+    tracker_config = tracker_config or MODEL_CONFIG["tracker"]
+    with open(check_yaml(tracker_config), encoding="utf-8") as f:
+        cfg = IterableSimpleNamespace(**yaml.safe_load(f))
+    return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=frame_rate)
 
 class YOLOModel:
     def __init__(self):
         """Initialize YOLO model"""
-        self.model = YOLO(MODEL_CONFIG["model_path"])
+        self.backend = create_backend()  # Engine selected by MODEL_CONFIG["backend"]
         self.confidence_threshold = MODEL_CONFIG.get("confidence_threshold", 0.5)
         self.person_class_id = MODEL_CONFIG.get("person_class_id", 0)  # COCO dataset person class ID
-        
-    def detect(self, frame):
+        self.trackers = {}  # Separate tracker state per stream
+
+    def detect(self, frame, stream_id=0):
         """
-        Detect people in the given frame
-        Returns: List of detections [x1, y1, x2, y2, confidence, class_id]
+        Detect people in the given frame (Frame or BGR image)
+        Returns: (N, 7) float32 array of [x1, y1, x2, y2, confidence, class_id, track_id]
+        """
+        return self.detect_batch([frame], [stream_id])[0]
+
+    def detect_batch(self, frames, stream_ids):
+        """
+        Detect and track people in frames from several streams with one forward pass
+        Args:
+            frames: List of Frame objects or BGR images
+            stream_ids: Stream identifier for each frame, used to select its tracker
+        Returns:
+            list: One detection array per frame, same format as detect()
         """
         try:
-            # Run inference with tracking enabled
-            results = self.model.track(frame, verbose=False, persist=True)[0]
-            
-            # Filter detections for persons with confidence above threshold
-            detections = []
-            if results.boxes and len(results.boxes) > 0:
-                for box in results.boxes:
-                    # Get box data
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf)
-                    class_id = int(box.cls)
-                    track_id = int(box.id[0]) if box.id is not None else -1
-                    
-                    if class_id == self.person_class_id and conf >= self.confidence_threshold:
-                        detections.append([x1, y1, x2, y2, conf, class_id, track_id])
-            
-            return detections
-            
+            frames = [as_frame(frame) for frame in frames]
+            raw_boxes = self.backend.infer(frames)
+            return [self._track(stream_id, Boxes(boxes, frame.shape[:2]), frame.image)
+                    for frame, stream_id, boxes in zip(frames, stream_ids, raw_boxes)]
+
         except Exception as e:
             print(f"Error during detection: {str(e)}")
-            return []
-            
+            return [empty_detections() for _ in frames]
+
+    def detect_regions(self, frame, regions, stream_id=0):
+        """
+        Detect and track people inside parts of a frame
+        Args:
+            frame: Frame or BGR image
+            regions: (x1, y1, x2, y2) pixel rectangles (ROI tiles), inferred as one batch
+            stream_id: Stream identifier, used to select its tracker
+        Returns:
+            np.ndarray: Detections in full-frame coordinates, same format as detect()
+        """
+        try:
+            frame = as_frame(frame)
+            crops = [frame.image[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+            raw_boxes = self.backend.infer(crops)
+            merged = []
+            for (x1, y1, _, _), boxes in zip(regions, raw_boxes):
+                boxes = np.array(boxes, dtype=np.float32)
+                boxes[:, [0, 2]] += x1
+                boxes[:, [1, 3]] += y1
+                merged.append(boxes)
+            merged = np.concatenate(merged) if merged else np.zeros((0, 6), dtype=np.float32)
+
+            # People on a tile seam are found in both tiles; keep the best box
+            if len(regions) > 1 and len(merged) > 1:
+                xywh = merged[:, :4].copy()
+                xywh[:, 2:] -= xywh[:, :2]
+                keep = cv2.dnn.NMSBoxes(xywh.tolist(), merged[:, 4].tolist(), 0.0, MODEL_CONFIG["iou"])
+                merged = merged[np.asarray(keep, dtype=np.int64).reshape(-1)]
+            return self._track(stream_id, Boxes(merged, frame.shape[:2]), frame.image)
+
+        except Exception as e:
+            print(f"Error during detection: {str(e)}")
+            return empty_detections()
+
+    def _track(self, stream_id, boxes, frame):
+        """Update the stream's tracker and return its tracked boxes as a detection array"""
+        tracker = self.trackers.get(stream_id)
+        if tracker is None:
+            tracker = self.trackers[stream_id] = create_tracker()
+
+        if len(boxes) == 0:
+            return empty_detections()
+
+        # Same handling as ultralytics model.track(): boxes without a matched
+        # track are dropped, and an empty tracker output keeps the raw boxes
+        tracks = tracker.update(boxes, frame)
+        if len(tracks) > 0:
+            # Track rows are [x1, y1, x2, y2, track_id, score, class_id, index]
+            detections = tracks[:, [0, 1, 2, 3, 5, 6, 4]].astype(np.float32)
+        else:
+            detections = np.column_stack([
+                boxes.xyxy, boxes.conf, boxes.cls, np.full(len(boxes), -1)
+            ]).astype(np.float32)
+
+        # Filter detections for persons with confidence above threshold
+        keep = ((detections[:, CLASS_ID] == self.person_class_id) &
+                (detections[:, CONF] >= self.confidence_threshold))
+        return detections[keep]
+
+    def reset_tracker(self, stream_id=0):
+        """Drop tracker state for a stream (e.g. after a reconnect)"""
+        self.trackers.pop(stream_id, None)
+
     def draw_detections(self, frame, detections):
         """Draw bounding boxes and labels on frame"""
         for det in detections:
@@ -182,6 +182,7 @@ let startTime = null;
 let frameCount = 0;
 let isProcessing = false;
 let lastFrameTime = null;
+let frameObjectUrl = null;
 let currentStep = 0;
 const totalSteps = 3;
 
@@ -630,7 +631,16 @@ window.api.onStreamData((event, frameData) => {
     }
     lastFrameTime = currentTime;
     
-    videoImage.src = `data:image/jpeg;base64,${frameData}`;
+    if (typeof frameData === 'string') {
+        // Legacy path: base64 JPEG from a JSON line on stdout
+        videoImage.src = `data:image/jpeg;base64,${frameData}`;
+    } else {
+        // Binary path: raw JPEG bytes from the preview socket
+        const previousUrl = frameObjectUrl;
+        frameObjectUrl = URL.createObjectURL(new Blob([frameData], { type: 'image/jpeg' }));
+        videoImage.src = frameObjectUrl;
+        if (previousUrl) URL.revokeObjectURL(previousUrl);
+    }
     
     if (frameCount === 0) {
         loadingText.style.display = 'none';
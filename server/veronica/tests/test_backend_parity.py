@@ -0,0 +1,46 @@
+"""ONNX Runtime and OpenVINO return the same boxes as the PyTorch path"""
+
+import os
+import cv2
+import pytest
+from config.model_config import MODEL_CONFIG
+from tools.parity import match_boxes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope="module")
+def reference():
+    """PyTorch backend boxes on the ultralytics sample image"""
+    pytest.importorskip("ultralytics")
+    if not os.path.exists(os.path.join(ROOT, MODEL_CONFIG["model_path"])):
+        pytest.skip(f"Model weights {MODEL_CONFIG['model_path']} not available")
+    from ultralytics.utils import ASSETS
+    from models.backends import create_backend
+
+    image = cv2.imread(str(ASSETS / "bus.jpg"))
+    if image is None:
+        pytest.skip("ultralytics sample image not available")
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # model_path and export_dir are relative to the application root
+    try:
+        boxes = create_backend("pytorch").infer([image])[0]
+    finally:
+        os.chdir(cwd)
+    return image, boxes[boxes[:, 4] >= MODEL_CONFIG["confidence"]]
+
+@pytest.mark.parametrize("backend, module", [("onnxruntime", "onnxruntime"), ("openvino", "openvino")])
+def test_backend_matches_pytorch(reference, backend, module, monkeypatch):
+    pytest.importorskip(module)
+    from models.backends import create_backend
+
+    image, expected = reference
+    monkeypatch.chdir(ROOT)
+    engine = create_backend(backend)
+    assert engine.name == backend
+    boxes = engine.infer([image])[0]
+    boxes = boxes[boxes[:, 4] >= MODEL_CONFIG["confidence"]]
+
+    assert len(expected) > 0
+    matched, _, conf_diffs = match_boxes(expected, boxes, 0.9)
+    assert matched / max(len(expected), len(boxes)) >= 0.95
+    assert max(conf_diffs) < 0.05
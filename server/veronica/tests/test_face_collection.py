@@ -0,0 +1,111 @@
+"""Rekognition collection mode: IndexFaces/SearchFaces grouping and checkpoint resume"""
+
+import pytest
+from config.face_config import FACE_CONFIG
+from tools.bench_rekognition import StubRekognitionClient
+
+def _key(index, person):
+    return f"store/2024/01/01/{index:03d}_person{person}.jpg"
+
+# Eight captures of three people, interleaved
+IMAGES = [_key(i, person) for i, person in enumerate([0, 1, 0, 2, 1, 0, 2, 1])]
+
+def _person(key):
+    return key.rsplit("_person", 1)[1].split(".")[0]
+
+@pytest.fixture
+def detector(tmp_path, monkeypatch):
+    """FaceDetector in collection mode on a stub client, with checkpoints in tmp_path"""
+    face_rekognition = pytest.importorskip("face_rekognition")
+    monkeypatch.setitem(FACE_CONFIG, "requests", dict(FACE_CONFIG["requests"], tps=1000))
+    monkeypatch.setitem(FACE_CONFIG, "checkpoint", dict(FACE_CONFIG["checkpoint"], dir=str(tmp_path)))
+
+    detector = face_rekognition.FaceDetector.__new__(face_rekognition.FaceDetector)
+    detector.rekognition_client = StubRekognitionClient(0.0, 0.0, service_tps=10000, identity=_person)
+    detector.bucket_name = "test"
+    detector.mode = "collection"
+    detector.store_name = "test-store"
+    detector.listing = []
+    detector.list_objects = lambda: detector.listing
+    return detector
+
+def _groups(face_groups):
+    """Groups as sets of images, comparable regardless of order"""
+    return sorted(sorted(face["image"] for face in group["faces"]) for group in face_groups)
+
+def _expected(images):
+    people = {}
+    for key in images:
+        people.setdefault(_person(key), []).append(key)
+    return sorted(sorted(keys) for keys in people.values())
+
+def test_groups_faces_by_person(detector):
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES)]
+    face_groups = detector.find_unique_faces()
+
+    assert _groups(face_groups) == _expected(IMAGES)
+    # The earliest capture of each person is its group's source image
+    assert sorted(group["source_image"] for group in face_groups) == [IMAGES[0], IMAGES[1], IMAGES[3]]
+    calls = detector.rekognition_client.calls
+    assert calls["IndexFaces"] == len(IMAGES)
+    assert calls["SearchFaces"] == len(IMAGES)
+
+def test_resumes_from_checkpoint(detector):
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES[:5])]
+    first = detector.find_unique_faces()
+    assert _groups(first) == _expected(IMAGES[:5])
+
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES)]
+    second = detector.find_unique_faces()
+    assert _groups(second) == _expected(IMAGES)
+
+    # The second run only indexed and searched the three new captures
+    calls = detector.rekognition_client.calls
+    assert calls["IndexFaces"] == len(IMAGES)
+    assert calls["SearchFaces"] == len(IMAGES)
+
+def test_reindexing_skipped_without_saved_checkpoint(detector, tmp_path):
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES)]
+    detector.find_unique_faces()
+    for path in tmp_path.iterdir():
+        path.unlink()  # Lost checkpoint: faces are recovered from the collection itself
+
+    assert _groups(detector.find_unique_faces()) == _expected(IMAGES)
+    assert detector.rekognition_client.calls["IndexFaces"] == len(IMAGES)
+
+def test_deletes_only_this_stores_old_collections(detector):
+    prefix = FACE_CONFIG["collection"]["prefix"]
+    detector.store_name = "main"
+    client = detector.rekognition_client
+    other_store = [f"{prefix}-main-street-20240101", f"{prefix}-main-street-20231231"]
+    for collection_id in [f"{prefix}-main-20240101"] + other_store:
+        client.create_collection(CollectionId=collection_id)
+
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES)]
+    detector.find_unique_faces()
+
+    # Yesterday's "main" collection is gone; "main-street" is another store's
+    assert sorted(client.collections) == sorted(other_store + [detector._collection_id()])
+
+def test_failed_search_is_retried_next_run(detector, monkeypatch):
+    client = detector.rekognition_client
+    failing = IMAGES[2]  # Second capture of person 0
+    search_faces = client.search_faces
+    detector_module = pytest.importorskip("face_rekognition")
+
+    def flaky_search(CollectionId, FaceId, **kwargs):
+        if client.collections[CollectionId][FaceId][0] == detector_module._external_image_id(failing):
+            raise RuntimeError("search failed")
+        return search_faces(CollectionId=CollectionId, FaceId=FaceId, **kwargs)
+
+    monkeypatch.setattr(client, "search_faces", flaky_search)
+    detector.listing = [(key, 1000.0 + i) for i, key in enumerate(IMAGES)]
+    first = detector.find_unique_faces()
+    assert _groups(first) == _expected([key for key in IMAGES if key != failing])
+
+    # The failed image is searched again (but not re-indexed) and joins its person's group
+    monkeypatch.setattr(client, "search_faces", search_faces)
+    second = detector.find_unique_faces()
+    assert _groups(second) == _expected(IMAGES)
+    assert client.calls["IndexFaces"] == len(IMAGES)
+    assert client.calls["SearchFaces"] == len(IMAGES)  # The failed call never reached the stub
@@ -0,0 +1,38 @@
+"""Track state stays bounded over long simulated runs"""
+
+import numpy as np
+from config.model_config import CAPTURE_CONFIG
+from core.best_shot import BestShotSelector
+from core.track_store import TrackStore
+from tools.soak_tracks import simulate
+
+def test_track_store_bounded_with_increasing_ids():
+    store = TrackStore(ttl=60.0, max_tracks=32)
+    for step in range(6 * 3600):  # Six simulated hours, one new ID per second
+        now = float(step)
+        store.touch(step, now)
+        store.expire(now)
+        assert len(store) <= 32
+    stats = store.get_stats()
+    assert stats["created"] == 6 * 3600
+    assert stats["peak"] <= 32
+    assert stats["expired"] + stats["evicted"] + stats["tracks"] == stats["created"]
+
+def test_evicted_tracks_are_emitted_once():
+    settings = dict(CAPTURE_CONFIG["best_shot"], max_tracks=8, track_ttl=3600.0)
+    selector = BestShotSelector(settings)
+    frame = np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    emitted = []
+    for step in range(3 * 3600 // 4):  # Three simulated hours at one frame per 4 s
+        now = step * 4.0
+        ids = [step, step + 1]  # Every ID is seen for two frames, then never again
+        selector.update(frame, [[10, 10, 90, 210], [200, 10, 280, 210]], [0.9, 0.8], ids, now=now)
+        emitted.extend(track_id for track_id, _, _ in selector.collect_finished(now=now))
+        assert len(selector.tracks) <= 8
+    assert emitted
+    assert len(emitted) == len(set(emitted))
+
+def test_soak_memory_flat():
+    rows, growth = simulate(days=3 / 24, reports=6)
+    assert rows[-1]["records_peak"] <= CAPTURE_CONFIG["best_shot"]["max_tracks"]
+    assert growth <= 256.0
@@ -0,0 +1,34 @@
+"""Command line entry point for Veronica tooling: python -m tools <command>"""
+
+import argparse
+import importlib
+
+# Subcommand name -> module implementing add_arguments(parser) and run(args)
+COMMANDS = {
+    "bench-batching": "tools.bench_batching",
+    "parity": "tools.parity",
+    "quantize": "tools.quantize",
+    "bench-quantized": "tools.bench_quantized",
+    "bench-upload": "tools.bench_upload",
+    "bench-faces": "tools.bench_faces",
+    "bench-rekognition": "tools.bench_rekognition",
+    "soak-tracks": "tools.soak_tracks",
+}
+
+def main():
+    """Parse arguments and dispatch to the selected tool"""
+    parser = argparse.ArgumentParser(prog="python -m tools", description="Veronica tooling")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    modules = {}
+    for name, module_name in COMMANDS.items():
+        module = importlib.import_module(module_name)
+        modules[name] = module
+        subparser = subparsers.add_parser(name, help=module.__doc__)
+        module.add_arguments(subparser)
+
+    args = parser.parse_args()
+    modules[args.command].run(args)
+
+if __name__ == "__main__":
+    main()
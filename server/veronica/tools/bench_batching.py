@@ -0,0 +1,115 @@
+"""Compare batched multi-stream inference with one process per stream"""
+
+import time
+import multiprocessing as mp
+from tools.common import load_frames, print_report
+
+class ReplaySource:
+    """Minimal stand-in for StreamHandler that always has a new frame ready"""
+
+    def __init__(self, frames, offset):
+        """Initialize replay source"""
+        self.frames = frames
+        self.index = offset
+
+    def request_frame(self):
+        """No-op: frames are always decoded"""
+
+    def poll_frame(self, timeout=0):
+        """Return the next frame in the clip"""
+        frame = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return frame
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--streams", type=int, default=4, help="Number of simulated cameras")
+    parser.add_argument("--source", help="Video file or image directory (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=64, help="Frames to load from the source")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run each mode")
+    parser.add_argument("--max-batch", type=int, default=None, help="Override max batch size")
+    parser.add_argument("--warmup", type=int, default=3, help="Warmup iterations before timing")
+
+def _run_batched(frames, args):
+    """Run all streams through one MultiStreamDetector"""
+    from core.multi_stream import MultiStreamDetector
+
+    streams = {i: ReplaySource(frames, i * 7) for i in range(args.streams)}
+    detector = MultiStreamDetector(streams, max_batch_size=args.max_batch, max_wait=0)
+    for _ in range(args.warmup):
+        detector.process_batch()
+
+    detector.frame_count = 0
+    detector.batch_count = 0
+    detector.inference_time = 0.0
+    start = time.time()
+    while time.time() - start < args.duration:
+        detector.process_batch()
+    elapsed = time.time() - start
+
+    stats = detector.get_stats()
+    return {
+        "mode": "batched",
+        "processes": 1,
+        "frames": detector.frame_count,
+        "fps": detector.frame_count / elapsed,
+        "avg_batch_size": stats["avg_batch_size"],
+        "avg_batch_ms": stats["avg_inference_ms"]
+    }
+
+def _independent_worker(source, frame_count, offset, duration, warmup, ready, go, results):
+    """Worker process: own model copy, one frame at a time"""
+    from models.yolo_model import YOLOModel
+
+    frames = load_frames(source, frame_count)
+    model = YOLOModel()
+    for i in range(warmup):
+        model.detect(frames[i % len(frames)])
+    ready.put(True)
+    go.wait()
+
+    processed = 0
+    start = time.time()
+    while time.time() - start < duration:
+        model.detect(frames[(offset + processed) % len(frames)])
+        processed += 1
+    results.put(processed)
+
+def _run_independent(args):
+    """Run one process per stream, each with its own model"""
+    ctx = mp.get_context("spawn")
+    ready = ctx.Queue()
+    results = ctx.Queue()
+    go = ctx.Event()
+    workers = [
+        ctx.Process(target=_independent_worker,
+                    args=(args.source, args.frames, i * 7, args.duration, args.warmup, ready, go, results))
+        for i in range(args.streams)
+    ]
+    for worker in workers:
+        worker.start()
+    for _ in workers:
+        ready.get()  # Wait until every process has loaded its model
+
+    go.set()
+    total = sum(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+
+    return {
+        "mode": "independent",
+        "processes": args.streams,
+        "frames": total,
+        "fps": total / args.duration
+    }
+
+def run(args):
+    """Run both modes and print a comparison"""
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"No frames could be loaded from {args.source}")
+
+    batched = _run_batched(frames, args)
+    independent = _run_independent(args)
+    batched["speedup"] = batched["fps"] / independent["fps"] if independent["fps"] else 0
+    print_report(f"Batched vs independent inference ({args.streams} streams)", [batched, independent])
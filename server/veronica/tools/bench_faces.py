@@ -0,0 +1,94 @@
+"""Benchmark unique-face clustering on synthetic embeddings"""
+
+import time
+import numpy as np
+from tools.common import print_report
+from models.face_index import FaceClusterer
+from config.face_config import FACE_CONFIG
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--identities", type=int, default=800, help="Distinct synthetic visitors")
+    parser.add_argument("--faces-per-identity", type=int, default=5, help="Captures per visitor")
+    parser.add_argument("--dimension", type=int, default=128, help="Embedding size (SFace: 128)")
+    parser.add_argument("--noise", type=float, default=0.6,
+                        help="Per-capture noise; same-person similarity is about 1 / (1 + noise^2)")
+    parser.add_argument("--threshold", type=float, default=FACE_CONFIG["match_threshold"],
+                        help="Cosine similarity threshold")
+    parser.add_argument("--loop-limit", type=int, default=1500,
+                        help="Faces given to the one-comparison-at-a-time baseline (it is slow)")
+
+def synthetic_embeddings(identities, per_identity, dimension, noise, seed=0):
+    """
+    Noisy L2-normalized samples around random identity directions, shuffled
+    Returns:
+        tuple: (embeddings (N, dimension), identity of each embedding)
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((identities, dimension)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    truth = np.repeat(np.arange(identities), per_identity)
+    samples = centers[truth] + noise * rng.standard_normal((len(truth), dimension)).astype(np.float32) / np.sqrt(dimension)
+    samples /= np.linalg.norm(samples, axis=1, keepdims=True)
+    order = rng.permutation(len(truth))
+    return samples[order], truth[order]
+
+def loop_cluster(embeddings, threshold):
+    """Baseline with the structure of the compare_faces loop: one comparison per group per face"""
+    representatives, groups = [], []
+    comparisons = 0
+    for vector in embeddings:
+        group = -1
+        for index, representative in enumerate(representatives):
+            comparisons += 1
+            if float(np.dot(representative, vector)) >= threshold:
+                group = index
+                break
+        if group < 0:
+            group = len(representatives)
+            representatives.append(vector)
+        groups.append(group)
+    return np.array(groups), comparisons
+
+def purity(groups, truth):
+    """Fraction of faces whose group's majority identity is their own"""
+    correct = 0
+    for group in np.unique(groups):
+        members = truth[groups == group]
+        correct += np.bincount(members).max()
+    return correct / len(truth)
+
+def run(args):
+    """Cluster synthetic faces with the vectorized index and the loop baseline"""
+    embeddings, truth = synthetic_embeddings(args.identities, args.faces_per_identity,
+                                             args.dimension, args.noise)
+    rows = []
+
+    start = time.perf_counter()
+    groups = FaceClusterer(args.threshold, args.dimension).assign(embeddings)
+    elapsed = time.perf_counter() - start
+    rows.append({
+        "method": "vectorized index",
+        "faces": len(embeddings),
+        "seconds": elapsed,
+        "faces_per_s": len(embeddings) / elapsed,
+        "groups": int(groups.max()) + 1,
+        "true_identities": args.identities,
+        "purity": purity(groups, truth)
+    })
+
+    subset = min(args.loop_limit, len(embeddings))
+    start = time.perf_counter()
+    loop_groups, comparisons = loop_cluster(embeddings[:subset], args.threshold)
+    elapsed = time.perf_counter() - start
+    rows.append({
+        "method": "pairwise loop",
+        "faces": subset,
+        "seconds": elapsed,
+        "faces_per_s": subset / elapsed,
+        "groups": int(loop_groups.max()) + 1,
+        "true_identities": len(np.unique(truth[:subset])),
+        "purity": purity(loop_groups, truth[:subset]),
+        "comparisons": comparisons  # Each one a compare_faces API call in Rekognition mode
+    })
+    print_report("Unique face clustering", rows)
@@ -0,0 +1,112 @@
+"""Compare latency, memory and recall of a quantized detector against FP32"""
+
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+from tools.common import load_frames, print_report
+from tools.parity import match_boxes
+from config.model_config import MODEL_CONFIG
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--int8", required=True, help="Quantized .onnx model from 'python -m tools quantize'")
+    parser.add_argument("--fp32", default=MODEL_CONFIG["model_path"],
+                        help="Reference FP32 model (.pt or .onnx)")
+    parser.add_argument("--fp32-backend", default="onnxruntime",
+                        help="Backend for the reference model (onnxruntime or pytorch)")
+    parser.add_argument("--source", required=True, help="Held-out video clip (not used for calibration)")
+    parser.add_argument("--frames", type=int, default=200, help="Frames to evaluate")
+    parser.add_argument("--stride", type=int, default=5, help="Keep every Nth video frame")
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a detection to count as recalled")
+    parser.add_argument("--min-conf", type=float, default=MODEL_CONFIG["confidence"],
+                        help="Confidence threshold applied to both models")
+
+def _rss_mb():
+    """Resident memory of this process in MB, if measurable"""
+    if psutil is not None:
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+def _evaluate(backend_name, model_path, source, frame_count, stride, results):
+    """Worker process: load one model, time it and collect its person boxes"""
+    from models.backends import create_backend
+
+    frames = load_frames(source, frame_count, stride=stride)
+    rss_before = _rss_mb()
+    config = dict(MODEL_CONFIG, model_path=model_path)
+    backend = create_backend(backend_name, config)
+    backend.infer(frames[:1])  # Warmup
+    rss_loaded = _rss_mb()
+
+    latencies, detections = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        boxes = backend.infer([frame])[0]
+        latencies.append(time.perf_counter() - start)
+        detections.append(boxes[boxes[:, 5] == 0])  # Person class in both models
+
+    rss_peak = _rss_mb()
+    results.put({
+        "latency_ms": [1000 * t for t in latencies],
+        "detections": detections,
+        "model_mb": (rss_loaded - rss_before) if rss_before is not None else None,
+        "peak_rss_mb": rss_peak
+    })
+
+def _run_isolated(backend_name, model_path, args):
+    """Evaluate a model in its own process so memory numbers are not mixed"""
+    ctx = mp.get_context("spawn")
+    results = ctx.Queue()
+    worker = ctx.Process(target=_evaluate,
+                         args=(backend_name, model_path, args.source, args.frames, args.stride, results))
+    worker.start()
+    result = results.get()
+    worker.join()
+    return result
+
+def _summary(name, result):
+    """Latency and memory summary for one model"""
+    latency = np.array(result["latency_ms"])
+    return {
+        "model": name,
+        "mean_ms": float(latency.mean()),
+        "p50_ms": float(np.percentile(latency, 50)),
+        "p95_ms": float(np.percentile(latency, 95)),
+        "fps": float(1000 / latency.mean()),
+        "model_mb": result["model_mb"],
+        "peak_rss_mb": result["peak_rss_mb"]
+    }
+
+def run(args):
+    """Benchmark FP32 and INT8 models on the same held-out clip"""
+    fp32 = _run_isolated(args.fp32_backend, args.fp32, args)
+    int8 = _run_isolated("onnxruntime", args.int8, args)
+
+    reference_total, candidate_total, matched_total = 0, 0, 0
+    for reference, candidate in zip(fp32["detections"], int8["detections"]):
+        reference = reference[reference[:, 4] >= args.min_conf]
+        candidate = candidate[candidate[:, 4] >= args.min_conf]
+        matched, _, _ = match_boxes(reference, candidate, args.iou)
+        reference_total += len(reference)
+        candidate_total += len(candidate)
+        matched_total += matched
+
+    fp32_row = _summary(f"fp32 ({args.fp32_backend})", fp32)
+    int8_row = _summary("int8", int8)
+    int8_row.update({
+        "speedup": fp32_row["mean_ms"] / int8_row["mean_ms"],
+        "recall_vs_fp32": matched_total / reference_total if reference_total else None,
+        "precision_vs_fp32": matched_total / candidate_total if candidate_total else None,
+        "reference_people": reference_total
+    })
+    print_report("INT8 person-only vs FP32", [fp32_row, int8_row])
@@ -0,0 +1,150 @@
+"""Benchmark concurrent detect_faces scheduling against a latency-injecting stub client"""
+
+import time
+import random
+import threading
+from collections import Counter, deque
+from botocore.exceptions import ClientError
+from tools.common import print_report
+from utils.request_scheduler import RequestScheduler
+from config.face_config import FACE_CONFIG
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--images", type=int, default=200, help="detect_faces calls per run")
+    parser.add_argument("--latency", type=float, default=0.25, help="Mean round trip per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Uniform +/- latency jitter (seconds)")
+    parser.add_argument("--service-tps", type=float, default=50,
+                        help="Rate above which the stub raises ThrottlingException")
+    parser.add_argument("--tps", type=float, default=FACE_CONFIG["requests"]["tps"],
+                        help="Client-side TPS limit (set above --service-tps to exercise backoff)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="Worker counts to compare")
+
+class ResourceAlreadyExistsException(Exception):
+    """Raised by the stub's create_collection for an existing collection"""
+
+class StubRekognitionClient:
+    """
+    Answers Rekognition calls after an injected delay and throttles above a request rate.
+
+    Besides detect_faces it implements the face collection calls used by
+    collection mode (create/list/delete collections, IndexFaces, ListFaces,
+    SearchFaces). Every image holds one face; identity maps an S3 key to the
+    person shown, and SearchFaces matches faces of the same person.
+    """
+
+    class exceptions:
+        ResourceAlreadyExistsException = ResourceAlreadyExistsException
+
+    def __init__(self, latency, jitter, service_tps, seed=0, identity=None):
+        """Initialize stub client"""
+        self.latency = latency
+        self.jitter = jitter
+        self.service_tps = service_tps
+        self.identity = identity or (lambda key: key)
+        self.recent = deque()
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.throttled = 0
+        self.calls = Counter()
+        self.collections = {}  # collection id -> {face id: (external image id, person)}
+        self.next_face = 0
+
+    def _request(self, operation):
+        """Count a call, throttle above service_tps and sleep for the injected latency"""
+        now = time.monotonic()
+        with self.lock:
+            self.calls[operation] += 1
+            while self.recent and now - self.recent[0] > 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.service_tps:
+                self.throttled += 1
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                                  operation)
+            self.recent.append(now)
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+
+    def detect_faces(self, Image):
+        """Simulated detect_faces: one face per image, named after the key"""
+        self._request("DetectFaces")
+        return {"FaceDetails": [{"Image": Image["S3Object"]["Name"]}]}
+
+    def create_collection(self, CollectionId):
+        """Create an empty collection"""
+        with self.lock:
+            if CollectionId in self.collections:
+                raise ResourceAlreadyExistsException(CollectionId)
+            self.collections[CollectionId] = {}
+        return {}
+
+    def delete_collection(self, CollectionId):
+        """Delete a collection"""
+        with self.lock:
+            del self.collections[CollectionId]
+        return {}
+
+    def get_paginator(self, operation):
+        """Single-page paginator for list_collections and list_faces"""
+        client = self
+
+        class Paginator:
+            def paginate(self, **kwargs):
+                with client.lock:
+                    if operation == "list_collections":
+                        return [{"CollectionIds": list(client.collections)}]
+                    faces = client.collections[kwargs["CollectionId"]]
+                    return [{"Faces": [{"FaceId": face_id, "ExternalImageId": external_id}
+                                       for face_id, (external_id, _) in faces.items()]}]
+        return Paginator()
+
+    def index_faces(self, CollectionId, Image, ExternalImageId, **kwargs):
+        """Index the one face of an image"""
+        self._request("IndexFaces")
+        with self.lock:
+            face_id = f"face-{self.next_face:06d}"
+            self.next_face += 1
+            self.collections[CollectionId][face_id] = (ExternalImageId, self.identity(Image["S3Object"]["Name"]))
+        return {"FaceRecords": [{"Face": {"FaceId": face_id}}]}
+
+    def search_faces(self, CollectionId, FaceId, FaceMatchThreshold, MaxFaces):
+        """Other faces of the same person in the collection"""
+        self._request("SearchFaces")
+        with self.lock:
+            faces = self.collections[CollectionId]
+            person = faces[FaceId][1]
+            matches = [face_id for face_id, (_, other) in faces.items() if other == person and face_id != FaceId]
+        return {"FaceMatches": [{"Face": {"FaceId": face_id}, "Similarity": 99.0} for face_id in matches[:MaxFaces]]}
+
+def run(args):
+    """Time the same workload at increasing concurrency"""
+    keys = [f"store/2024/01/01/person_id{i}.jpg" for i in range(args.images)]
+    expected = [[{"Image": key}] for key in keys]
+    rows = []
+    baseline = None
+
+    for workers in args.workers:
+        client = StubRekognitionClient(args.latency, args.jitter, args.service_tps)
+
+        def request(key):
+            return client.detect_faces(Image={"S3Object": {"Bucket": "bench", "Name": key}})["FaceDetails"]
+
+        settings = FACE_CONFIG["requests"]
+        scheduler = RequestScheduler(workers, args.tps, settings["max_retries"], settings["backoff"])
+        start = time.perf_counter()
+        results = scheduler.map(request, keys)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+
+        rows.append({
+            "workers": workers,
+            "seconds": elapsed,
+            "calls_per_s": args.images / elapsed,
+            "speedup": baseline / elapsed,
+            "throttled": client.throttled,
+            "errors": scheduler.errors,
+            "final_rate": round(scheduler.limiter.rate, 2),
+            "ordered": results == expected
+        })
+    print_report(f"detect_faces fan-out (client limit {args.tps} TPS, service {args.service_tps} TPS)", rows)
@@ -0,0 +1,132 @@
+"""Measure spooled S3 upload throughput and crash recovery against a local S3 stand-in"""
+
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import multiprocessing as mp
+import cv2
+import numpy as np
+from tools.common import print_report
+from config.s3_config import S3_CONFIG, UPLOAD_SETTINGS
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--endpoint", default=UPLOAD_SETTINGS["endpoint_url"] or "http://127.0.0.1:9000",
+                        help="S3-compatible endpoint, e.g. MinIO or 'moto_server'")
+    parser.add_argument("--bucket", default=S3_CONFIG["bucket_name"] or "veronica-bench",
+                        help="Bucket to upload into (created if missing)")
+    parser.add_argument("--count", type=int, default=300, help="Images to upload")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8],
+                        help="Worker counts to compare")
+    parser.add_argument("--crash-after", type=float, default=1.0,
+                        help="Kill the uploader process after this many seconds, then restart it "
+                             "on the same spool (0 = skip the crash recovery run)")
+
+def _config(args):
+    """S3 settings for the stand-in endpoint"""
+    config = {
+        "bucket_name": args.bucket,
+        "aws_access_key": S3_CONFIG["aws_access_key"] or "minioadmin",
+        "aws_secret_key": S3_CONFIG["aws_secret_key"] or "minioadmin",
+        "region": S3_CONFIG["region"] or "us-east-1",
+        "base_prefix": "bench"
+    }
+    return config
+
+def _settings(args, spool_dir, workers):
+    """Upload settings for one run"""
+    return dict(UPLOAD_SETTINGS, spool_dir=spool_dir, workers=workers,
+                max_pool_connections=max(workers, 1), endpoint_url=args.endpoint,
+                backoff={"initial": 0.2, "max": 2.0})
+
+def _uploader(config, settings):
+    """Create an uploader, creating the bucket if needed"""
+    import boto3
+    from utils.s3_utils import S3Uploader
+
+    client = boto3.client("s3", endpoint_url=settings["endpoint_url"], region_name=config["region"],
+                          aws_access_key_id=config["aws_access_key"],
+                          aws_secret_access_key=config["aws_secret_key"])
+    try:
+        client.head_bucket(Bucket=config["bucket_name"])
+    except Exception:
+        client.create_bucket(Bucket=config["bucket_name"])
+    return S3Uploader(config, settings)
+
+def _fill_spool(config, settings, prefix, count):
+    """Spool synthetic captures without uploading them"""
+    from utils.upload_queue import UploadQueue
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (320, 160, 3), dtype=np.uint8)  # Typical person crop size
+    _, data = cv2.imencode(".jpg", image)
+    queue = UploadQueue(None, settings)
+    for index in range(count):
+        queue.enqueue(data, f"{prefix}/{index:06d}.jpg")
+
+def _drain(config, settings):
+    """Worker process: upload everything in the spool, then exit"""
+    from utils.upload_queue import UploadQueue
+
+    queue = UploadQueue(_uploader(config, settings), settings)
+    queue.start()
+    queue.wait_idle()
+    queue.stop()
+
+def _count_objects(config, settings, prefix):
+    """Number of objects stored under a prefix"""
+    uploader = _uploader(config, settings)
+    paginator = uploader.s3_client.get_paginator("list_objects_v2")
+    return sum(page.get("KeyCount", 0)
+               for page in paginator.paginate(Bucket=config["bucket_name"], Prefix=prefix + "/"))
+
+def _run_once(args, workers, crash_after):
+    """Spool, upload (optionally killing and restarting the uploader) and verify"""
+    config = _config(args)
+    spool_dir = tempfile.mkdtemp(prefix="veronica_spool_")
+    settings = _settings(args, spool_dir, workers)
+    prefix = f"bench-upload/{uuid.uuid4().hex[:8]}"
+    ctx = mp.get_context("spawn")
+    try:
+        _fill_spool(config, settings, prefix, args.count)
+
+        start = time.perf_counter()
+        worker = ctx.Process(target=_drain, args=(config, settings))
+        worker.start()
+        crashed = False
+        if crash_after > 0:
+            worker.join(crash_after)
+            if worker.is_alive():
+                worker.kill()  # No cleanup: simulates a crash or power loss
+                crashed = True
+        worker.join()
+        left_after_crash = len([n for n in os.listdir(spool_dir) if n.endswith(".json")])
+
+        if crashed:
+            worker = ctx.Process(target=_drain, args=(config, settings))
+            worker.start()
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        stored = _count_objects(config, settings, prefix)
+        return {
+            "workers": workers,
+            "crash_test": crashed,
+            "pending_after_crash": left_after_crash if crashed else None,
+            "seconds": elapsed,
+            "uploads_per_s": args.count / elapsed,
+            "stored": stored,
+            "expected": args.count,
+            "complete": stored == args.count
+        }
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+def run(args):
+    """Compare worker counts, then check recovery from a killed uploader"""
+    rows = [_run_once(args, workers, 0) for workers in args.workers]
+    if args.crash_after > 0:
+        rows.append(_run_once(args, max(args.workers), args.crash_after))
+    print_report("Spooled S3 uploads", rows)
@@ -0,0 +1,56 @@
+"""Shared helpers for the benchmark and model tooling"""
+
+import os
+import json
+import cv2
+import numpy as np
+
+def load_frames(source=None, count=64, size=(1280, 720), stride=1):
+    """
+    Load frames for benchmarking
+    Args:
+        source (str, optional): Video file or directory of images; synthetic noise if None
+        count (int): Maximum number of frames to load
+        size (tuple): (width, height) of synthetic frames
+        stride (int): Keep every Nth frame of a video
+    Returns:
+        list: BGR frames
+    """
+    if source is None:
+        rng = np.random.default_rng(0)
+        width, height = size
+        return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+    if os.path.isdir(source):
+        frames = []
+        for name in sorted(os.listdir(source)):
+            if not name.lower().endswith((".jpg", ".jpeg", ".png", ".bmp")):
+                continue
+            image = cv2.imread(os.path.join(source, name))
+            if image is not None:
+                frames.append(image)
+            if len(frames) >= count:
+                break
+        return frames
+
+    cap = cv2.VideoCapture(source)
+    frames = []
+    index = 0
+    try:
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % stride == 0:
+                frames.append(frame)
+            index += 1
+    finally:
+        cap.release()
+    return frames
+
+def print_report(title, rows):
+    """Print a benchmark report as a JSON info message"""
+    print(json.dumps({
+        "type": "info",
+        "data": {"report": title, "results": rows}
+    }, indent=2), flush=True)
@@ -0,0 +1,90 @@
+"""Check that an inference backend returns the same boxes as the PyTorch path"""
+
+import numpy as np
+from tools.common import load_frames, print_report
+from config.model_config import MODEL_CONFIG
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--backend", required=True, help="Backend to compare: onnxruntime or openvino")
+    parser.add_argument("--model", help="Model for the backend under test (default: MODEL_CONFIG model_path)")
+    parser.add_argument("--source", required=True, help="Video file or image directory with people in view")
+    parser.add_argument("--frames", type=int, default=50, help="Frames to compare")
+    parser.add_argument("--stride", type=int, default=10, help="Keep every Nth video frame")
+    parser.add_argument("--iou", type=float, default=0.9, help="IoU for two boxes to count as the same")
+    parser.add_argument("--min-conf", type=float, default=MODEL_CONFIG["confidence"],
+                        help="Only compare boxes at or above this confidence")
+    parser.add_argument("--min-match", type=float, default=0.95, help="Required fraction of matched boxes")
+
+def box_iou(a, b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy arrays"""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+def match_boxes(reference, candidate, iou_threshold):
+    """
+    Greedily match candidate boxes to reference boxes
+    Returns:
+        tuple: (matched count, list of matched IoUs, list of confidence differences)
+    """
+    if len(reference) == 0 or len(candidate) == 0:
+        return 0, [], []
+    ious = box_iou(reference[:, :4], candidate[:, :4])
+    matched_ious, conf_diffs = [], []
+    while ious.size and ious.max() >= iou_threshold:
+        i, j = np.unravel_index(ious.argmax(), ious.shape)
+        matched_ious.append(float(ious[i, j]))
+        conf_diffs.append(abs(float(reference[i, 4]) - float(candidate[j, 4])))
+        ious[i, :] = -1
+        ious[:, j] = -1
+    return len(matched_ious), matched_ious, conf_diffs
+
+def run(args):
+    """Run both backends over the same frames and compare their boxes"""
+    from models.backends import create_backend
+
+    frames = load_frames(args.source, args.frames, stride=args.stride)
+    if not frames:
+        raise SystemExit(f"No frames could be loaded from {args.source}")
+
+    config = dict(MODEL_CONFIG)
+    reference_backend = create_backend("pytorch", config)
+    if args.model:
+        config["model_path"] = args.model
+    test_backend = create_backend(args.backend, config)
+    if test_backend.name != args.backend:
+        # create_backend fell back to pytorch; comparing it with itself would always pass
+        raise SystemExit(f"{args.backend} backend unavailable, parity not checked")
+
+    reference_total, candidate_total, matched_total = 0, 0, 0
+    all_ious, all_conf_diffs = [], []
+    for frame in frames:
+        reference = reference_backend.infer([frame])[0]
+        candidate = test_backend.infer([frame])[0]
+        reference = reference[reference[:, 4] >= args.min_conf]
+        candidate = candidate[candidate[:, 4] >= args.min_conf]
+
+        matched, ious, conf_diffs = match_boxes(reference, candidate, args.iou)
+        reference_total += len(reference)
+        candidate_total += len(candidate)
+        matched_total += matched
+        all_ious.extend(ious)
+        all_conf_diffs.extend(conf_diffs)
+
+    match_rate = matched_total / max(reference_total, candidate_total, 1)
+    print_report(f"Parity: {test_backend.name} vs pytorch", [{
+        "frames": len(frames),
+        "reference_boxes": reference_total,
+        "candidate_boxes": candidate_total,
+        "matched_boxes": matched_total,
+        "match_rate": match_rate,
+        "mean_iou": float(np.mean(all_ious)) if all_ious else 0.0,
+        "max_conf_diff": float(np.max(all_conf_diffs)) if all_conf_diffs else 0.0,
+        "passed": match_rate >= args.min_match
+    }])
+    if match_rate < args.min_match:
+        raise SystemExit(1)
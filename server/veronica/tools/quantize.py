@@ -0,0 +1,158 @@
+"""Build an INT8-quantized, person-only ONNX detector from captured frames"""
+
+import os
+import json
+import shutil
+import tempfile
+from models.backends import preprocess
+from tools.common import load_frames
+from config.model_config import MODEL_CONFIG
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--calibration-dir", required=True,
+                        help="Folder of captured store frames used as calibration data")
+    parser.add_argument("--model", default=MODEL_CONFIG["model_path"], help="Source PyTorch weights")
+    parser.add_argument("--output", help="Output .onnx path (default: <export_dir>/<model>_person_int8.onnx)")
+    parser.add_argument("--imgsz", type=int, default=MODEL_CONFIG["imgsz"], help="Model input size")
+    parser.add_argument("--max-frames", type=int, default=300, help="Maximum calibration frames")
+    parser.add_argument("--classes", type=int, nargs="+", default=MODEL_CONFIG["classes"],
+                        help="COCO class ids to keep in the head (default: person only)")
+    parser.add_argument("--calibration-method", choices=["minmax", "entropy", "percentile"],
+                        default="percentile", help="Activation range calibration method")
+
+def prune_head(yolo, keep_classes):
+    """
+    Cut the classification branch of a YOLOv8 Detect head down to the kept classes
+    The final 1x1 conv of every cls branch keeps only the kept output
+    channels, so the exported model computes and emits just those scores.
+    """
+    import torch
+
+    detect = yolo.model.model[-1]
+    for branch in detect.cv3:
+        conv = branch[-1]
+        pruned = torch.nn.Conv2d(conv.in_channels, len(keep_classes), kernel_size=1, bias=True)
+        pruned.weight.data = conv.weight.data[keep_classes].clone()
+        pruned.bias.data = conv.bias.data[keep_classes].clone()
+        branch[-1] = pruned
+
+    names = yolo.model.names
+    detect.nc = len(keep_classes)
+    detect.no = detect.nc + detect.reg_max * 4
+    yolo.model.nc = detect.nc
+    yolo.model.names = {i: names[c] for i, c in enumerate(keep_classes)}
+    if isinstance(getattr(yolo.model, "yaml", None), dict):
+        yolo.model.yaml["nc"] = detect.nc
+    return yolo
+
+class FrameCalibrationReader:
+    """Feeds letterboxed calibration frames to the ONNX Runtime quantizer"""
+
+    def __init__(self, frames, input_name, imgsz):
+        """Initialize calibration reader"""
+        self.frames = frames
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self.index = 0
+
+    def get_next(self):
+        """Return the next calibration input, or None when exhausted"""
+        if self.index >= len(self.frames):
+            return None
+        batch, _ = preprocess([self.frames[self.index]], self.imgsz)
+        self.index += 1
+        return {self.input_name: batch}
+
+    def rewind(self):
+        """Restart from the first frame"""
+        self.index = 0
+
+def _head_nodes_to_exclude(onnx_path, head_index):
+    """
+    Keep the box decode (DFL, sigmoid, concat) of the head in float
+    Quantizing the decode step collapses box precision; the convs stay INT8.
+    """
+    import onnx
+
+    model = onnx.load(onnx_path)
+    prefix = f"/model.{head_index}/"
+    return [node.name for node in model.graph.node
+            if node.name.startswith(prefix) and node.op_type != "Conv"]
+
+def run(args):
+    """Export, prune and quantize the detector"""
+    from ultralytics import YOLO
+    import onnxruntime as ort
+    from onnxruntime.quantization import (CalibrationMethod, QuantFormat, QuantType,
+                                          quantize_static)
+
+    frames = load_frames(args.calibration_dir, args.max_frames)
+    if not frames:
+        raise SystemExit(f"No calibration images found in {args.calibration_dir}")
+
+    stem = os.path.splitext(os.path.basename(args.model))[0]
+    output = args.output or os.path.join(MODEL_CONFIG["export_dir"], f"{stem}_person_int8.onnx")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    print(json.dumps({
+        "type": "info",
+        "data": f"Pruning head of {args.model} to classes {args.classes}"
+    }), flush=True)
+    yolo = prune_head(YOLO(args.model), args.classes)
+    head_index = len(yolo.model.model) - 1
+
+    work_dir = tempfile.mkdtemp(prefix="veronica_quant_")
+    try:
+        fp32_path = os.path.join(work_dir, "fp32.onnx")
+        exported = yolo.export(format="onnx", imgsz=args.imgsz, dynamic=True, simplify=True, verbose=False)
+        shutil.move(str(exported), fp32_path)
+
+        # Shape inference and graph cleanup recommended before static quantization
+        prepared_path = os.path.join(work_dir, "fp32_prepared.onnx")
+        try:
+            from onnxruntime.quantization.shape_inference import quant_pre_process
+            quant_pre_process(fp32_path, prepared_path)
+        except Exception as e:
+            print(json.dumps({
+                "type": "warning",
+                "data": f"Quantization pre-processing skipped: {str(e)}"
+            }), flush=True)
+            prepared_path = fp32_path
+
+        input_name = ort.InferenceSession(prepared_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        reader = FrameCalibrationReader(frames, input_name, args.imgsz)
+        methods = {
+            "minmax": CalibrationMethod.MinMax,
+            "entropy": CalibrationMethod.Entropy,
+            "percentile": CalibrationMethod.Percentile
+        }
+
+        print(json.dumps({
+            "type": "info",
+            "data": f"Calibrating on {len(frames)} frames ({args.calibration_method})..."
+        }), flush=True)
+        quantize_static(
+            prepared_path,
+            output,
+            reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=methods[args.calibration_method],
+            nodes_to_exclude=_head_nodes_to_exclude(prepared_path, head_index)
+        )
+
+        # Keep the FP32 person-only export next to it for benchmarking
+        fp32_output = output.replace("_int8.onnx", "_fp32.onnx") if output.endswith("_int8.onnx") \
+            else os.path.splitext(output)[0] + "_fp32.onnx"
+        shutil.copyfile(fp32_path, fp32_output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps({
+        "type": "success",
+        "data": f"Saved INT8 person-only model to {output}. Load it with "
+                f"MODEL_CONFIG backend='onnxruntime' and model_path='{output}'"
+    }), flush=True)
@@ -0,0 +1,96 @@
+"""Soak test: track state memory over a simulated multi-day run with ever-increasing tracker IDs"""
+
+import time
+import tracemalloc
+import numpy as np
+from tools.common import print_report
+from core.best_shot import BestShotSelector
+
+def add_arguments(parser):
+    """Register command line arguments"""
+    parser.add_argument("--days", type=float, default=7.0, help="Simulated run length")
+    parser.add_argument("--step", type=float, default=4.0, help="Simulated seconds between analysed frames")
+    parser.add_argument("--arrivals", type=float, default=0.2, help="New tracks per simulated second")
+    parser.add_argument("--dwell", type=float, default=20.0, help="Mean seconds a track stays in view")
+    parser.add_argument("--lost", type=float, default=0.05,
+                        help="Chance per frame that a visible track is missed (tests re-acquired IDs)")
+    parser.add_argument("--reports", type=int, default=14, help="Memory samples over the run")
+    parser.add_argument("--max-growth", type=float, default=256.0,
+                        help="Allowed second-half growth of traced memory (excluding crops) in KB")
+
+def simulate(days, step=4.0, arrivals=0.2, dwell=20.0, lost=0.05, reports=14, seed=0):
+    """
+    Drive BestShotSelector with synthetic tracks on a simulated clock and sample memory
+    Args:
+        days (float): Simulated run length
+        step (float): Simulated seconds between analysed frames
+        arrivals (float): New tracks per simulated second
+        dwell (float): Mean seconds a track stays in view
+        lost (float): Chance per frame that a visible track is missed
+        reports (int): Memory samples over the run
+        seed (int): Random seed
+    Returns:
+        tuple: (list of sample rows, second-half growth of traced memory excluding crops in KB)
+    """
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 255, (360, 640, 3), dtype=np.uint8)
+    selector = BestShotSelector()
+
+    duration = days * 86400
+    steps = int(duration / step)
+    report_every = max(1, steps // reports)
+    visible = {}  # track id -> (leave time, box)
+    next_id = 0
+    emitted = 0
+    rows = []
+
+    tracemalloc.start()
+    try:
+        for index in range(steps):
+            now = index * step
+            for _ in range(rng.poisson(arrivals * step)):
+                x, y = int(rng.integers(0, 560)), int(rng.integers(0, 160))
+                visible[next_id] = (now + rng.exponential(dwell), [x, y, x + 80, y + 200])
+                next_id += 1
+            for track_id in [t for t, (leave, _) in visible.items() if leave <= now]:
+                del visible[track_id]
+
+            seen = [t for t in visible if rng.random() >= lost]
+            selector.update(frame, [visible[t][1] for t in seen], rng.uniform(0.5, 0.95, len(seen)).tolist(),
+                            seen, now=now)
+            emitted += len(selector.collect_finished(now=now))
+
+            if (index + 1) % report_every == 0 or index == steps - 1:
+                current, peak = tracemalloc.get_traced_memory()
+                stats = selector.tracks.get_stats()
+                crops = sum(entry[2].image.nbytes for record in selector.tracks for entry in record.candidates)
+                rows.append({
+                    "hours": round(now / 3600, 1),
+                    "track_ids": next_id,
+                    "emitted": emitted,
+                    "records": stats["tracks"],
+                    "records_peak": stats["peak"],
+                    "evicted": stats["evicted"],
+                    "store_kb": stats["memory_kb"],
+                    "traced_kb": round(current / 1024, 1),
+                    "traced_without_crops_kb": round((current - crops) / 1024, 1),
+                    "traced_peak_kb": round(peak / 1024, 1)
+                })
+    finally:
+        tracemalloc.stop()
+
+    # Candidate crops come and go with the tracks; growth is judged on everything else
+    half = len(rows) // 2
+    growth = (max(row["traced_without_crops_kb"] for row in rows[half:]) -
+              max(row["traced_without_crops_kb"] for row in rows[:half]) if half else 0.0)
+    return rows, growth
+
+def run(args):
+    """Run the soak simulation and fail if memory keeps growing in the second half"""
+    start = time.perf_counter()
+    rows, growth = simulate(args.days, args.step, args.arrivals, args.dwell, args.lost, args.reports)
+    passed = growth <= args.max_growth
+    print_report(f"Track state soak ({args.days} simulated days in {time.perf_counter() - start:.1f}s, "
+                 f"second-half memory growth {growth:+.1f} KB, {'passed' if passed else 'FAILED'})", rows)
+    if not passed:
+        raise SystemExit(1)
@@ -0,0 +1,124 @@
+"""Persistent unique-face state so reruns only process new captures"""
+
+import os
+import json
+import time
+import numpy as np
+
+class FaceCheckpoint:
+    """
+    Unique-face grouping state for one store, day and mode.
+
+    Stored as <dir>/<store>_<YYYYMMDD>_<mode>.json (plus .npz with the
+    group representatives' embeddings in local mode):
+
+    processed    S3 keys already handled, with their LastModified time
+    watermark    LastModified up to which every listed object was handled;
+                 older objects are skipped without consulting processed
+    groups       face groups ({'source_image', 'faces'}) found so far
+    face_ids     Rekognition FaceIds per image (collection mode)
+    face_groups  group index of each FaceId (collection mode)
+    embeddings   one representative embedding per group (local mode)
+    """
+
+    VERSION = 1
+
+    def __init__(self, directory, store, day, mode, grace=300):
+        """
+        Initialize checkpoint
+        Args:
+            directory (str): Checkpoint directory
+            store (str): Store name
+            day (str): YYYYMMDD
+            mode (str): Grouping mode; state is not shared between modes
+            grace (float): Seconds of LastModified skew tolerated around the watermark
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, f"{store}_{day}_{mode}.json")
+        self.embeddings_path = self.path[:-len(".json")] + ".npz"
+        self.grace = grace
+
+        self.processed = {}
+        self.watermark = 0.0
+        self.groups = []
+        self.face_ids = {}
+        self.face_groups = {}
+        self.embeddings = None
+
+    def load(self):
+        """Load saved state; returns False if there is none"""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("version") != self.VERSION:
+            return False
+
+        self.processed = state["processed"]
+        self.watermark = state["watermark"]
+        self.groups = state["groups"]
+        self.face_ids = state.get("face_ids", {})
+        self.face_groups = state.get("face_groups", {})
+        if os.path.exists(self.embeddings_path):
+            with np.load(self.embeddings_path) as data:
+                self.embeddings = data["embeddings"]
+        return True
+
+    def is_new(self, key, last_modified):
+        """Whether an S3 object still has to be processed"""
+        if last_modified < self.watermark - self.grace:
+            return False
+        return key not in self.processed
+
+    def mark_processed(self, key, last_modified):
+        """Record a handled object"""
+        self.processed[key] = last_modified
+
+    def advance(self, objects):
+        """
+        Move the watermark after a run
+        Args:
+            objects (list): (key, last_modified) of everything listed this run
+        """
+        pending = [modified for key, modified in objects if self.is_new(key, modified)]
+        if pending:
+            self.watermark = max(self.watermark, min(pending))  # Retry failures next run
+        elif objects:
+            self.watermark = max(self.watermark, max(modified for _, modified in objects))
+
+        # Keys far below the watermark are covered by it alone
+        floor = self.watermark - 2 * self.grace
+        self.processed = {key: modified for key, modified in self.processed.items() if modified >= floor}
+
+    def save(self):
+        """Write the state atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        if self.embeddings is not None:
+            tmp_path = self.embeddings_path + ".tmp.npz"
+            np.savez(tmp_path, embeddings=self.embeddings)
+            os.replace(tmp_path, self.embeddings_path)
+
+        state = {
+            "version": self.VERSION,
+            "saved": time.time(),
+            "processed": self.processed,
+            "watermark": self.watermark,
+            "groups": self.groups,
+            "face_ids": self.face_ids,
+            "face_groups": self.face_groups
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+def prune_checkpoints(directory, retention_days):
+    """Delete checkpoint files older than the retention period"""
+    if not os.path.isdir(directory):
+        return
+    cutoff = time.time() - retention_days * 86400
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith((".json", ".npz")) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
@@ -3,16 +3,20 @@
 import os
 import cv2
 import json
+import hashlib
 from datetime import datetime
 from utils.s3_utils import S3Uploader
+from utils.upload_queue import UploadQueue
 from config.model_config import CAPTURE_CONFIG
+from config.s3_config import UPLOAD_SETTINGS
 
 # Initialize S3 uploader
 s3_uploader = S3Uploader()
 
-# Ensure temp directory exists
-temp_dir = "./"
-os.makedirs(temp_dir, exist_ok=True)
+# Background uploads from memory; resumes uploads a previous run left in the spool/fallback directory
+upload_queue = UploadQueue(s3_uploader)
+if s3_uploader.enabled:
+    upload_queue.start()
 
 def generate_filename(person_id, confidence):
     """Generate a standardized filename for person images"""
@@ -32,47 +36,49 @@ def save_image_to_disk(image, filepath):
     # print("filepath from save image to disk", filepath)
     return cv2.imwrite(filepath, image)
 
-def save_person_image(image, confidence, person_id):
+def save_person_image(image, confidence, person_id, metadata=None):
     """
     Save detected person image based on environment:
-    - Production: Save only to S3
+    - Production: Queue for background upload to S3 only
     - Development: Save locally and optionally to S3
     
     Args:
         image: OpenCV image array
         confidence: Detection confidence score
         person_id: Unique identifier for the person
+        metadata (dict, optional): Extra S3 object metadata (string values)
         
     Returns:
-        str: S3 URL or local filepath if successful, None otherwise
+        str: S3 URL (once uploaded) or local filepath if successful, None otherwise
     """
     try:
         filename = generate_filename(person_id, confidence)
         # print("filename from save person image", filename)
         is_production = os.getenv("ENVIRONMENT", "dev").lower() == "prod"
         
-        # Production: Use temp directory and S3 only
+        # Production: Encode in memory and queue for background upload to S3 only
         if is_production:
             if not s3_uploader.enabled:
                 return None
                 
-            temp_path = os.path.join(temp_dir, filename)
-            
-            if not save_image_to_disk(image, temp_path):
-                log_message("error", f"Failed to save temporary file: {temp_path}")
+            success, buffer = cv2.imencode('.jpg', image)
+            if not success:
+                log_message("error", f"Failed to encode image: {filename}")
                 return None
+            data = buffer.tobytes()
             
-            try:
-                s3_url = s3_uploader.upload_file(temp_path)  # Uses daily prefix automatically
-                if s3_url:
-                    log_message("info", f"Uploaded to S3: {s3_url}")
-                return s3_url
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(temp_path)
-                except Exception as e:
-                    log_message("error", f"Failed to remove temporary file: {str(e)}")
+            if UPLOAD_SETTINGS["content_hash_keys"]:
+                # Identical captures map to one object, so re-uploads are harmless
+                filename = f"person_{hashlib.sha256(data).hexdigest()[:32]}.jpg"
+            key = s3_uploader.build_key(filename)  # Daily prefix of the capture time
+            metadata = {
+                "person-id": str(person_id),
+                "confidence": f"{confidence:.2f}",
+                "captured-at": datetime.now().isoformat(timespec="seconds"),
+                **(metadata or {})
+            }
+            upload_queue.enqueue(data, key, metadata)
+            return s3_uploader.object_url(key)
         
         # Development: Save locally and optionally to S3
         else:
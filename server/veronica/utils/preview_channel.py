@@ -0,0 +1,91 @@
+"""Binary preview frame channel to the Electron dashboard"""
+
+import os
+import json
+import socket
+import struct
+import threading
+
+class PreviewChannel:
+    """
+    Sends preview frames to Electron over a local TCP socket.
+
+    Every message is a 5-byte header (1 byte message type, 4 byte big-endian
+    payload length) followed by the raw payload, so frames need no base64 or
+    JSON wrapping and never share a stream with the JSON log lines on stdout.
+    Electron passes the port in the VERONICA_PREVIEW_PORT environment variable.
+    """
+
+    HEADER = struct.Struct(">BI")
+    FRAME_JPEG = 1
+
+    def __init__(self, port=None, host="127.0.0.1", timeout=2.0):
+        """Initialize preview channel and connect if a port is configured"""
+        self.host = host
+        self.port = int(port or os.getenv("VERONICA_PREVIEW_PORT", 0) or 0)
+        self.timeout = timeout
+        self.sock = None
+        self.lock = threading.Lock()
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        if self.port:
+            self.connect()
+
+    @property
+    def enabled(self):
+        """Whether frames can be sent over the socket"""
+        return self.sock is not None
+
+    def connect(self):
+        """Connect to the Electron preview server"""
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print(json.dumps({
+                "type": "info",
+                "data": f"Preview channel connected on port {self.port}"
+            }), flush=True)
+            return True
+        except OSError as e:
+            self.sock = None
+            print(json.dumps({
+                "type": "error",
+                "data": f"Preview channel unavailable, using stdout: {str(e)}"
+            }), flush=True)
+            return False
+
+    def send(self, payload, message_type=FRAME_JPEG):
+        """
+        Send one length-prefixed message
+        Args:
+            payload (bytes): Encoded frame
+            message_type (int): Message type byte
+        Returns:
+            bool: True if the message was written
+        """
+        if self.sock is None:
+            return False
+        header = self.HEADER.pack(message_type, len(payload))
+        try:
+            with self.lock:
+                self.sock.sendall(header)
+                self.sock.sendall(payload)
+            self.frames_sent += 1
+            self.bytes_sent += len(header) + len(payload)
+            return True
+        except OSError as e:
+            print(json.dumps({
+                "type": "error",
+                "data": f"Preview channel closed: {str(e)}"
+            }), flush=True)
+            self.close()
+            return False
+
+    def close(self):
+        """Close the socket"""
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
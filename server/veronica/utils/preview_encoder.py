@@ -0,0 +1,169 @@
+"""Adaptive preview encoder running independently of detection"""
+
+import time
+import json
+import threading
+import cv2
+import numpy as np
+from config.performance_config import PREVIEW_SETTINGS
+
+try:
+    import simplejpeg  # libjpeg-turbo based, noticeably faster than cv2.imencode
+except ImportError:
+    simplejpeg = None
+
+class PreviewEncoder:
+    """
+    Encodes and publishes dashboard preview frames on its own thread.
+
+    Detection hands over frames with submit(), which never blocks: only the
+    newest frame is kept, so when encoding or the UI falls behind, older
+    frames are skipped. The worker sends at most target_fps frames per
+    second and adjusts JPEG quality, then scale, to stay within the
+    bandwidth budget.
+    """
+
+    def __init__(self, publish, settings=None):
+        """
+        Initialize preview encoder
+        Args:
+            publish (callable): Called with JPEG bytes; may block (backpressure)
+            settings (dict, optional): Overrides PREVIEW_SETTINGS
+        """
+        self.settings = settings or PREVIEW_SETTINGS
+        self.publish = publish
+        self.interval = 1.0 / self.settings["target_fps"]
+        self.max_dimension = self.settings["max_dimension"]
+        self.quality = self.settings["quality"]["initial"]
+        self.scale = 1.0
+        self.budget = self.settings["bandwidth_budget"]
+
+        encoder = self.settings["encoder"]
+        if encoder == "simplejpeg" and simplejpeg is None:
+            print(json.dumps({
+                "type": "warning",
+                "data": "simplejpeg not installed, using OpenCV JPEG encoder"
+            }), flush=True)
+        self.use_simplejpeg = simplejpeg is not None and encoder in ("auto", "simplejpeg")
+
+        self._pending = None
+        self._cond = threading.Condition()
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.frames_submitted = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self._window_start = time.time()
+        self._window_bytes = 0
+
+    def start(self):
+        """Start the encoder thread"""
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        """Stop the encoder thread"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def submit(self, frame):
+        """
+        Offer a frame for preview without blocking
+        The frame must not be modified by the caller afterwards.
+        """
+        with self._cond:
+            if self._pending is not None:
+                self.frames_dropped += 1  # Previous frame was never encoded
+            self._pending = frame
+            self.frames_submitted += 1
+            self._cond.notify()
+
+    def encode(self, frame):
+        """
+        Resize and JPEG-encode a frame with the current quality and scale
+        Annotated frames arrive at preview scale already, so they are only
+        resized here while the governor has lowered the scale.
+        """
+        height, width = frame.shape[:2]
+        max_dimension = self.max_dimension * self.scale
+        if height > max_dimension or width > max_dimension:
+            factor = max_dimension / max(height, width)
+            frame = cv2.resize(frame, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+
+        if self.use_simplejpeg:
+            return simplejpeg.encode_jpeg(np.ascontiguousarray(frame), quality=self.quality,
+                                          colorspace="BGR", fastdct=True)
+        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return buffer.tobytes()
+
+    def _govern(self):
+        """Adjust quality and scale twice per second to fit the bandwidth budget"""
+        now = time.time()
+        elapsed = now - self._window_start
+        if elapsed < 0.5:
+            return
+        ratio = (self._window_bytes / elapsed) / self.budget
+        self._window_start = now
+        self._window_bytes = 0
+
+        quality = self.settings["quality"]
+        if ratio > 1.0:
+            # Over budget: lower quality first (bigger steps when far over), then shrink
+            if self.quality > quality["min"]:
+                step = quality["step"] * min(4, int(ratio + 0.5))
+                self.quality = max(quality["min"], self.quality - step)
+            elif self.scale > self.settings["min_scale"]:
+                # Bytes scale roughly with pixel area, i.e. with scale squared
+                self.scale = max(self.settings["min_scale"], self.scale * max(0.7, ratio ** -0.5))
+        elif ratio < 0.6:
+            # Comfortably under budget: restore size first, then quality
+            if self.scale < 1.0:
+                self.scale = min(1.0, self.scale / 0.85)
+            elif self.quality < quality["max"]:
+                self.quality = min(quality["max"], self.quality + quality["step"])
+
+    def _run(self):
+        """Encoder loop: newest frame only, paced to target_fps"""
+        next_time = time.time()
+        while True:
+            with self._cond:
+                while self.running and self._pending is None:
+                    self._cond.wait()
+                if not self.running:
+                    return
+                frame = self._pending
+                self._pending = None
+
+            try:
+                data = self.encode(frame)
+                self.publish(data)  # Blocks while the consumer is slow
+                self.frames_sent += 1
+                self._window_bytes += len(data)
+                self._govern()
+            except Exception as e:
+                print(json.dumps({"type": "error", "data": f"Preview encoder error: {str(e)}"}), flush=True)
+
+            # Pace to the preview frame rate; frames submitted meanwhile replace each other
+            next_time = max(next_time + self.interval, time.time())
+            delay = next_time - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+    def get_stats(self):
+        """Get encoder statistics"""
+        return {
+            "submitted": self.frames_submitted,
+            "sent": self.frames_sent,
+            "dropped": self.frames_dropped,
+            "quality": self.quality,
+            "scale": round(self.scale, 2),
+            "encoder": "simplejpeg" if self.use_simplejpeg else "opencv"
+        }
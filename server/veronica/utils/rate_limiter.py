@@ -0,0 +1,93 @@
+"""Thread-safe token bucket rate limiter"""
+
+import time
+import threading
+
+class RateLimiter:
+    """
+    Token bucket shared by worker threads.
+
+    acquire() blocks until a token is available, so no more than `rate`
+    calls per second start on average, with bursts of up to `burst` calls.
+    """
+
+    def __init__(self, rate, burst=None):
+        """
+        Initialize rate limiter
+        Args:
+            rate (float): Tokens per second
+            burst (int, optional): Bucket size, defaults to max(1, rate)
+        """
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, self.rate))
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        """Add tokens for the time since the last refill (caller holds the lock)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available without waiting"""
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """Wait until tokens are available and take them"""
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Rate limiter that backs off when the service throttles.
+
+    throttled() halves the rate (down to min_rate), at most once per
+    cooldown so a burst of rejections counts as one signal; each success
+    adds back a small step up to max_rate. The rate settles just below
+    what the service accepts (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, max_rate, min_rate=0.5, increase=0.1, cooldown=1.0, burst=None):
+        """
+        Initialize adaptive rate limiter
+        Args:
+            max_rate (float): Configured requests per second
+            min_rate (float): Lowest rate after repeated throttling
+            increase (float): Rate added per successful request
+            cooldown (float): Minimum seconds between two rate decreases
+            burst (int, optional): Bucket size, defaults to max(1, max_rate)
+        """
+        super().__init__(max_rate, burst)
+        self.max_rate = float(max_rate)
+        self.min_rate = float(min(min_rate, max_rate))
+        self.increase = increase
+        self.cooldown = cooldown
+        self.last_decrease = 0.0
+        self.throttle_count = 0
+
+    def throttled(self):
+        """The service rejected a request for exceeding its rate"""
+        with self.lock:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if now - self.last_decrease >= self.cooldown:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.last_decrease = now
+            self.tokens = min(self.tokens, 0.0)  # Drain the burst as well
+
+    def succeeded(self):
+        """A request went through"""
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
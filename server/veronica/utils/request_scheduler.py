@@ -0,0 +1,95 @@
+"""Concurrent, rate-limited AWS requests with ordered results"""
+
+import json
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from utils.rate_limiter import AdaptiveRateLimiter
+
+# Error codes AWS services use for request rate limiting
+THROTTLING_ERRORS = {
+    "ThrottlingException",
+    "Throttling",
+    "ProvisionedThroughputExceededException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown"
+}
+
+def is_throttling(error):
+    """Whether an exception is a rate limit rejection"""
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLING_ERRORS
+
+class RequestScheduler:
+    """
+    Runs independent API calls on a bounded thread pool.
+
+    Every call first takes a token from a shared AdaptiveRateLimiter, so
+    the account TPS limit is respected across workers. Throttled calls are
+    retried with exponential backoff and lower the shared rate; other
+    errors are logged and give the default result. map() returns results
+    in input order no matter which call finishes first.
+    """
+
+    def __init__(self, workers, tps, max_retries=5, backoff=None):
+        """
+        Initialize scheduler
+        Args:
+            workers (int): Concurrent calls
+            tps (float): Requests per second across all workers
+            max_retries (int): Retries of a throttled call
+            backoff (dict, optional): {"initial", "max"} retry delay in seconds
+        """
+        self.workers = workers
+        self.limiter = AdaptiveRateLimiter(tps)
+        self.max_retries = max_retries
+        self.backoff = backoff or {"initial": 0.5, "max": 10.0}
+        self.calls = 0
+        self.errors = 0
+
+    def call(self, func, item, default=None):
+        """Run one rate-limited call with throttling retries"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            with self.limiter.lock:  # Called from every pool worker
+                self.calls += 1
+            try:
+                result = func(item)
+                self.limiter.succeeded()
+                return result
+            except Exception as e:
+                if is_throttling(e) and attempt < self.max_retries:
+                    self.limiter.throttled()
+                    delay = min(self.backoff["max"], self.backoff["initial"] * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.0))
+                    continue
+                with self.limiter.lock:
+                    self.errors += 1
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Request for {item} failed: {str(e)}"
+                }), flush=True)
+                return default
+        return default
+
+    def map(self, func, items, default=None):
+        """
+        Call func for every item concurrently
+        Returns:
+            list: Results in the order of items
+        """
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [self.call(func, item, default) for item in items]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(lambda item: self.call(func, item, default), items))
+
+    def get_stats(self):
+        """Get request statistics"""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "throttled": self.limiter.throttle_count,
+            "rate": round(self.limiter.rate, 2)
+        }
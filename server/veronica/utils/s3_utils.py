@@ -1,31 +1,42 @@
 """AWS S3 utilities for uploading files"""
 
 import os
-import time
 import json
 import boto3
 import botocore
-from config.s3_config import S3_CONFIG, get_daily_prefix
+from botocore.config import Config
+from config.s3_config import S3_CONFIG, UPLOAD_SETTINGS, get_daily_prefix
 
 class S3Uploader:
-    def __init__(self):
-        """Initialize S3 client with credentials from config"""
+    def __init__(self, config=None, settings=None):
+        """
+        Initialize S3 client with credentials from config
+        Args:
+            config (dict, optional): Overrides S3_CONFIG
+            settings (dict, optional): Overrides UPLOAD_SETTINGS
+        """
         self.enabled = False
-        self.max_retries = 3
-        self.retry_delay = 1
+        self.config = config or S3_CONFIG
+        self.settings = settings or UPLOAD_SETTINGS
         
         try:
-            if not all(S3_CONFIG.values()):
+            if not all(self.config.values()):
                 raise ValueError("Missing required S3 configuration values")
                 
-            # Initialize S3 client
+            # One client (thread-safe) with a connection pool shared by all upload workers;
+            # transient errors are retried by botocore's standard retry mode
             self.s3_client = boto3.client(
                 's3',
-                aws_access_key_id=S3_CONFIG['aws_access_key'],
-                aws_secret_access_key=S3_CONFIG['aws_secret_key'],
-                region_name=S3_CONFIG['region']
+                aws_access_key_id=self.config['aws_access_key'],
+                aws_secret_access_key=self.config['aws_secret_key'],
+                region_name=self.config['region'],
+                endpoint_url=self.settings["endpoint_url"],
+                config=Config(
+                    max_pool_connections=self.settings["max_pool_connections"],
+                    retries={"mode": "standard", "max_attempts": 3}
+                )
             )
-            self.bucket_name = S3_CONFIG['bucket_name']
+            self.bucket_name = self.config['bucket_name']
             
             # Verify bucket exists and is accessible
             try:
@@ -49,9 +60,50 @@ class S3Uploader:
                 "data": f"S3 upload disabled: {str(e)}"
             }), flush=True)
         
+    def build_key(self, filename):
+        """S3 key for a file under today's prefix"""
+        return os.path.join(get_daily_prefix(), filename).replace('\\', '/')
+        
+    def object_url(self, key):
+        """Public URL of an object"""
+        if self.settings["endpoint_url"]:
+            return f"{self.settings['endpoint_url'].rstrip('/')}/{self.bucket_name}/{key}"
+        return f"https://{self.bucket_name}.s3.{self.config['region']}.amazonaws.com/{key}"
+        
+    def put_file(self, file_path, key):
+        """
+        Upload a file in a single attempt (raises on failure)
+        A successful upload_file call means S3 stored the object; there is no
+        separate verification request.
+        Returns:
+            str: S3 URL of the uploaded file
+        """
+        self.s3_client.upload_file(file_path, self.bucket_name, key)
+        return self.object_url(key)
+        
+    def put_bytes(self, data, key, metadata=None):
+        """
+        Upload an in-memory object in a single attempt (raises on failure)
+        Args:
+            data (bytes): Encoded image
+            key (str): S3 key
+            metadata (dict, optional): Object metadata (string values)
+        Returns:
+            str: S3 URL of the uploaded object
+        """
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=data,
+            ContentType="image/jpeg",
+            Metadata=metadata or {}
+        )
+        return self.object_url(key)
+        
     def upload_file(self, file_path, s3_path=None):
         """
         Upload a file to S3 if enabled, otherwise keep locally
+        Blocks the caller; captures go through utils.upload_queue instead.
         Args:
             file_path (str): Local path to the file
             s3_path (str, optional): S3 path/key. If None, uses the filename
@@ -72,60 +124,19 @@ class S3Uploader:
             }), flush=True)
             return None
             
-        # If s3_path not provided, use filename only
-        # If s3_path not provided, use filename with daily prefix
-        if s3_path is None:
-            filename = file_path.split('/')[-1]
-            s3_path = os.path.join(get_daily_prefix(), filename).replace('\\', '/')
-        else:
-            # If s3_path is provided, ensure it's under the daily prefix
-            s3_path = os.path.join(get_daily_prefix(), s3_path).replace('\\', '/')
-            
-        retries = 0
-        while retries < self.max_retries:
-            try:
-                # Upload file
-                self.s3_client.upload_file(
-                    file_path,
-                    self.bucket_name,
-                    s3_path
-                )
-                
-                # Verify upload by checking if file exists
-                try:
-                    self.s3_client.head_object(
-                        Bucket=self.bucket_name,
-                        Key=s3_path
-                    )
-                    # Generate S3 URL
-                    url = f"https://{self.bucket_name}.s3.{S3_CONFIG['region']}.amazonaws.com/{s3_path}"
-                    print(json.dumps({
-                        "type": "info",
-                        "data": f"Successfully uploaded to S3: {url}"
-                    }), flush=True)
-                    return url
-                except botocore.exceptions.ClientError:
-                    print(json.dumps({
-                        "type": "error",
-                        "data": "Upload verification failed"
-                    }), flush=True)
-                    raise
-                    
-            except Exception as e:
-                retries += 1
-                if retries < self.max_retries:
-                    print(json.dumps({
-                        "type": "error",
-                        "data": f"Upload attempt {retries} failed: {str(e)}"
-                    }), flush=True)
-                    print(json.dumps({
-                        "type": "info",
-                        "data": f"Retrying in {self.retry_delay} seconds..."
-                    }), flush=True)
-                    time.sleep(self.retry_delay)
-                else:
-                    print(json.dumps({
-                        "type": "error",
-                        "data": f"Failed to upload after {self.max_retries} attempts: {str(e)}"
-                    }), flush=True)
-                    return None
+        # If s3_path not provided, use filename with daily prefix;
+        # a provided s3_path is also placed under the daily prefix
+        key = self.build_key(s3_path if s3_path is not None else os.path.basename(file_path))
+        try:
+            url = self.put_file(file_path, key)
+            print(json.dumps({
+                "type": "info",
+                "data": f"Successfully uploaded to S3: {url}"
+            }), flush=True)
+            return url
+        except Exception as e:
+            print(json.dumps({
+                "type": "error",
+                "data": f"Failed to upload {file_path}: {str(e)}"
+            }), flush=True)
+            return None
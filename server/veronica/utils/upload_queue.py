@@ -0,0 +1,324 @@
+"""Background worker pool for S3 uploads with an optional persistent spool"""
+
+import os
+import json
+import time
+import heapq
+import random
+import uuid
+import threading
+from config.s3_config import UPLOAD_SETTINGS
+
+class UploadQueue:
+    """
+    Uploads captures to S3 in the background.
+
+    Encoded images are handed over as bytes and uploaded straight from
+    memory with put_object. The local disk is only used when configured:
+
+    spool_dir     every item is written to the spool on enqueue, so pending
+                  uploads survive a crash or restart
+    fallback_dir  items stay in memory and are only written out when an
+                  upload fails or the in-memory queue is full
+
+    On disk an item is the image plus a small JSON manifest (S3 key,
+    metadata, attempt count), written last with an atomic rename so an item
+    is either fully present or not at all. Worker threads upload due items
+    concurrently through the uploader's shared client and reschedule
+    failures with exponential backoff (with jitter). start() picks up
+    whatever a previous run left on disk.
+    """
+
+    def __init__(self, uploader, settings=None):
+        """
+        Initialize upload queue
+        Args:
+            uploader (S3Uploader): Provides the S3 client and bucket
+            settings (dict, optional): Overrides UPLOAD_SETTINGS
+        """
+        self.uploader = uploader
+        self.settings = settings or UPLOAD_SETTINGS
+        self.spool_dir = self.settings["spool_dir"]
+        self.fallback_dir = self.settings["fallback_dir"]
+        self.max_memory_items = self.settings["max_memory_items"]
+        self.backoff = self.settings["backoff"]
+        self.max_attempts = self.settings["max_attempts"]
+
+        self._heap = []  # (due time, sequence, item id)
+        self._items = {}  # item id -> item (manifest plus "data" or "dir")
+        self._keys = set()  # Keys of pending items, to skip duplicate content-hash uploads
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.running = False
+        self.threads = []
+
+        # Statistics
+        self.enqueued = 0
+        self.duplicates = 0
+        self.spilled = 0
+        self.uploaded = 0
+        self.retries = 0
+        self.given_up = 0
+        self.in_flight = 0
+
+    def start(self):
+        """Recover spooled items and start the upload workers"""
+        for directory in self._disk_dirs():
+            os.makedirs(directory, exist_ok=True)
+            recovered = self._recover(directory)
+            if recovered:
+                print(json.dumps({
+                    "type": "info",
+                    "data": f"Resuming {recovered} pending uploads from {directory}"
+                }), flush=True)
+
+        self.running = True
+        for index in range(self.settings["workers"]):
+            thread = threading.Thread(target=self._worker, name=f"upload-{index}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """Stop the workers; items on disk stay there for the next start()"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=timeout)
+        self.threads = []
+
+    def _disk_dirs(self):
+        """Configured directories that may hold items"""
+        return [d for d in dict.fromkeys([self.spool_dir, self.fallback_dir]) if d]
+
+    def _paths(self, directory, item_id):
+        """Data and manifest paths of an item on disk"""
+        base = os.path.join(directory, item_id)
+        return base + ".jpg", base + ".json"
+
+    def _write_atomic(self, path, data):
+        """Write a file so that readers see either nothing or the full content"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _manifest(self, item):
+        """Serializable part of an item"""
+        return json.dumps({k: item[k] for k in ("key", "metadata", "attempts", "created")}).encode()
+
+    def _persist(self, item_id, item, directory):
+        """Move an in-memory item to disk"""
+        os.makedirs(directory, exist_ok=True)
+        data_path, manifest_path = self._paths(directory, item_id)
+        self._write_atomic(data_path, item["data"])
+        self._write_atomic(manifest_path, self._manifest(item))
+        item.pop("data")
+        item["dir"] = directory
+
+    def _schedule(self, item_id, due):
+        """Put an item on the ready heap (caller holds the lock)"""
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, item_id))
+        self._cond.notify()
+
+    def enqueue(self, data, key, metadata=None):
+        """
+        Queue an encoded image for upload
+        Args:
+            data (bytes): Encoded image
+            key (str): Full S3 key
+            metadata (dict, optional): S3 object metadata (string values)
+        Returns:
+            str: Item id, or None if the item was not queued
+        """
+        with self._cond:
+            if key in self._keys:
+                self.duplicates += 1  # Same content-hash key already pending
+                return None
+
+        item_id = f"{time.time_ns()}_{uuid.uuid4().hex[:8]}"
+        item = {"key": key, "metadata": metadata or {}, "attempts": 0, "created": time.time(),
+                "data": bytes(data)}
+        if self.spool_dir:
+            self._persist(item_id, item, self.spool_dir)
+        elif len(self._items) >= self.max_memory_items:
+            if not self.fallback_dir:
+                print(json.dumps({
+                    "type": "error",
+                    "data": f"Upload queue full, dropping {key}"
+                }), flush=True)
+                return None
+            self._persist(item_id, item, self.fallback_dir)
+            self.spilled += 1
+
+        with self._cond:
+            self._items[item_id] = item
+            self._keys.add(key)
+            self._schedule(item_id, time.time())
+            self.enqueued += 1
+        return item_id
+
+    def _recover(self, directory):
+        """Load items left in a directory by a previous run"""
+        recovered = 0
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)  # Interrupted write
+                continue
+            if not name.endswith(".json"):
+                continue
+            item_id = name[:-len(".json")]
+            data_path, _ = self._paths(directory, item_id)
+            try:
+                with open(path) as f:
+                    item = json.load(f)
+            except (OSError, ValueError):
+                item = None
+            if item is None or not os.path.exists(data_path):
+                os.remove(path)
+                continue
+            item.setdefault("metadata", {})
+            item["dir"] = directory
+            with self._cond:
+                if item_id not in self._items:
+                    self._items[item_id] = item
+                    self._keys.add(item["key"])
+                    self._schedule(item_id, time.time())
+                    recovered += 1
+
+        # Image files whose manifest was never written belong to interrupted writes
+        for name in os.listdir(directory):
+            if name.endswith(".jpg") and name[:-len(".jpg")] not in self._items:
+                os.remove(os.path.join(directory, name))
+        return recovered
+
+    def _next_item(self):
+        """Wait for the next due item; None when stopping"""
+        with self._cond:
+            while self.running:
+                if self._heap:
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        _, _, item_id = heapq.heappop(self._heap)
+                        self.in_flight += 1
+                        return item_id
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _worker(self):
+        """Upload loop of one worker thread"""
+        while True:
+            item_id = self._next_item()
+            if item_id is None:
+                return
+            try:
+                self._upload(item_id)
+            finally:
+                with self._cond:
+                    self.in_flight -= 1
+
+    def _remove(self, item_id, item):
+        """Forget an item and delete its files"""
+        if "dir" in item:
+            for path in self._paths(item["dir"], item_id):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        with self._cond:
+            del self._items[item_id]
+            self._keys.discard(item["key"])
+
+    def _upload(self, item_id):
+        """Upload one item and reschedule it on failure"""
+        item = self._items[item_id]
+        try:
+            data = item.get("data")
+            if data is None:
+                with open(self._paths(item["dir"], item_id)[0], "rb") as f:
+                    data = f.read()
+            url = self.uploader.put_bytes(data, item["key"], item["metadata"])
+        except Exception as e:
+            self._retry_later(item_id, item, e)
+            return
+
+        self._remove(item_id, item)
+        with self._cond:
+            self.uploaded += 1
+        print(json.dumps({
+            "type": "info",
+            "data": f"Uploaded to S3: {url}"
+        }), flush=True)
+
+    def _retry_later(self, item_id, item, error):
+        """Exponential backoff with jitter, or give up after max_attempts"""
+        item["attempts"] += 1
+        attempts = item["attempts"]
+
+        if self.max_attempts and attempts >= self.max_attempts:
+            directory = item.get("dir") or self.fallback_dir
+            if directory:
+                # Keep the capture for inspection or manual re-upload
+                if "data" in item:
+                    self._persist(item_id, item, directory)
+                failed_dir = os.path.join(directory, "failed")
+                os.makedirs(failed_dir, exist_ok=True)
+                for path in self._paths(directory, item_id):
+                    os.replace(path, os.path.join(failed_dir, os.path.basename(path)))
+            with self._cond:
+                del self._items[item_id]
+                self._keys.discard(item["key"])
+                self.given_up += 1
+            print(json.dumps({
+                "type": "error",
+                "data": f"Giving up on {item['key']} after {attempts} attempts: {str(error)}"
+            }), flush=True)
+            return
+
+        if "data" in item and self.fallback_dir:
+            self._persist(item_id, item, self.fallback_dir)  # Survive a restart while S3 is unreachable
+            self.spilled += 1
+        elif "dir" in item:
+            self._write_atomic(self._paths(item["dir"], item_id)[1], self._manifest(item))
+
+        delay = min(self.backoff["max"], self.backoff["initial"] * 2 ** (attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        with self._cond:
+            self.retries += 1
+            self._schedule(item_id, time.time() + delay)
+        print(json.dumps({
+            "type": "error",
+            "data": f"Upload attempt {attempts} for {item['key']} failed, retrying in {delay:.1f}s: {str(error)}"
+        }), flush=True)
+
+    @property
+    def pending(self):
+        """Items waiting for upload, including those being uploaded"""
+        return len(self._items)
+
+    def wait_idle(self, timeout=None):
+        """Block until nothing is pending; returns False on timeout"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._items:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def get_stats(self):
+        """Get upload statistics"""
+        return {
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "enqueued": self.enqueued,
+            "duplicates": self.duplicates,
+            "spilled_to_disk": self.spilled,
+            "uploaded": self.uploaded,
+            "retries": self.retries,
+            "given_up": self.given_up
+        }
@@ -32,3 +32,18 @@ def draw_stats(frame, fps, person_count, _):
                 (10, 70),
                 getattr(cv2, viz_config["font"]["face"]),
                 1, viz_config["font"]["color"], 2)
+
+def draw_regions(frame, polygon, lines, counts):
+    """Draw the region of interest and counting lines with their in/out counts"""
+    if polygon is not None:
+        cv2.polylines(frame, [polygon], True, viz_config["region_color"], 1)
+        
+    for name, start, end in lines:
+        cv2.line(frame, start, end, viz_config["line_color"], viz_config["box_thickness"])
+        line_counts = counts.get(name, {"in": 0, "out": 0})
+        cv2.putText(frame, f"{name}: in {line_counts['in']} / out {line_counts['out']}",
+                    (start[0], max(15, start[1] - 10)),
+                    getattr(cv2, viz_config["font"]["face"]),
+                    viz_config["font"]["scale"],
+                    viz_config["line_color"],
+                    viz_config["font"]["thickness"])